@@ -1,14 +1,15 @@
 # api/price_views.py
-from django.http import JsonResponse
+from django.http import HttpResponseNotModified, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_GET
-import yfinance as yf
 from datetime import datetime, timezone
 import time
 import math
 import json
 import os
 import re
+import threading
+import zlib
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
@@ -17,14 +18,24 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 from api.models import Watchlist
 from core_engine.analyzer import analyze_stock
 from core_engine.price_engine import (
-    PRICE_CACHE,
     get_price,
     get_change_percent,
     register_symbol,
+    subscribe,
+    unsubscribe,
+    quote_epoch,
+    quote_version,
+    quotes_changed_since,
+    wait_for_quote_change,
 )
 from core_engine.symbol_resolver import resolve_symbol, DF
-from core_engine.prediction_history import load_history_any
+from core_engine.prediction_history import history_snapshot
 from core_engine.news_fetcher import get_market_news
+from core_engine.single_flight import YAHOO_FLIGHTS
+from core_engine.market_data_provider import get_provider
+from core_engine.data_fetch import fetch_daily_history
+from core_engine.tick_buffer import bars_frame, intraday_bars, seed_bars
+from core_engine.trading_calendar import now_ist, previous_trading_day, session_bounds
 
 _SYMBOL_ALIASES = {
     "RIL": "RELIANCE",
@@ -51,9 +62,25 @@ _PEERS_MAP_CACHE = None
 _PEER_UNIVERSE_CACHE = None
 _TICKER_INFO_CACHE = {}
 _TICKER_INFO_MAX = 200
-_HISTORY_PRICE_CACHE = {"ts": 0.0, "prices": {}, "changes": {}}
+_HISTORY_PRICE_CACHE = {"ts": 0.0, "prices": {}, "changes": {}, "version": None}
 _HISTORY_PRICE_TTL = 60
 
+# quote stream: heartbeat keeps proxies from closing idle connections;
+# streams end after a while so request threads are recycled (clients reconnect)
+_QUOTE_STREAM_HEARTBEAT = 15
+_QUOTE_STREAM_MAX_SECONDS = int(os.getenv("SEESTOX_QUOTE_STREAM_MAX_SECONDS", "300"))
+_QUOTE_STREAM_MAX_SYMBOLS = 100
+
+# an open stream holds one request thread, so streams are only served by
+# threaded WSGI workers (gunicorn -k gthread --threads N, runserver). Sync
+# workers and the ASGI entry point (which buffers this sync generator)
+# get 503 + Retry-After and clients keep polling /api/v1/quotes.
+# Keep SEESTOX_QUOTE_STREAM_MAX_ACTIVE well below --threads so ordinary
+# requests always find a free thread.
+_QUOTE_STREAM_MAX_ACTIVE = int(os.getenv("SEESTOX_QUOTE_STREAM_MAX_ACTIVE", "4"))
+_QUOTE_STREAM_RETRY_AFTER = 30
+_QUOTE_STREAM_SLOTS = threading.BoundedSemaphore(max(1, _QUOTE_STREAM_MAX_ACTIVE))
+
 
 def _history_price_map():
     now_ts = time.time()
@@ -62,9 +89,14 @@ def _history_price_map():
     if cached_prices and now_ts - _HISTORY_PRICE_CACHE.get("ts", 0.0) < _HISTORY_PRICE_TTL:
         return cached_prices, cached_changes
 
-    records, _, _ = load_history_any()
+    snapshot = history_snapshot()
+    if cached_prices and _HISTORY_PRICE_CACHE.get("version") == snapshot.version:
+        # history unchanged since the last build
+        _HISTORY_PRICE_CACHE["ts"] = now_ts
+        return cached_prices, cached_changes
+
     per_symbol = {}
-    for record in records:
+    for record in snapshot.records:
         if not isinstance(record, dict):
             continue
         symbol = record.get("symbol") or record.get("_symbol_key")
@@ -107,6 +139,7 @@ def _history_price_map():
                     pass
 
     _HISTORY_PRICE_CACHE["ts"] = now_ts
+    _HISTORY_PRICE_CACHE["version"] = snapshot.version
     _HISTORY_PRICE_CACHE["prices"] = prices
     _HISTORY_PRICE_CACHE["changes"] = changes
     return prices, changes
@@ -150,11 +183,10 @@ def _strip_suffix(symbol: str) -> str:
     return symbol.replace(".NS", "").replace(".BO", "")
 
 
-def _get_ticker_info(symbol: str):
-    if symbol in _TICKER_INFO_CACHE:
-        return _TICKER_INFO_CACHE[symbol]
+def _fetch_ticker_info(symbol: str):
+    # concurrent callers for the same symbol share one `.info` request
     try:
-        info = yf.Ticker(symbol).info or {}
+        info = YAHOO_FLIGHTS.do(("info", symbol), lambda: get_provider().ticker(symbol).info or {})
     except Exception:
         info = {}
     if len(_TICKER_INFO_CACHE) >= _TICKER_INFO_MAX:
@@ -163,6 +195,16 @@ def _get_ticker_info(symbol: str):
     return info
 
 
+def _fetch_ticker_news(symbol: str):
+    return YAHOO_FLIGHTS.do(("news", symbol), lambda: get_provider().ticker(symbol).news or [])
+
+
+def _get_ticker_info(symbol: str):
+    if symbol in _TICKER_INFO_CACHE:
+        return _TICKER_INFO_CACHE[symbol]
+    return _fetch_ticker_info(symbol)
+
+
 def _extract_keywords(text: str):
     if not text:
         return set()
@@ -224,7 +266,7 @@ def _holder_percent(major_map, info, key_candidates, info_key):
     return None
 
 
-def _shareholding_data(ticker):
+def _shareholding_data(ticker, info=None):
     data = {
         "promoters": [],
         "fii": [],
@@ -235,7 +277,8 @@ def _shareholding_data(ticker):
     if ticker is None:
         return data, "none", "Shareholding data unavailable for this symbol."
     try:
-        info = ticker.info or {}
+        if info is None:
+            info = ticker.info or {}
         major = _parse_major_holders(getattr(ticker, "major_holders", None))
     except Exception:
         info = {}
@@ -418,7 +461,8 @@ def watchlist_price_data(request):
     data = []
     for item in items:
         symbol = item.symbol
-        price = PRICE_CACHE.get(symbol)
+        register_symbol(symbol, eager=False)
+        price = get_price(symbol)
 
         data.append({
             "symbol": symbol,
@@ -428,27 +472,206 @@ def watchlist_price_data(request):
     return JsonResponse({"watchlist": data})
 
 
+def _parse_symbols(raw: str):
+    return [s.strip().upper() for s in (raw or "").split(",") if s.strip()]
+
+
+def _quote_row(symbol, history_prices, history_changes):
+    resolved = _SYMBOL_ALIASES.get(symbol, symbol)
+    current_price = get_price(resolved)
+    change_pct = get_change_percent(resolved)
+    if current_price is None:
+        current_price = history_prices.get(resolved) or history_prices.get(symbol)
+    if change_pct is None:
+        change_pct = history_changes.get(resolved) or history_changes.get(symbol)
+    return {
+        "symbol": symbol,
+        "current_price": current_price,
+        "change_percent": change_pct,
+    }
+
+
+def _quotes_etag(symbols, since, epoch, version, fallback_rows) -> str:
+    # fallback_rows: history-derived values for symbols with no live quote
+    fallback = json.dumps(fallback_rows, sort_keys=True, default=str)
+    digest = zlib.crc32(f"{','.join(symbols)}|{since}|{epoch}|{fallback}".encode("utf-8"))
+    return f'W/"q{version}-{digest:08x}"'
+
+
+def _etag_matches(request, etag: str) -> bool:
+    header = request.META.get("HTTP_IF_NONE_MATCH", "")
+    return any(tag.strip() in (etag, "*") for tag in header.split(",") if tag.strip())
+
+
 @require_GET
 def quotes_api(request):
-    symbols = request.GET.get("symbols", "")
-    symbols = [s.strip().upper() for s in symbols.split(",") if s.strip()]
-    history_prices, history_changes = _history_price_map()
-    data = []
-    for symbol in symbols:
-        resolved = _SYMBOL_ALIASES.get(symbol, symbol)
-        register_symbol(resolved, eager=False)
-        current_price = get_price(resolved)
-        change_pct = get_change_percent(resolved)
-        if current_price is None:
-            current_price = history_prices.get(resolved) or history_prices.get(symbol)
-        if change_pct is None:
-            change_pct = history_changes.get(resolved) or history_changes.get(symbol)
-        data.append({
-            "symbol": symbol,
-            "current_price": current_price,
-            "change_percent": change_pct,
-        })
-    return JsonResponse({"quotes": data})
+    """
+    ?symbols=A,B[&since=<version>&epoch=<epoch>]
+    `version` / `epoch` in the response name the engine's quote version;
+    passing both back returns only symbols that changed after it. A
+    version from another epoch (other worker, restart) gets a full
+    snapshot. The ETag follows the newest version among the requested
+    symbols plus any history fallback values, so an unchanged poll is
+    answered with 304.
+    """
+    symbols = _parse_symbols(request.GET.get("symbols", ""))
+    try:
+        since = int(request.GET["since"]) if request.GET.get("since") else None
+    except ValueError:
+        return JsonResponse({"error": "since must be an integer"}, status=400)
+
+    resolved = {symbol: _SYMBOL_ALIASES.get(symbol, symbol) for symbol in symbols}
+    for symbol in set(resolved.values()):
+        register_symbol(symbol, eager=False)
+
+    epoch = quote_epoch()
+    version, versions = quotes_changed_since(set(resolved.values()), 0)
+    if since is not None and (request.GET.get("epoch") != epoch or since > version):
+        # a version from another sequence, or never issued: resend all
+        since = None
+    symbols_version = max((entry[2] for entry in versions.values()), default=0)
+
+    history_prices, history_changes = {}, {}
+    fallback_rows = []
+    if any(resolved[symbol] not in versions for symbol in symbols):
+        history_prices, history_changes = _history_price_map()
+        fallback_rows = [
+            _quote_row(symbol, history_prices, history_changes)
+            for symbol in symbols
+            if resolved[symbol] not in versions
+        ]
+
+    etag = _quotes_etag(symbols, since, epoch, symbols_version, fallback_rows)
+    if _etag_matches(request, etag):
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        return response
+
+    if since is not None:
+        # changed live quotes, plus symbols still served from history
+        # (their fallback carries no version)
+        symbols = [
+            symbol for symbol in symbols
+            if resolved[symbol] not in versions or versions[resolved[symbol]][2] > since
+        ]
+    payload = {
+        "quotes": [_quote_row(symbol, history_prices, history_changes) for symbol in symbols],
+        "version": version,
+        "epoch": epoch,
+    }
+    if since is not None:
+        payload["since"] = since
+    response = JsonResponse(payload)
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+def _stream_user(request):
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return user
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except Exception:
+        return None
+    return result[0] if result else None
+
+
+def _sse(event: str, version: int, payload) -> str:
+    return f"event: {event}\nid: {version}\ndata: {json.dumps(payload)}\n\n"
+
+
+def _quote_events(symbols, max_seconds=None):
+    """
+    One snapshot, then only the symbols whose quote changed, as pushed by
+    the price engine. The symbols stay subscribed while the stream is open.
+    """
+    resolved = {symbol: _SYMBOL_ALIASES.get(symbol, symbol) for symbol in symbols}
+    tracked = sorted(set(resolved.values()))
+    for symbol in tracked:
+        subscribe(symbol)
+    try:
+        history_prices, history_changes = _history_price_map()
+        version = quote_version()
+        yield "retry: 3000\n\n"
+        yield _sse("quotes", version, [_quote_row(s, history_prices, history_changes) for s in symbols])
+
+        deadline = time.time() + (_QUOTE_STREAM_MAX_SECONDS if max_seconds is None else max_seconds)
+        while time.time() < deadline:
+            timeout = min(_QUOTE_STREAM_HEARTBEAT, max(0.0, deadline - time.time()))
+            if wait_for_quote_change(version, timeout) <= version:
+                yield ": keepalive\n\n"
+                continue
+            version, changed = quotes_changed_since(tracked, version)
+            rows = [
+                _quote_row(symbol, history_prices, history_changes)
+                for symbol in symbols
+                if resolved[symbol] in changed
+            ]
+            if rows:
+                yield _sse("quotes", version, rows)
+    finally:
+        # runs when the client disconnects (generator closed) or on timeout
+        for symbol in tracked:
+            unsubscribe(symbol)
+
+
+class _StreamSlot:
+    """
+    Streaming content holding one _QUOTE_STREAM_SLOTS slot until the
+    response is closed, also when the client leaves before the first event.
+    """
+
+    def __init__(self, events):
+        self._events = events
+        self._released = False
+
+    def __iter__(self):
+        return iter(self._events)
+
+    def close(self):
+        if self._released:
+            return
+        self._released = True
+        try:
+            self._events.close()
+        finally:
+            _QUOTE_STREAM_SLOTS.release()
+
+
+def _stream_unavailable(reason: str):
+    response = JsonResponse({"error": reason, "fallback": "/api/v1/quotes"}, status=503)
+    response["Retry-After"] = str(_QUOTE_STREAM_RETRY_AFTER)
+    return response
+
+
+@require_GET
+def quotes_stream_api(request):
+    """
+    Server-sent events replacing the 3s quotes/watchlist poll.
+    ?symbols=A,B  (defaults to the caller's watchlist when signed in)
+    503 when this worker cannot hold a stream open (see _QUOTE_STREAM_MAX_ACTIVE).
+    """
+    symbols = _parse_symbols(request.GET.get("symbols", ""))
+    if not symbols:
+        user = _stream_user(request)
+        if user is not None:
+            symbols = list(Watchlist.objects.filter(user=user).values_list("symbol", flat=True))
+    if not symbols:
+        return JsonResponse({"error": "symbols required"}, status=400)
+    if len(symbols) > _QUOTE_STREAM_MAX_SYMBOLS:
+        return JsonResponse({"error": f"at most {_QUOTE_STREAM_MAX_SYMBOLS} symbols"}, status=400)
+
+    if request.META.get("wsgi.multithread") is not True:
+        return _stream_unavailable("quote streaming needs a threaded worker")
+    if not _QUOTE_STREAM_SLOTS.acquire(blocking=False):
+        return _stream_unavailable("too many open quote streams")
+
+    response = StreamingHttpResponse(_StreamSlot(_quote_events(symbols)), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
 
 
 def _exchange_for_symbol(symbol: str) -> str:
@@ -533,8 +756,33 @@ def _format_compact(value):
     return f"{number:.2f}"
 
 
+def _buffered_session_frame(symbol: str):
+    """
+    5m bars of the latest session from the price engine's bar ring, or
+    None when the ring does not reach back to the session open (cold).
+    """
+    now = now_ist()
+    bounds = session_bounds(now.date())
+    if bounds is None or now < bounds[0]:
+        bounds = session_bounds(previous_trading_day(now.date()))
+    open_ts, close_ts = bounds[0].timestamp(), bounds[1].timestamp()
+    bars = intraday_bars(symbol, 5, since=open_ts)
+    bars = bars[bars[:, 0] <= close_ts]
+    if not len(bars) or bars[0, 0] > open_ts + 5 * 60:
+        return None
+    return bars_frame(bars)
+
+
 def _intraday_chart(symbol: str):
-    ticker = yf.Ticker(f"{symbol}.NS")
+    buffered = _buffered_session_frame(symbol)
+    if buffered is not None:
+        chart = _chart_from_frame(buffered, "%H:%M")
+        if chart is not None:
+            return chart
+
+    # cold miss: Yahoo, and seed the ring so later loads stay local
+    yf_symbol = f"{symbol}.NS"
+    ticker = get_provider().ticker(yf_symbol)
     candidates = [
         ("1d", "5m", "%H:%M"),
         ("5d", "15m", "%d %b %H:%M"),
@@ -542,52 +790,70 @@ def _intraday_chart(symbol: str):
     ]
     for period, interval, label_fmt in candidates:
         try:
-            data = ticker.history(period=period, interval=interval)
+            if interval == "1d":
+                # daily bars: slice of the cached history window, no extra request
+                data = fetch_daily_history(symbol, period=period)
+            else:
+                # shared read-only frame when several detail views load at once
+                data = YAHOO_FLIGHTS.do(
+                    ("intraday", yf_symbol, period, interval),
+                    ticker.history,
+                    period=period,
+                    interval=interval,
+                )
         except Exception:
             data = None
         if data is None or data.empty:
             continue
-        points = []
-        for index, row in data.iterrows():
-            try:
-                price = float(row.get("Close", 0))
-            except Exception:
-                continue
-            if price == 0 or not math.isfinite(price):
-                continue
-            ts_val = None
-            try:
-                ts_val = int(index.timestamp())
-            except Exception:
-                ts_val = None
-            points.append({
-                "t": index.strftime(label_fmt),
-                "p": round(price, 2),
-                "time": index.strftime(label_fmt),
-                "price": round(price, 2),
-                "ts": ts_val,
-            })
-        if not points:
-            continue
-        low = float(data["Low"].min()) if "Low" in data else None
-        high = float(data["High"].max()) if "High" in data else None
-        if low is not None and not math.isfinite(low):
-            low = None
-        if high is not None and not math.isfinite(high):
-            high = None
-        first = points[0]["p"]
-        last = points[-1]["p"]
-        day_return = None
-        if first:
-            value = ((last - first) / first) * 100
-            if math.isfinite(value):
-                day_return = round(value, 2)
-        low_out = round(low, 2) if low is not None else None
-        high_out = round(high, 2) if high is not None else None
-        return points, low_out, high_out, day_return
+        if interval == "5m":
+            seed_bars(symbol, data, 5)
+        chart = _chart_from_frame(data, label_fmt)
+        if chart is not None:
+            return chart
     return [], None, None, None
 
 
+def _chart_from_frame(data, label_fmt: str):
+    points = []
+    for index, row in data.iterrows():
+        try:
+            price = float(row.get("Close", 0))
+        except Exception:
+            continue
+        if price == 0 or not math.isfinite(price):
+            continue
+        ts_val = None
+        try:
+            ts_val = int(index.timestamp())
+        except Exception:
+            ts_val = None
+        points.append({
+            "t": index.strftime(label_fmt),
+            "p": round(price, 2),
+            "time": index.strftime(label_fmt),
+            "price": round(price, 2),
+            "ts": ts_val,
+        })
+    if not points:
+        return None
+    low = float(data["Low"].min()) if "Low" in data else None
+    high = float(data["High"].max()) if "High" in data else None
+    if low is not None and not math.isfinite(low):
+        low = None
+    if high is not None and not math.isfinite(high):
+        high = None
+    first = points[0]["p"]
+    last = points[-1]["p"]
+    day_return = None
+    if first:
+        value = ((last - first) / first) * 100
+        if math.isfinite(value):
+            day_return = round(value, 2)
+    low_out = round(low, 2) if low is not None else None
+    high_out = round(high, 2) if high is not None else None
+    return points, low_out, high_out, day_return
+
+
 def _build_financials(info: dict):
     def _guardrail(metric_key, value, market_cap=None):
         if value is None:
@@ -1070,8 +1336,8 @@ def _build_structured_financials(info, ticker):
 
 def _technical_indicators(symbol: str):
     try:
-        ticker = yf.Ticker(f"{symbol}.NS")
-        data = ticker.history(period="1y")
+        # shares the per-symbol daily window with analyze_stock (6mo is a slice of it)
+        data = fetch_daily_history(symbol, period="1y")
         if data is None or data.empty:
             return []
         close = data["Close"]
@@ -1411,7 +1677,7 @@ def _dtar_series(balance_df, limit=6):
     return points
 
 
-def _financial_indicators(ticker):
+def _financial_indicators(ticker, info=None):
     data = {
         "roe": {"annual": [], "quarterly": []},
         "roa": {"annual": [], "quarterly": []},
@@ -1442,7 +1708,8 @@ def _financial_indicators(ticker):
         quarterly_financials = ticker.quarterly_financials
         annual_balance = ticker.balance_sheet
         quarterly_balance = ticker.quarterly_balance_sheet
-        info = ticker.info or {}
+        if info is None:
+            info = ticker.info or {}
     except Exception:
         return data
 
@@ -1552,9 +1819,10 @@ def stock_detail_api(request):
     info = {}
     news = []
     try:
-        ticker = yf.Ticker(f"{price_symbol}.NS")
-        info = ticker.info or {}
-        raw_news = ticker.news or []
+        yf_symbol = f"{price_symbol}.NS"
+        ticker = get_provider().ticker(yf_symbol)
+        info = _fetch_ticker_info(yf_symbol)
+        raw_news = _fetch_ticker_news(yf_symbol)
         for item in raw_news:
             title = item.get("title")
             if not title:
@@ -1589,8 +1857,8 @@ def stock_detail_api(request):
     fundamentals = _build_financials(info)
     technicals = _technical_indicators(price_symbol)
     company_financials = _company_financials(ticker)
-    financial_indicators = _financial_indicators(ticker)
-    shareholding, shareholding_mode, shareholding_note = _shareholding_data(ticker)
+    financial_indicators = _financial_indicators(ticker, info=info)
+    shareholding, shareholding_mode, shareholding_note = _shareholding_data(ticker, info=info)
     structured_financials = _build_structured_financials(info, ticker)
 
     peers, peers_mode, peers_note = _build_peer_rows(price_symbol, company)
@@ -1,3 +1,1025 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
 
 # Create your tests here.
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from unittest import mock
+
+from api import price_views
+from api.models import Watchlist
+from api.watchlist_views import watchlisted_symbols
+from core_engine import (
+    analysis_cache,
+    analyzer,
+    data_fetch,
+    ohlcv_store,
+    prediction_engine,
+    prediction_history,
+    price_engine,
+    range_engine,
+    sentiment_engine,
+    stage_graph,
+    tick_buffer,
+    trading_calendar,
+    trend_engine,
+)
+from core_engine.frame_cache import FrameCache
+from core_engine.ml_engine import history_columns
+from core_engine.history_store import HistoryStore, migrate_json_file
+from core_engine.market_data_provider import LiveProvider, RecordingProvider, RecordingStore, ReplayMiss, ReplayProvider
+from core_engine.price_series import PriceSeries
+from core_engine.quote_store import QuoteStore
+from core_engine.single_flight import SingleFlight
+
+
+# environ of a threaded WSGI worker (the test client reports a sync one)
+THREADED = {"wsgi.multithread": True}
+
+
+def _ohlcv_frame(days, closes):
+    closes = np.asarray(closes, dtype=float)
+    return pd.DataFrame(
+        {"Open": closes, "High": closes + 1, "Low": closes - 1, "Close": closes, "Volume": 1000.0},
+        index=pd.DatetimeIndex(pd.to_datetime(days), name="Date"),
+    )
+
+
+def _recent_days(count):
+    return [str(day.date()) for day in pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=count)]
+
+
+class FrameCacheTestCase(TestCase):
+    def test_evicts_least_recently_used_and_expires_by_ttl(self):
+        cache = FrameCache(max_entries=2, max_bytes=10 ** 6)
+        cache.put("a", _ohlcv_frame(_recent_days(3), [1, 2, 3]))
+        cache.put("b", _ohlcv_frame(_recent_days(3), [4, 5, 6]))
+        self.assertIsNotNone(cache.get("a"))  # "b" is now the oldest
+        cache.put("c", _ohlcv_frame(_recent_days(3), [7, 8, 9]))
+
+        self.assertNotIn("b", cache)
+        self.assertIn("a", cache)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+        cache.put("old", _ohlcv_frame(_recent_days(3), [1, 2, 3]), ts=time.time() - 60)
+        self.assertIsNone(cache.get("old", ttl=30))
+        self.assertNotIn("old", cache)
+        self.assertEqual(cache.stats()["expired"], 1)
+
+    def test_byte_budget_bounds_the_cache(self):
+        frame = _ohlcv_frame(_recent_days(3), [1, 2, 3])
+        cache = FrameCache(max_entries=10, max_bytes=int(frame.memory_usage(index=True).sum() * 1.5))
+        cache.put("a", frame)
+        cache.put("b", _ohlcv_frame(_recent_days(3), [4, 5, 6]))
+        self.assertEqual(list(cache._entries), ["b"])
+
+        cache.put("huge", _ohlcv_frame(_recent_days(30), range(30)))
+        self.assertNotIn("huge", cache)
+
+    def test_views_share_read_only_buffers(self):
+        cache = FrameCache(max_entries=4, max_bytes=10 ** 6)
+        cache.put("a", _ohlcv_frame(_recent_days(3), [1, 2, 3]))
+        view = cache.get("a")
+
+        with self.assertRaises(ValueError):
+            view.loc[view.index[0], "Close"] = 99.0
+        # new columns and attrs on a view do not reach the cached frame
+        view["symbol"] = "TCS"
+        view.attrs["yf_symbol"] = "TCS.NS"
+        again = cache.get("a")
+        self.assertNotIn("symbol", again.columns)
+        self.assertEqual(again.attrs, {})
+        self.assertEqual(list(again["Close"]), [1, 2, 3])
+
+
+class OhlcvStoreTestCase(TestCase):
+    def setUp(self):
+        path = ohlcv_store._store_path("ZZOHLCV.NS")
+        self.addCleanup(lambda: os.path.exists(path) and os.remove(path))
+
+    def test_tops_up_and_redownloads_when_adjusted_prices_move(self):
+        days = _recent_days(6)
+        provider = mock.Mock()
+        provider.download.return_value = _ohlcv_frame(days[:4], [10, 11, 12, 13])
+        with mock.patch.object(data_fetch, "get_provider", return_value=provider), \
+                mock.patch.object(data_fetch, "_is_cache_valid", return_value=False):
+            self.assertEqual(len(data_fetch._load_history_bars("ZZOHLCV.NS", "1mo", 30)["date"]), 4)
+
+            # top-up starts at the last settled bar, which still agrees
+            provider.download.return_value = _ohlcv_frame(days[2:5], [12, 13.5, 14])
+            bars = data_fetch._load_history_bars("ZZOHLCV.NS", "1mo", 30)
+            self.assertEqual(provider.download.call_args.kwargs["start"], days[2])
+            self.assertEqual(list(bars["close"]), [10, 11, 12, 13.5, 14])
+            stored = ohlcv_store.load_bars("ZZOHLCV.NS")
+            self.assertEqual(list(stored["close"]), [10, 11, 12, 13.5, 14])
+
+            # a 1:2 split re-prices the overlap: the stored range is fetched again
+            provider.download.side_effect = [
+                _ohlcv_frame(days[3:], [6.75, 7, 7.5]),
+                _ohlcv_frame(days, [5, 5.5, 6, 6.75, 7, 7.5]),
+            ]
+            bars = data_fetch._load_history_bars("ZZOHLCV.NS", "1mo", 30)
+            self.assertEqual(provider.download.call_args.kwargs["start"], str(stored["covered_from"]))
+            self.assertEqual(list(ohlcv_store.load_bars("ZZOHLCV.NS")["close"]), [5, 5.5, 6, 6.75, 7, 7.5])
+
+
+class PeriodReuseTestCase(TestCase):
+    def setUp(self):
+        path = ohlcv_store._store_path("ZZPERIOD.NS")
+        self.addCleanup(lambda: os.path.exists(path) and os.remove(path))
+        self.addCleanup(data_fetch._CACHE.pop, ("ZZPERIOD", "ZZPERIOD.NS"))
+
+    def test_shorter_period_is_sliced_from_the_cached_window(self):
+        days = _recent_days(260)
+        provider = mock.Mock()
+        provider.download.return_value = _ohlcv_frame(days, np.arange(260) + 100.0)
+        with mock.patch.object(data_fetch, "get_provider", return_value=provider), \
+                mock.patch.object(data_fetch, "is_market_open", return_value=False):
+            year = data_fetch.fetch_stock_data("ZZPERIOD", period="1y")
+            half = data_fetch.fetch_stock_data("ZZPERIOD", period="6mo")
+
+        self.assertEqual(provider.download.call_count, 1)
+        self.assertLess(len(half), len(year))
+        start = data_fetch._period_start("6mo")
+        self.assertGreaterEqual(half["Date"].iloc[0], pd.Timestamp(start))
+        self.assertLess(year["Date"].iloc[0], pd.Timestamp(start))
+        self.assertEqual(half["Date"].iloc[-1], year["Date"].iloc[-1])
+        self.assertEqual(list(half["symbol"].unique()), ["ZZPERIOD"])
+
+
+class BulkFetchTestCase(TestCase):
+    symbols = ["ZZBULKA", "ZZBULKB", "ZZBULKC"]
+
+    def setUp(self):
+        for symbol in self.symbols:
+            path = ohlcv_store._store_path(f"{symbol}.NS")
+            self.addCleanup(lambda path=path: os.path.exists(path) and os.remove(path))
+
+    def test_downloads_in_chunks_and_falls_back_for_missed_tickers(self):
+        days = _recent_days(5)
+
+        def download(tickers, **kwargs):
+            # the batch never returns ZZBULKC (e.g. a renamed ticker)
+            frames = {t: _ohlcv_frame(days, [10, 11, 12, 13, 14]) for t in tickers if t != "ZZBULKC.NS"}
+            return pd.concat(frames, axis=1) if frames else pd.DataFrame()
+
+        provider = mock.Mock()
+        provider.download.side_effect = download
+        fallback = _ohlcv_frame(days, [1, 2, 3, 4, 5]).reset_index()
+        with mock.patch.object(data_fetch, "get_provider", return_value=provider), \
+                mock.patch.object(data_fetch, "fetch_stock_data", return_value=fallback) as single:
+            results = data_fetch.fetch_stock_data_many(self.symbols + ["zzbulka"], period="1mo", chunk_size=2)
+
+            self.assertEqual(
+                [call.args[0] for call in provider.download.call_args_list],
+                [["ZZBULKA.NS", "ZZBULKB.NS"], ["ZZBULKC.NS"]],
+            )
+            single.assert_called_once_with("ZZBULKC.NS", period="1mo")
+            self.assertEqual(sorted(results), self.symbols)
+            self.assertEqual(list(results["ZZBULKA"][("Close", "ZZBULKA.NS")]), [10, 11, 12, 13, 14])
+            self.assertEqual(set(results["ZZBULKB"]["symbol"]), {"ZZBULKB"})
+            self.assertIs(results["ZZBULKC"], fallback)
+            self.assertEqual(list(ohlcv_store.load_bars("ZZBULKB.NS")["close"]), [10, 11, 12, 13, 14])
+
+            # the batch filled the frame cache: no second download
+            again = data_fetch.fetch_stock_data_many(["ZZBULKA", "ZZBULKB"], period="1mo", chunk_size=2)
+            self.assertEqual(provider.download.call_count, 2)
+            self.assertEqual(list(again["ZZBULKA"][("Close", "ZZBULKA.NS")]), [10, 11, 12, 13, 14])
+
+
+class PriceSeriesTestCase(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        closes = 100 * np.cumprod(1 + rng.normal(0, 0.01, 80))
+        self.frame = _ohlcv_frame(_recent_days(80), closes)
+        self.frame["Volume"] = rng.integers(1000, 5000, 80).astype(float)
+
+    def test_from_frame_reads_both_frame_shapes(self):
+        history = self.frame.tz_localize("Asia/Kolkata")
+        history.iloc[3, history.columns.get_loc("Close")] = np.nan
+        downloaded = pd.concat({"TCS.NS": self.frame}, axis=1).swaplevel(axis=1).reset_index()
+
+        flat = PriceSeries.from_frame(history, symbol="TCS")
+        multi = PriceSeries.from_frame(downloaded, symbol="TCS")
+
+        self.assertEqual(len(flat), 79)  # the row without a close is dropped
+        self.assertEqual(len(multi), 80)
+        np.testing.assert_array_equal(multi.close, self.frame["Close"].to_numpy())
+        np.testing.assert_array_equal(multi.dates, self.frame.index.values.astype("datetime64[D]"))
+        np.testing.assert_array_equal(flat.high, np.delete(multi.high, 3))
+        for column in (multi.close, multi.volume, multi.dates):
+            self.assertFalse(column.flags.writeable)
+
+    def test_engines_match_the_pandas_reference(self):
+        close = self.frame["Close"]
+        series = PriceSeries.from_frame(self.frame, symbol="TCS")
+
+        # the old engines: ewm(adjust=False), pct_change() and ddof=1 std
+        ema_20 = close.ewm(span=20, adjust=False).mean().iloc[-1]
+        ema_50 = close.ewm(span=50, adjust=False).mean().iloc[-1]
+        self.assertAlmostEqual(trend_engine._ema_last(series.close, 20), ema_20, places=9)
+        self.assertAlmostEqual(trend_engine._ema_last(series.close, 50), ema_50, places=9)
+
+        trend = trend_engine.analyze_trend(series)
+        self.assertEqual(trend["trend"], "UPTREND" if ema_20 > ema_50 else "DOWNTREND")
+        self.assertEqual(trend["strength"], round(abs(ema_20 - ema_50) / ema_50, 2))
+        self.assertEqual(trend["support"], round(self.frame["Low"].tail(20).min(), 2))
+        self.assertEqual(trend["resistance"], round(self.frame["High"].tail(20).max(), 2))
+        volume = self.frame["Volume"]
+        self.assertEqual(trend["volume_trend"], "INCREASING" if volume.iloc[-1] > volume.tail(5).mean() else "DECREASING")
+
+        returns = close.pct_change().dropna()
+        momentum = returns.tail(5).mean()
+        range_pct = max(0.005, min(0.03, returns.tail(10).std() * 2))
+        prediction = prediction_engine.predict_next_day(series)
+        self.assertEqual(prediction["up_probability"], 45 if momentum > 0.002 else 25 if momentum < -0.002 else 33)
+        self.assertEqual(prediction["low"], round(close.iloc[-1] * (1 - range_pct), 2))
+        self.assertEqual(prediction["high"], round(close.iloc[-1] * (1 + range_pct), 2))
+
+        # legacy DataFrame callers get the same answers
+        self.assertEqual(trend_engine.analyze_trend(self.frame), trend)
+        self.assertEqual(prediction_engine.predict_next_day(self.frame), prediction)
+        self.assertEqual(
+            range_engine.calculate_base_range(self.frame, close.iloc[-1]),
+            range_engine.calculate_base_range(series, series.last_close),
+        )
+
+
+class SingleFlightTestCase(TestCase):
+    def test_concurrent_callers_share_one_call(self):
+        flights = SingleFlight("test")
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {"price": 1}
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flights.do(("info", "TCS.NS"), fetch)))
+        leader.start()
+        started.wait(5)
+        followers = [
+            threading.Thread(target=lambda: results.append(flights.do(("info", "TCS.NS"), fetch)))
+            for _ in range(3)
+        ]
+        for thread in followers:
+            thread.start()
+        while flights.stats()["coalesced"] < 3:
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(flights.stats()["by_kind"]["info"], {"executed": 1, "coalesced": 3})
+
+    def test_history_loads_coalesce_across_periods(self):
+        flights = SingleFlight("test")
+        started = threading.Event()
+        release = threading.Event()
+        loads = []
+
+        def load(yf_symbol, period, ttl):
+            loads.append(period)
+            started.set()
+            release.wait(5)
+            return {"date": np.array(["2026-10-16"], dtype="datetime64[D]"), "covered_from": data_fetch._period_start(period)}
+
+        def run(leader_period, follower_period):
+            loads.clear()
+            started.clear()
+            release.clear()
+            threads = [
+                threading.Thread(target=data_fetch._shared_history_bars, args=("ZZ.NS", period, 30))
+                for period in (leader_period, follower_period)
+            ]
+            threads[0].start()
+            started.wait(5)
+            coalesced = flights.stats()["coalesced"]
+            threads[1].start()
+            while flights.stats()["coalesced"] == coalesced:
+                threading.Event().wait(0.01)
+            release.set()
+            for thread in threads:
+                thread.join(5)
+            return list(loads)
+
+        with mock.patch.object(data_fetch, "YAHOO_FLIGHTS", flights), \
+                mock.patch.object(data_fetch, "_load_history_bars", load):
+            # 6mo is a slice of the 1y load
+            self.assertEqual(run("1y", "6mo"), ["1y"])
+            # 1y can't be served by the 6mo load: one more, longer load
+            self.assertEqual(run("6mo", "1y"), ["6mo", "1y"])
+
+
+class TradingCalendarTestCase(TestCase):
+    def _ts(self, *args):
+        return datetime(*args, tzinfo=trading_calendar.IST).timestamp()
+
+    def test_closed_market_holds_until_next_session(self):
+        # Thu 2026-10-01 after settlement -> Fri 2026-10-02 is a holiday -> Mon open
+        fetched = self._ts(2026, 10, 1, 18, 0)
+        self.assertEqual(
+            trading_calendar.expires_at(fetched, 30),
+            self._ts(2026, 10, 5, 9, 15),
+        )
+        self.assertTrue(trading_calendar.is_fresh(fetched, 30, now=self._ts(2026, 10, 4, 12, 0)))
+        self.assertFalse(trading_calendar.is_market_open(datetime(2026, 10, 2, 11, 0)))
+
+    def test_live_session_uses_ttl_until_settlement(self):
+        fetched = self._ts(2026, 10, 5, 11, 0)
+        self.assertTrue(trading_calendar.is_market_open(fetched))
+        self.assertEqual(trading_calendar.expires_at(fetched, 30), fetched + 30)
+        late = self._ts(2026, 10, 5, 15, 59, 50)
+        self.assertEqual(trading_calendar.expires_at(late, 30), self._ts(2026, 10, 5, 16, 0))
+
+    def test_updater_holds_session_quotes_until_settlement_pass(self):
+        symbol = "ZZSETTLE"
+        with price_engine.LOCK:
+            price_engine.PRICE_CACHE[symbol] = 100.0
+            price_engine.LAST_FETCH[symbol] = self._ts(2026, 10, 5, 15, 29)
+        try:
+            self.assertEqual(trading_calendar.market_phase(self._ts(2026, 10, 5, 15, 45)), "settling")
+            self.assertNotIn(symbol, price_engine._due_symbols(self._ts(2026, 10, 5, 15, 45)))
+            self.assertIn(symbol, price_engine._due_symbols(self._ts(2026, 10, 5, 16, 1)))
+            self.assertEqual(price_engine._updater_sleep(self._ts(2026, 10, 5, 15, 59, 30)), 30)
+        finally:
+            with price_engine.LOCK:
+                price_engine._forget(symbol)
+
+    def test_warns_once_for_years_missing_from_the_holiday_file(self):
+        trading_calendar._load_holidays()
+        with mock.patch.object(trading_calendar, "_UNCOVERED_YEARS_WARNED", set()), \
+                self.assertLogs("core_engine.trading_calendar", "WARNING") as logs:
+            self.assertTrue(trading_calendar.is_trading_day(datetime(2031, 10, 2).date()))
+            trading_calendar.is_trading_day(datetime(2031, 10, 3).date())
+            trading_calendar.is_trading_day(datetime(2026, 10, 5).date())
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("no holidays for 2031", logs.output[0])
+
+
+class ReplayProviderTestCase(TestCase):
+    def test_replays_recordings_and_falls_back_across_dates(self):
+        store = RecordingStore(tempfile.mkdtemp())
+        recorder = RecordingProvider(store)
+        with mock.patch.object(LiveProvider, "download", return_value="bars"):
+            recorder.download("TCS.NS", start="2026-01-05", progress=False)
+        with mock.patch.object(LiveProvider, "download", return_value="max bars"):
+            recorder.download("TCS.NS", period="max", progress=False)
+        store.save(("ticker", "TCS.NS", "info"), ("ticker", "TCS.NS", "info"), {"longName": "TCS"})
+
+        provider = ReplayProvider(RecordingStore(store.root))
+        self.assertEqual(provider.download("TCS.NS", start="2026-01-05", progress=False), "bars")
+        # start dates move with the calendar; the newest recording is served
+        self.assertEqual(provider.download("TCS.NS", start="2026-02-01", progress=True), "bars")
+        self.assertEqual(provider.download("TCS.NS", period="max"), "max bars")
+        # ...but never one for another period or interval
+        with self.assertRaises(ReplayMiss):
+            provider.download("TCS.NS", period="1y")
+        with self.assertRaises(ReplayMiss):
+            provider.download("TCS.NS", start="2026-02-01", interval="1h")
+        self.assertEqual(provider.ticker("TCS.NS").info, {"longName": "TCS"})
+        self.assertIsNone(getattr(provider.ticker("TCS.NS"), "news", None))
+        with self.assertRaises(ReplayMiss):
+            provider.download("INFY.NS", start="2026-01-05")
+
+
+class QuoteStreamTestCase(TestCase):
+    def test_streams_snapshot_then_only_changed_quotes(self):
+        response = self.client.get("/api/v1/quotes/stream", {"symbols": "ZZSTREAMA,ZZSTREAMB"}, **THREADED)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = iter(response.streaming_content)
+        next(events)  # retry hint
+        snapshot = next(events).decode()
+        self.assertIn('"ZZSTREAMA"', snapshot)
+        self.assertEqual(price_engine.SUBSCRIPTIONS["ZZSTREAMA"].refcount, 1)
+
+        price_engine._apply_local([("ZZSTREAMB", 101.5, 1.2, time.time(), None)])
+        update = next(events).decode()
+        payload = json.loads(update.split("data: ", 1)[1])
+        self.assertEqual(payload, [{"symbol": "ZZSTREAMB", "current_price": 101.5, "change_percent": 1.2}])
+
+        response.close()
+        self.assertEqual(price_engine.SUBSCRIPTIONS["ZZSTREAMA"].refcount, 0)
+
+    def test_caps_open_streams_and_refuses_sync_workers(self):
+        with mock.patch.object(price_views, "_QUOTE_STREAM_SLOTS", threading.BoundedSemaphore(1)):
+            first = self.client.get("/api/v1/quotes/stream", {"symbols": "ZZSTREAMA"}, **THREADED)
+            self.assertEqual(first.status_code, 200)
+
+            refused = self.client.get("/api/v1/quotes/stream", {"symbols": "ZZSTREAMA"}, **THREADED)
+            self.assertEqual(refused.status_code, 503)
+            self.assertEqual(refused["Retry-After"], str(price_views._QUOTE_STREAM_RETRY_AFTER))
+
+            # closing a stream that never sent an event frees its slot
+            first.close()
+            again = self.client.get("/api/v1/quotes/stream", {"symbols": "ZZSTREAMA"}, **THREADED)
+            self.assertEqual(again.status_code, 200)
+            again.close()
+
+            # a sync worker would be pinned for the whole stream
+            self.assertEqual(self.client.get("/api/v1/quotes/stream", {"symbols": "ZZSTREAMA"}).status_code, 503)
+
+
+class QuotesApiVersionTestCase(TestCase):
+    def test_since_returns_changed_symbols_and_etag_short_circuits(self):
+        params = {"symbols": "ZZVERA,ZZVERB"}
+        first = self.client.get("/api/v1/quotes", params)
+        self.assertEqual(len(first.json()["quotes"]), 2)
+        unchanged = self.client.get("/api/v1/quotes", params, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(unchanged.status_code, 304)
+
+        price_engine._apply_local([("ZZVERA", 90.0, 0.1, time.time(), None)])
+        price_engine._apply_local([("ZZVERB", 250.0, -0.5, time.time(), None)])
+        since = {**params, "since": first.json()["version"], "epoch": first.json()["epoch"]}
+        changed = self.client.get("/api/v1/quotes", since)
+        self.assertEqual([row["symbol"] for row in changed.json()["quotes"]], ["ZZVERA", "ZZVERB"])
+        self.assertGreater(changed.json()["version"], first.json()["version"])
+        self.assertNotEqual(changed["ETag"], first["ETag"])
+
+        price_engine._apply_local([("ZZVERB", 251.0, -0.4, time.time(), None)])
+        delta = self.client.get("/api/v1/quotes", {**since, "since": changed.json()["version"]})
+        self.assertEqual([row["symbol"] for row in delta.json()["quotes"]], ["ZZVERB"])
+
+        # a version from another worker's sequence gets a full snapshot
+        foreign = self.client.get("/api/v1/quotes", {**since, "epoch": "p0"})
+        self.assertEqual(len(foreign.json()["quotes"]), 2)
+        self.assertNotIn("since", foreign.json())
+
+    def test_etag_follows_history_fallback_prices(self):
+        params = {"symbols": "ZZFALLBACK"}
+        with mock.patch("api.price_views._history_price_map", return_value=({"ZZFALLBACK": 10.0}, {})):
+            first = self.client.get("/api/v1/quotes", params)
+            self.assertEqual(first.json()["quotes"][0]["current_price"], 10.0)
+            again = self.client.get("/api/v1/quotes", params, HTTP_IF_NONE_MATCH=first["ETag"])
+            self.assertEqual(again.status_code, 304)
+        with mock.patch("api.price_views._history_price_map", return_value=({"ZZFALLBACK": 11.0}, {})):
+            moved = self.client.get("/api/v1/quotes", params, HTTP_IF_NONE_MATCH=first["ETag"])
+            self.assertEqual(moved.json()["quotes"][0]["current_price"], 11.0)
+
+    def tearDown(self):
+        with price_engine.LOCK:
+            for symbol in ("ZZVERA", "ZZVERB", "ZZFALLBACK"):
+                price_engine._forget(symbol)
+
+
+def _isolate_quotes(test):
+    """Runs `test` against empty price_engine tables, restored afterwards."""
+    for table in (
+        price_engine.PRICE_CACHE, price_engine.CHANGE_CACHE, price_engine.LAST_FETCH,
+        price_engine.QUOTE_VERSION, price_engine._LAST_ATTEMPT, price_engine.SUBSCRIPTIONS,
+    ):
+        patcher = mock.patch.dict(table, clear=True)
+        patcher.start()
+        test.addCleanup(patcher.stop)
+    patcher = mock.patch.object(price_engine, "_quote_store", return_value=None)
+    patcher.start()
+    test.addCleanup(patcher.stop)
+
+
+class QuoteBatchTestCase(TestCase):
+    symbols = ["ZZQA", "ZZQB", "ZZQC"]
+
+    def setUp(self):
+        _isolate_quotes(self)
+        for symbol in self.symbols:
+            self.addCleanup(tick_buffer.forget, symbol)
+
+    def test_refresh_cycle_fetches_due_symbols_in_batches(self):
+        def download(tickers, **kwargs):
+            # ZZQC never comes back from Yahoo
+            frames = {t: _ohlcv_frame(_recent_days(2), [100, 102]) for t in tickers if t != "ZZQC.NS"}
+            return pd.concat(frames, axis=1) if frames else pd.DataFrame()
+
+        provider = mock.Mock()
+        provider.download.side_effect = download
+        with mock.patch.object(price_engine, "get_provider", return_value=provider), \
+                mock.patch.object(price_engine, "QUOTE_BATCH_SIZE", 2):
+            for symbol in self.symbols:
+                price_engine.register_symbol(symbol, eager=False)
+            provider.download.assert_not_called()
+
+            price_engine._refresh_cycle()
+
+            batches = [call.args[0] for call in provider.download.call_args_list]
+            self.assertEqual(sorted(len(batch) for batch in batches), [1, 2])
+            self.assertEqual(sorted(t for batch in batches for t in batch), ["ZZQA.NS", "ZZQB.NS", "ZZQC.NS"])
+            self.assertEqual(price_engine.get_price("ZZQA"), 102.0)
+            self.assertEqual(price_engine.get_change_percent("ZZQB"), 2.0)
+            self.assertIsNone(price_engine.get_price("ZZQC"))
+            # fetched ones are fresh, the miss waits out its staleness target
+            self.assertEqual(price_engine._due_symbols(), [])
+
+
+class QuoteDemandTestCase(TestCase):
+    def test_each_quotes_request_counts_demand_once(self):
+        try:
+            for expected in (1.0, 2.0):
+                self.client.get("/api/v1/quotes", {"symbols": "ZZDEMAND"})
+                self.assertAlmostEqual(price_engine.SUBSCRIPTIONS["ZZDEMAND"].demand, expected, places=2)
+            price_engine.get_price("ZZDEMAND")  # reads never count
+            self.assertAlmostEqual(price_engine.SUBSCRIPTIONS["ZZDEMAND"].demand, 2.0, places=2)
+        finally:
+            with price_engine.LOCK:
+                price_engine._forget("ZZDEMAND")
+
+    def test_busiest_symbols_refresh_first_and_idle_ones_are_evicted(self):
+        _isolate_quotes(self)
+        price_engine.register_symbol("ZZIDLE", eager=False)
+        price_engine.subscribe("ZZSTREAM")
+        for _ in range(3):
+            price_engine.register_symbol("ZZBUSY", eager=False)
+
+        self.assertEqual(price_engine._due_symbols()[0], "ZZBUSY")
+
+        later = time.time() + price_engine.QUOTE_IDLE_EVICT_MINUTES * 60 + 1
+        self.assertGreater(price_engine._staleness_target("ZZIDLE", later), price_engine.QUOTE_STALENESS_TARGET)
+        self.assertEqual(price_engine._staleness_target("ZZSTREAM", later), price_engine.QUOTE_STALENESS_TARGET)
+        self.assertEqual(sorted(price_engine.evict_idle_symbols(now=later)), ["ZZBUSY", "ZZIDLE"])
+        self.assertEqual(list(price_engine.PRICE_CACHE), ["ZZSTREAM"])
+
+        price_engine.unsubscribe("ZZSTREAM")
+        self.assertEqual(price_engine.evict_idle_symbols(now=later), ["ZZSTREAM"])
+        self.assertEqual(price_engine.SUBSCRIPTIONS, {})
+
+    def test_watchlist_rows_pin_symbols_in_every_worker(self):
+        _isolate_quotes(self)
+        alice = get_user_model().objects.create_user(username="alice", email="alice@example.com", password="x")
+        bob = get_user_model().objects.create_user(username="bob", email="bob@example.com", password="x")
+        Watchlist.objects.create(user=alice, symbol="ZZPIN")
+        Watchlist.objects.create(user=bob, symbol="ZZPIN")
+
+        # a fresh (restarted) worker tracks the symbol without any request
+        price_engine._refresh_pins(watchlisted_symbols())
+        later = time.time() + price_engine.QUOTE_IDLE_EVICT_MINUTES * 60 + 1
+        self.assertEqual(price_engine._due_symbols(), ["ZZPIN"])
+        self.assertEqual(price_engine.evict_idle_symbols(now=later), [])
+
+        # removals may land on any worker: only the table decides
+        Watchlist.objects.filter(user=alice).delete()
+        price_engine._refresh_pins(watchlisted_symbols())
+        self.assertEqual(price_engine.evict_idle_symbols(now=later), [])
+        Watchlist.objects.filter(user=bob).delete()
+        price_engine._refresh_pins(watchlisted_symbols())
+        self.assertEqual(price_engine.evict_idle_symbols(now=later), ["ZZPIN"])
+
+
+class QuoteStoreTestCase(TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = os.path.join(temp_dir.name, "quotes.sqlite3")
+
+    def test_one_worker_is_elected_until_it_lets_go(self):
+        first, second = QuoteStore(self.path), QuoteStore(self.path)
+        self.addCleanup(first.release_leadership)
+        self.addCleanup(second.release_leadership)
+
+        self.assertTrue(first.try_acquire_leadership())
+        self.assertTrue(first.try_acquire_leadership())  # kept once held
+        self.assertFalse(second.try_acquire_leadership())
+        self.assertEqual(first.epoch, second.epoch)
+
+        first.release_leadership()
+        self.assertFalse(first.is_leader)
+        self.assertTrue(second.try_acquire_leadership())
+
+    def test_followers_sync_quotes_and_the_updater_polls_their_interest(self):
+        _isolate_quotes(self)
+        updater, follower = QuoteStore(self.path), QuoteStore(self.path)
+        now = time.time()
+        follower.publish_interest("follower", [("ZZSHARED", now, 1, 2.0)])
+
+        # the elected updater adopts symbols only another worker asked for
+        with mock.patch.object(price_engine, "_worker_id", return_value="updater"):
+            price_engine._merge_remote_interest(updater, now)
+        self.assertIn("ZZSHARED", price_engine.PRICE_CACHE)
+        self.assertEqual(price_engine.SUBSCRIPTIONS["ZZSHARED"].total_refcount, 1)
+        self.assertEqual(price_engine._due_symbols(now), ["ZZSHARED"])
+
+        versions = updater.publish_quotes({"ZZSHARED": (101.5, 1.5, now), "ZZOTHER": (10.0, None, now)})
+        self.assertEqual(sorted(versions.values()), [1, 2])
+
+        # a follower pulls only new rows, and only for symbols it tracks
+        with mock.patch.object(price_engine, "_SYNCED_VERSION", 0), \
+                mock.patch.object(price_engine, "_VERSION", 0):
+            self.assertEqual(price_engine._sync_from_store(follower), 2)
+            self.assertEqual(price_engine._sync_from_store(follower), 0)
+            # rows for untracked symbols do not move the local version
+            self.assertEqual(price_engine.quote_version(), versions["ZZSHARED"])
+        self.assertEqual(price_engine.get_price("ZZSHARED"), 101.5)
+        self.assertEqual(price_engine.QUOTE_VERSION["ZZSHARED"], versions["ZZSHARED"])
+        self.assertNotIn("ZZOTHER", price_engine.PRICE_CACHE)
+
+
+class TickBufferTestCase(TestCase):
+    def test_ticks_extend_seeded_bars_into_five_minute_ohlc(self):
+        index = pd.date_range("2026-10-05 09:15", periods=6, freq="5min", tz=trading_calendar.IST)
+        frame = pd.DataFrame({"Open": 100.0, "High": 101.0, "Low": 99.0, "Close": 100.5}, index=index)
+        tick_at = datetime(2026, 10, 5, 9, 41, tzinfo=trading_calendar.IST).timestamp()
+        tick_buffer.record_tick("ZZTICK", tick_at, 120.0)
+        tick_buffer.record_tick("ZZTICK", tick_at + 30, 95.0)
+        tick_buffer.seed_bars("ZZTICK", frame)
+        try:
+            bars = tick_buffer.intraday_bars("ZZTICK", 5)
+            self.assertEqual(len(bars), 6)
+            # seeded 09:40 bar merged with the live 09:41 minute
+            self.assertEqual(list(bars[-1, 1:]), [100.0, 120.0, 95.0, 95.0])
+            # 1m output never includes the 5m seed
+            minutes = tick_buffer.intraday_bars("ZZTICK", 1)
+            self.assertEqual(list(minutes[:, 0]), [datetime(2026, 10, 5, 9, 41, tzinfo=trading_calendar.IST).timestamp()])
+            self.assertEqual(len(tick_buffer.intraday_bars("ZZTICK", 15)), 2)  # 09:15, 09:30
+        finally:
+            tick_buffer.forget("ZZTICK")
+
+
+class TempHistoryMixin:
+    """Per-test temp directory (removed afterwards) and HistoryStores inside it."""
+
+    def temp_path(self, name: str) -> str:
+        if not hasattr(self, "_temp_dir"):
+            self._temp_dir = tempfile.TemporaryDirectory()
+            self.addCleanup(self._temp_dir.cleanup)
+        return os.path.join(self._temp_dir.name, name)
+
+    def make_store(self, name: str = "history.sqlite3", **kwargs) -> HistoryStore:
+        return HistoryStore(self.temp_path(name), **kwargs)
+
+
+class HistoryStoreTestCase(TempHistoryMixin, TestCase):
+    def test_migrates_dict_history_and_updates_single_rows(self):
+        source = self.temp_path("prediction_history.json")
+        with open(source, "w") as handle:
+            json.dump({"TCS": [{"timestamp": "2026-01-05T09:00:00", "evaluated": False}]}, handle)
+        store = self.make_store()
+        self.assertEqual(migrate_json_file(store, source), 1)
+
+        store.insert({
+            "id": "p1", "symbol": "TCS", "date": "2026-01-06", "mode": "AUTO", "evaluated": False,
+            "expected_range": {"low": 1.0, "high": 2.0},
+        })
+        self.assertEqual(len(store.fetch(evaluated=False, has_range=True)), 1)
+        self.assertTrue(store.update_fields("p1", {"evaluated": True, "result": "SUCCESS"}))
+        self.assertEqual(store.result_counts("TCS"), {"SUCCESS": 1})
+        self.assertEqual(store.result_counts("TCS", "USER"), {})
+        self.assertEqual(store.recent_results("TCS", 14), ["SUCCESS"])
+
+        rows = store.fetch()
+        self.assertEqual(rows[0][1], "TCS")  # dict-format key kept
+        self.assertEqual(
+            store.save_records([(row_id, record, None) for row_id, _, record in rows]),
+            {"updated": 0, "inserted": 0},
+        )
+        rows[1][2]["note"] = "edited"
+        self.assertEqual(
+            store.save_records([(row_id, record, None) for row_id, _, record in rows] + [(None, {"id": "p2"}, None)]),
+            {"updated": 1, "inserted": 1},
+        )
+        self.assertEqual(store.fetch()[1][2]["note"], "edited")
+        self.assertEqual(store.fetch()[0][1], "TCS")
+
+
+class HistoryDedupeTestCase(TempHistoryMixin, TestCase):
+    def test_refreshes_pending_prediction_in_place(self):
+        plain = self.make_store()
+        for n in range(2):
+            plain.insert({"id": f"old{n}", "symbol": "TCS", "date": "2026-01-05", "mode": "USER", "evaluated": False})
+
+        # a configured key does nothing until the explicit migration
+        store = self.make_store(dedupe_fields=("symbol", "date", "mode"))
+        self.assertFalse(store.dedupe_active)
+        self.assertEqual(store.migrate_dedupe(dry_run=True), {"groups": 1, "removed": 1})
+        self.assertEqual((store.count(), store.dedupe_active), (2, False))
+        self.assertEqual(store.migrate_dedupe(), {"groups": 1, "removed": 1})
+        self.assertTrue(self.make_store(dedupe_fields=("symbol", "date", "mode")).dedupe_active)
+
+        result = store.upsert_many([
+            {"id": "new", "symbol": "TCS", "date": "2026-01-05", "mode": "USER", "evaluated": False, "up_probability": 60},
+            {"id": "auto", "symbol": "TCS", "date": "2026-01-05", "mode": "AUTO", "evaluated": False},
+        ])
+        self.assertEqual(result, {"inserted": 1, "updated": 1})
+
+        records = [record for _, _, record in store.fetch()]
+        self.assertEqual([record["id"] for record in records], ["old0", "auto"])
+        self.assertEqual((records[0]["up_probability"], records[0]["refresh_count"]), (60, 2))
+
+        # evaluated outcomes are never overwritten
+        store.update_fields("old0", {"evaluated": True})
+        store.upsert_many([{"id": "late", "symbol": "TCS", "date": "2026-01-05", "mode": "USER"}])
+        self.assertEqual(store.count(), 3)
+
+        # a process configured with another key leaves the table alone and appends
+        other = self.make_store(dedupe_fields=("symbol", "date"))
+        self.assertFalse(other.dedupe_active)
+        self.assertEqual(other.get_meta("dedupe_fields"), "symbol,date,mode")
+        other.upsert_many([{"id": "again", "symbol": "TCS", "date": "2026-01-05", "mode": "USER"}])
+        self.assertEqual(store.count(), 4)
+
+
+class HistoryPartitionTestCase(TempHistoryMixin, TestCase):
+    def test_compacts_closed_months_into_read_only_segments(self):
+        store = self.make_store()
+        for n, day in enumerate(["2026-01-10", "2026-01-20", "2026-02-03", "2026-03-01"]):
+            store.insert({
+                "id": f"p{n}", "symbol": "TCS", "date": day, "mode": "AUTO", "evaluated": n != 1,
+                "result": "SUCCESS" if n % 2 == 0 else "FAILURE", "expected_range": {"low": 1.0, "high": 2.0},
+            })
+        before = store.result_counts("TCS")
+
+        self.assertEqual(store.compact("2026-03"), {"archived": 2, "segments": 2})
+        self.assertEqual(store.count(), 4)
+        self.assertEqual(store.result_counts("TCS"), before)
+        self.assertEqual(store.recent_results("TCS", 3), ["SUCCESS", "SUCCESS", "FAILURE"])
+        self.assertEqual([row[2]["id"] for row in store.fetch()], ["p0", "p1", "p2", "p3"])
+        self.assertEqual(
+            [row[2]["id"] for row in store.fetch(date_from="2026-01-15", date_to="2026-02-28")],
+            ["p1", "p2"],
+        )
+
+        # archived rows are immutable: neither updated nor re-inserted
+        self.assertFalse(store.update_fields("p0", {"result": "FAILURE"}))
+        self.assertEqual(
+            store.save_records([(row_id, record, None) for row_id, _, record in store.fetch()]),
+            {"updated": 0, "inserted": 0},
+        )
+        store.rebuild_stats()
+        self.assertEqual(store.result_counts("TCS"), before)
+
+
+class HistorySnapshotTestCase(TempHistoryMixin, TestCase):
+    def test_parses_once_per_file_version(self):
+        path = self.temp_path("prediction_history.json")
+        with open(path, "w") as handle:
+            json.dump({"TCS": [{"date": "2026-01-05", "evaluated": True}]}, handle)
+        with mock.patch.object(prediction_history, "HISTORY_BACKEND", "json"), \
+                mock.patch.object(prediction_history, "_SNAPSHOT", None), \
+                mock.patch.object(prediction_history, "_LAST_HISTORY_PATH", None), \
+                mock.patch.dict(os.environ, {"SEESTOX_PREDICTION_HISTORY_PATH": path}):
+            first = prediction_history.history_snapshot()
+            self.assertIs(prediction_history.history_snapshot(), first)
+            self.assertEqual(first.records[0]["_symbol_key"], "TCS")
+            with self.assertRaises(TypeError):
+                first.records[0]["evaluated"] = False
+
+            # writers get mutable copies; the rewrite is a new file version
+            records, container_type, container = prediction_history.load_history_any()
+            records[0]["evaluated"] = False
+            prediction_history.save_history_any(records, container_type, container)
+            second = prediction_history.history_snapshot()
+            self.assertIsNot(second, first)
+            self.assertIs(second.records[0]["evaluated"], False)
+            self.assertIs(first.records[0]["evaluated"], True)
+
+    def test_sqlite_rebuild_parses_only_changed_rows(self):
+        store = self.make_store()
+        for n, day in enumerate(["2026-01-10", "2026-01-20", "2026-05-01"]):
+            store.insert({"id": f"p{n}", "symbol": "TCS", "date": day, "evaluated": n < 2})
+        store.compact("2026-03")
+
+        with mock.patch.object(prediction_history, "HISTORY_BACKEND", "sqlite"), \
+                mock.patch.object(prediction_history, "_history_store", return_value=store), \
+                mock.patch.object(prediction_history, "_SNAPSHOT", None), \
+                mock.patch.dict(prediction_history._SNAPSHOT_STATS, {"parsed_rows": 0, "cold_loads": 0}), \
+                mock.patch.dict(prediction_history._HOT_ROWS, {"path": None, "rows": {}}), \
+                mock.patch.dict(prediction_history._COLD_ROWS, {"key": None, "records": ()}):
+            first = prediction_history.history_snapshot()
+            self.assertEqual([record["id"] for record in first.records], ["p0", "p1", "p2"])
+
+            store.insert({"id": "p3", "symbol": "TCS", "date": "2026-05-02", "evaluated": False})
+            store.update_fields("p2", {"evaluated": True})
+            second = prediction_history.history_snapshot()
+            self.assertEqual([record["id"] for record in second.records], ["p0", "p1", "p2", "p3"])
+            self.assertIs(second.records[0], first.records[0])
+            self.assertIs(second.records[2]["evaluated"], True)
+            # p2 twice (load + update), p3 once; the segments once
+            stats = prediction_history.history_snapshot_stats()
+            self.assertEqual((stats["parsed_rows"], stats["cold_loads"]), (3, 1))
+
+
+class HistoryResultUpdateTestCase(TempHistoryMixin, TestCase):
+    def test_sqlite_applies_all_outcomes_in_one_batch(self):
+        store = self.make_store()
+        store.insert({"id": "p1", "symbol": "TCS", "date": "2026-01-05", "evaluated": False})
+        legacy_row = store.insert({"symbol": "TCS", "date": "2026-01-06", "evaluated": False})
+        legacy = {"symbol": "TCS", "date": "2026-01-06", "_row_id": legacy_row}
+
+        updates = [
+            prediction_history.result_update("p1", 105.0, "SUCCESS", 0.0, "2026-01-06"),
+            prediction_history.record_update(legacy, {"evaluated": True, "result": "FAIL"}),
+            prediction_history.result_update("missing", 1.0, "FAIL", 1.0, "2026-01-06"),
+            {"prediction_id": "p1", "fields": {}},  # nothing to write
+        ]
+        with mock.patch.object(prediction_history, "HISTORY_BACKEND", "sqlite"), \
+                mock.patch.object(prediction_history, "_history_store", return_value=store), \
+                mock.patch.object(store, "update_many", wraps=store.update_many) as update_many:
+            self.assertEqual(prediction_history.update_prediction_results(updates), 2)
+
+        update_many.assert_called_once()
+        self.assertEqual(len(update_many.call_args.args[0]), 3)
+        records = {record["date"]: record for _, _, record in store.fetch()}
+        self.assertEqual((records["2026-01-05"]["result"], records["2026-01-05"]["actual_close"]), ("SUCCESS", 105.0))
+        self.assertEqual((records["2026-01-06"]["result"], records["2026-01-06"]["evaluated"]), ("FAIL", True))
+
+    def test_json_loads_and_writes_the_file_once(self):
+        path = self.temp_path("prediction_history.json")
+        with open(path, "w") as handle:
+            json.dump({"TCS": [
+                {"id": "p1", "date": "2026-01-05", "evaluated": False},
+                {"date": "2026-01-06", "evaluated": False},
+            ]}, handle)
+        with mock.patch.object(prediction_history, "HISTORY_BACKEND", "json"), \
+                mock.patch.object(prediction_history, "_SNAPSHOT", None), \
+                mock.patch.object(prediction_history, "_LAST_HISTORY_PATH", None), \
+                mock.patch.dict(os.environ, {"SEESTOX_PREDICTION_HISTORY_PATH": path}), \
+                mock.patch.object(prediction_history, "save_history_any", wraps=prediction_history.save_history_any) as save:
+            legacy = prediction_history.history_snapshot().records[1]
+            applied = prediction_history.update_prediction_results([
+                prediction_history.result_update("p1", 105.0, "SUCCESS", 0.0, "2026-01-06"),
+                prediction_history.record_update(legacy, {"evaluated": True, "result": "FAIL"}),
+            ])
+
+        self.assertEqual(applied, 2)
+        save.assert_called_once()
+        with open(path) as handle:
+            saved = json.load(handle)["TCS"]
+        self.assertEqual([record["result"] for record in saved], ["SUCCESS", "FAIL"])
+        self.assertTrue(all(record["evaluated"] for record in saved))
+
+
+class HistoryColumnsTestCase(TempHistoryMixin, TestCase):
+    def test_rebuilds_only_when_evaluated_history_changes(self):
+        path = self.temp_path("columns.npz")
+        store = self.make_store()
+        store.insert({
+            "id": "a", "symbol": "TCS", "date": "2026-01-05", "evaluated": True, "actual_close": 105,
+            "expected_range": {"low": 100, "high": 110}, "context": {"price": 102, "trend": "UPTREND"},
+        })
+        store.insert({"id": "b", "symbol": "TCS", "date": "2026-01-06", "evaluated": False})
+        read = mock.Mock(side_effect=lambda evaluated: [record for _, _, record in store.fetch(evaluated=evaluated)])
+
+        with mock.patch.object(history_columns, "_history_store", return_value=store), \
+                mock.patch.object(history_columns, "history_backend", return_value="sqlite"), \
+                mock.patch.object(history_columns, "load_history_range", read), \
+                mock.patch.dict(history_columns._CACHE, {"signature": None, "columns": None}):
+            first = history_columns.load_columns(path)
+            self.assertEqual((list(first["er_skip"]), list(first["trend"])), ([0], ["UPTREND"]))
+            store.update_fields("b", {"result": None})  # pending rows don't invalidate
+            self.assertIs(history_columns.load_columns(path), first)
+
+            history_columns._CACHE["signature"] = None  # fresh process: one file read
+            history_columns.load_columns(path)
+            self.assertEqual(read.call_count, 1)
+
+            store.update_fields("b", {"evaluated": True})
+            self.assertEqual(len(history_columns.load_columns(path)["row_id"]), 2)
+            self.assertEqual(read.call_count, 2)
+
+
+class MlJobsViewTestCase(TestCase):
+    def test_renders_with_recent_history(self):
+        user = get_user_model().objects.create_user("mljobs", "1995praritsidana@gmail.com", "pw")
+        self.client.force_login(user)
+        prediction_history.store_prediction("TCS", {"tomorrow": {"expected_range": {"low": 1.0, "high": 2.0}}}, mode="AUTO")
+        prediction_history.flush_pending_predictions()
+        response = self.client.get("/ml_jobs/")
+        self.assertEqual(response.status_code, 200)
+
+
+class AnalysisCacheTestCase(TestCase):
+    def test_serves_copies_until_data_version_changes(self):
+        version = ["v1"]
+        compute = mock.Mock(side_effect=lambda: {"symbol": "TCS", "run": compute.call_count})
+        stats = dict.fromkeys(analysis_cache._STATS, 0)
+
+        with mock.patch.object(analysis_cache, "data_version", side_effect=lambda *a: version[0]), \
+                mock.patch.dict(analysis_cache._ENTRIES, clear=True), \
+                mock.patch.dict(analysis_cache._STATS, stats):
+            first = analysis_cache.cached_analysis("TCS", "tcs", compute)
+            first["run"] = -1  # callers get their own copy
+            self.assertEqual(analysis_cache.cached_analysis("TCS", "TCS ", compute)["run"], 1)
+
+            version[0] = "v2"  # e.g. a new bar or sentiment snapshot
+            self.assertEqual(analysis_cache.cached_analysis("TCS", "tcs", compute)["run"], 2)
+            self.assertEqual(analysis_cache.cached_analysis("TCS", "tcs", compute, use_cache=False)["run"], 3)
+            self.assertEqual(compute.call_count, 3)
+
+            stats = analysis_cache.analysis_cache_stats()
+            self.assertEqual((stats["hits"], stats["misses"], stats["invalidated"]), (1, 2, 1))
+
+
+    def test_cache_hits_still_record_the_prediction(self):
+        record = {"symbol": "TCS", "prediction": {"tomorrow": {}}, "context": {}}
+        analyze = mock.Mock(return_value={"symbol": "TCS", "_prediction_record": record})
+        with mock.patch.object(analysis_cache, "data_version", return_value="v1"), \
+                mock.patch.dict(analysis_cache._ENTRIES, clear=True), \
+                mock.patch.object(analyzer, "resolve_symbol", return_value=("TCS", "Tata")), \
+                mock.patch.object(analyzer, "_analyze", analyze), \
+                mock.patch.object(analyzer, "store_prediction") as store:
+            self.assertEqual(analyzer.analyze_stock("TCS"), {"symbol": "TCS"})
+            self.assertEqual(analyzer.analyze_stock("TCS"), {"symbol": "TCS"})
+        self.assertEqual(analyze.call_count, 1)
+        self.assertEqual(store.call_args_list, [mock.call(**record)] * 2)
+
+    def test_sentiment_snapshots_are_bounded_and_analysis_only(self):
+        feed = mock.Mock(side_effect=lambda symbol: {"symbol": symbol})
+        with mock.patch.object(sentiment_engine, "analyze_sentiment", feed), \
+                mock.patch.object(sentiment_engine, "SENTIMENT_CACHE_MAX_ENTRIES", 2), \
+                mock.patch.object(sentiment_engine, "_SNAPSHOTS", sentiment_engine.OrderedDict()):
+            for symbol in ("A", "B", "A", "C"):
+                sentiment_engine.cached_sentiment(symbol)
+            self.assertEqual(list(sentiment_engine._SNAPSHOTS), ["A", "C"])  # B least recent
+            self.assertEqual(feed.call_count, 3)
+            self.assertIsNone(sentiment_engine.sentiment_version("B"))
+
+
+class StageGraphTestCase(TestCase):
+    def test_runs_independent_stages_concurrently_with_fallbacks(self):
+        def slow(value, delay=0.2):
+            time.sleep(delay)
+            return value
+
+        started = time.monotonic()
+        results = stage_graph.run_stages([
+            stage_graph.Stage("prices", lambda: slow(100)),
+            stage_graph.Stage("sentiment", lambda: slow("POSITIVE")),
+            stage_graph.Stage("signal", lambda prices, sentiment: (prices, sentiment), deps=("prices", "sentiment")),
+            stage_graph.Stage("history", lambda: slow("stats", 1), timeout=0.1, fallback=lambda error: "neutral"),
+        ])
+        self.assertLess(time.monotonic() - started, 0.45)
+        self.assertEqual(results["signal"], (100, "POSITIVE"))
+        self.assertEqual(results["history"], "neutral")
+
+        with self.assertRaises(ValueError):
+            stage_graph.run_stages([stage_graph.Stage("prices", mock.Mock(side_effect=ValueError("no data")))])
+
+    def test_sheds_a_stage_while_earlier_runs_hang_past_their_timeout(self):
+        release = threading.Event()
+        hung = mock.Mock(side_effect=lambda: release.wait(5))
+        stage = stage_graph.Stage("zzhang", hung, timeout=0.05, fallback=lambda error: type(error).__name__)
+        with mock.patch.object(stage_graph, "STAGE_MAX_OVERDUE", 1):
+            self.assertEqual(stage_graph.run_stages([stage])["zzhang"], "StageTimeout")
+            self.assertEqual(stage_graph.stage_stats()["zzhang"]["overdue"], 1)
+            # the hung run still holds a worker: the next one is not submitted
+            self.assertEqual(stage_graph.run_stages([stage])["zzhang"], "StageShed")
+            self.assertEqual(hung.call_count, 1)
+
+            release.set()
+            for _ in range(100):
+                if stage_graph.stage_stats()["zzhang"]["overdue"] == 0:
+                    break
+                time.sleep(0.01)
+            stats = stage_graph.stage_stats()["zzhang"]
+            self.assertEqual((stats["overdue"], stats["late_finishes"], stats["shed"]), (0, 1, 1))
+
+
+class PredictionWriterTestCase(TestCase):
+    def test_group_commits_and_falls_back_to_sync_when_full(self):
+        writer = prediction_history._PredictionWriter(maxsize=2, interval=3600)
+        with mock.patch.object(prediction_history, "_write_records") as write, \
+                mock.patch.object(prediction_history, "HISTORY_ENQUEUE_TIMEOUT", 0):
+            for n in range(3):
+                writer.submit({"id": str(n)})
+            # third record found the queue full and was written inline
+            write.assert_called_once_with([{"id": "2"}])
+            self.assertEqual(writer.flush(), 2)
+            write.assert_called_with([{"id": "0"}, {"id": "1"}])
+        stats = writer.stats()
+        self.assertEqual((stats["sync_writes"], stats["batches"], stats["depth"]), (1, 2, 0))
+
+    def test_failed_flush_keeps_records_for_the_next_one(self):
+        writer = prediction_history._PredictionWriter(maxsize=3, interval=3600)
+        locked = sqlite3.OperationalError("database is locked")
+        with mock.patch.object(prediction_history, "_write_records", side_effect=[locked, None, locked]) as write, \
+                mock.patch.object(prediction_history, "HISTORY_ENQUEUE_TIMEOUT", 0):
+            writer.submit({"id": "0"})
+            writer.submit({"id": "1"})
+            self.assertEqual(writer.flush(), 0)
+            self.assertEqual(writer.stats()["retrying"], 2)
+            self.assertGreater(writer._retry_at, time.monotonic())  # background flushes back off
+
+            writer.submit({"id": "2"})
+            self.assertEqual(writer.flush(), 3)
+            write.assert_called_with([{"id": "0"}, {"id": "1"}, {"id": "2"}])
+
+            # queue full and the inline write fails: the caller sees it
+            for n in range(3, 6):
+                writer.submit({"id": str(n)})
+            with self.assertRaises(sqlite3.OperationalError):
+                writer.submit({"id": "6"})
+        stats = writer.stats()
+        self.assertEqual((stats["failures"], stats["written"], stats["retrying"]), (2, 3, 0))
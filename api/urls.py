@@ -87,6 +87,8 @@ urlpatterns = [
     path("api/v1/market/snapshot", views.market_snapshot_api, name="market_snapshot_api_v1"),
     path("api/v1/quotes", price_views.quotes_api, name="quotes_api_noslash"),
     path("api/v1/quotes/", price_views.quotes_api, name="quotes_api"),
+    path("api/v1/quotes/stream", price_views.quotes_stream_api, name="quotes_stream_api_noslash"),
+    path("api/v1/quotes/stream/", price_views.quotes_stream_api, name="quotes_stream_api"),
     path("api/v1/stock-detail/", price_views.stock_detail_api, name="stock_detail_api"),
     path("api/v1/subscription/plans", subscription_views.subscription_plans, name="subscription_plans"),
     path("api/v1/subscription/status", subscription_views.subscription_status, name="subscription_status"),
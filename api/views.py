@@ -10,7 +10,6 @@ import time
 import json
 from datetime import datetime, timedelta, date
 import razorpay
-import yfinance as yf
 import threading
 from core_engine.symbol_resolver import resolve_symbol
 from core_engine.symbol_resolver import DF as SYMBOL_DF
@@ -19,8 +18,9 @@ from core_engine.analyzer import analyze_stock
 from core_engine.sentiment_engine import analyze_sentiment
 from core_engine.trend_engine import analyze_trend
 from core_engine.universe import TOP_100_STOCKS
-from core_engine.prediction_history import load_history_any
-from core_engine import prediction_history as prediction_history
+from core_engine.prediction_history import history_snapshot, load_history_range
+from core_engine.trading_calendar import is_fresh
+from core_engine.market_data_provider import get_provider
 from django.utils import timezone
 from api.models import Watchlist
 from accounts.models import UserSubscription
@@ -37,6 +37,9 @@ PLAN_AMOUNTS = {
     "MONTHLY": 29900,
     "YEARLY": 300000,
 }
+
+# the ML jobs panel shows the latest predictions; read only this many days
+ML_JOBS_HISTORY_DAYS = int(os.getenv("SEESTOX_ML_JOBS_HISTORY_DAYS", "30"))
 
 
 # =========================================================
@@ -140,6 +143,7 @@ def health(request):
 # MARKET SNAPSHOT
 # =========================================================
 
+# live-session TTL; closed-market expiry comes from the trading calendar
 MARKET_SNAPSHOT_TTL = int(os.getenv("MARKET_SNAPSHOT_TTL", "5"))
 _MARKET_SNAPSHOT_CACHE = {"ts": 0.0, "data": None}
 _MARKET_SNAPSHOT_LOCK = threading.Lock()
@@ -148,10 +152,11 @@ _MARKET_SNAPSHOT_REFRESHING = False
 
 def market_snapshot_api(request):
     def _fetch_snapshot():
-        nifty = yf.Ticker("^NSEI")
-        sensex = yf.Ticker("^BSESN")
-        vix = yf.Ticker("^INDIAVIX")
-        banknifty = yf.Ticker("^NSEBANK")
+        provider = get_provider()
+        nifty = provider.ticker("^NSEI")
+        sensex = provider.ticker("^BSESN")
+        vix = provider.ticker("^INDIAVIX")
+        banknifty = provider.ticker("^NSEBANK")
 
         market_time = nifty.info.get("regularMarketTime")
         is_open = None
@@ -196,10 +201,10 @@ def market_snapshot_api(request):
     now_ts = time.time()
     with _MARKET_SNAPSHOT_LOCK:
         cached = _MARKET_SNAPSHOT_CACHE["data"]
-        age = now_ts - _MARKET_SNAPSHOT_CACHE["ts"] if cached else None
+        fetched_at = _MARKET_SNAPSHOT_CACHE["ts"]
         refreshing = _MARKET_SNAPSHOT_REFRESHING
 
-    if cached is not None and age is not None and age < MARKET_SNAPSHOT_TTL:
+    if cached is not None and is_fresh(fetched_at, MARKET_SNAPSHOT_TTL, now=now_ts):
         return JsonResponse(cached)
 
     if not refreshing:
@@ -602,56 +607,12 @@ def _exact_match_percent(record: dict) -> float | None:
     return round(pct, 2)
 
 
-def _load_history_latest() -> list[dict]:
-    candidates: list[str] = []
-    try:
-        candidates = prediction_history._history_candidates()
-    except Exception:
-        candidates = []
-
-    flat_records: list[dict] = []
-    seen_ids: set[str] = set()
-
-    def _append_record(record: dict) -> None:
-        if not isinstance(record, dict):
-            return
-        record_id = record.get("id") or record.get("uuid")
-        if record_id and record_id in seen_ids:
-            return
-        if record_id:
-            seen_ids.add(str(record_id))
-        flat_records.append(record)
-
-    for path in candidates:
-        if not path or not os.path.exists(path):
-            continue
-        try:
-            with open(path, "r") as handle:
-                data = json.load(handle)
-        except Exception:
-            continue
-
-        if isinstance(data, list):
-            for record in data:
-                _append_record(record)
-            continue
-
-        if isinstance(data, dict):
-            for symbol_key, records in data.items():
-                if not isinstance(records, list):
-                    continue
-                for record in records:
-                    if not isinstance(record, dict):
-                        continue
-                    if not record.get("symbol"):
-                        record["_symbol_key"] = symbol_key
-                    _append_record(record)
-
-    if not flat_records:
-        history, _, _ = load_history_any()
-        return history if isinstance(history, list) else []
-
-    return flat_records
+def _load_history_latest(date_from=None) -> list[dict]:
+    # ranged reads only open the partitions in range; the full history is
+    # the shared read-only snapshot (parsed once per history version)
+    if date_from:
+        return load_history_range(date_from=date_from)
+    return list(history_snapshot().records)
 
 
 def _next_weekly_competition() -> str:
@@ -738,7 +699,7 @@ def ml_jobs(request):
     # ---- TOP 100 STOCKS PANEL ----
     tz = ZoneInfo("Asia/Kolkata")
     target_date = (datetime.now(tz) - timedelta(days=1)).date()
-    history = _load_history_latest()
+    history = _load_history_latest(date_from=target_date - timedelta(days=ML_JOBS_HISTORY_DAYS))
     latest_by_symbol = {}
     latest_range_by_symbol = {}
     latest_dates = []
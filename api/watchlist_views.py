@@ -1,5 +1,6 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
+from django.db import close_old_connections
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import ensure_csrf_cookie
@@ -14,13 +15,22 @@ from core_engine.price_engine import (
     get_price,
     get_change_percent,
     register_symbol,
-    PRICE_CACHE,
-    CHANGE_CACHE,
-    LOCK,
 )
 from core_engine.symbol_resolver import DF
 
 
+# =========================================================
+# QUOTE PINS
+# =========================================================
+def watchlisted_symbols():
+    """
+    Pin source for the price engine: every symbol on any watchlist.
+    Called from the updater thread, outside any request.
+    """
+    close_old_connections()
+    return set(Watchlist.objects.values_list("symbol", flat=True).distinct())
+
+
 # =========================================================
 # WATCHLIST PAGE
 # =========================================================
@@ -48,6 +58,7 @@ def watchlist_data(request):
 
     data = []
     for item in items:
+        register_symbol(item.symbol, eager=False)
         data.append({
             "symbol": item.symbol,
             "current_price": get_price(item.symbol),
@@ -108,6 +119,7 @@ def watchlist_add_api(request):
         symbol=symbol
     )
 
+    # the updater pins it from the Watchlist table
     register_symbol(symbol)
 
     return Response({
@@ -130,10 +142,8 @@ def watchlist_remove_api(request):
         symbol=symbol
     ).delete()
 
-    with LOCK:
-        PRICE_CACHE.pop(symbol, None)
-        CHANGE_CACHE.pop(symbol, None)
-
+    # unpinned by the updater once no watchlist holds it; idle eviction
+    # drops it after that
     return Response({"status": "ok", "symbol": symbol})
 
 # =========================================================
@@ -154,7 +164,7 @@ def add_to_watchlist(request):
         symbol=symbol
     )
 
-    # 🔥 register once (Yahoo hit happens here)
+    # 🔥 register once (Yahoo hit happens here); pinned by the updater
     register_symbol(symbol)
 
     return JsonResponse({"status": "ok", "symbol": symbol})
@@ -186,7 +196,4 @@ def remove_from_watchlist(request):
         symbol=symbol
     ).delete()
 
-    with LOCK:
-        PRICE_CACHE.pop(symbol, None)
-
     return JsonResponse({"status": "ok", "symbol": symbol})
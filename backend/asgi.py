@@ -14,3 +14,14 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_asgi_application()
+
+# watchlist symbols stay pinned while any Watchlist row holds them
+from api.watchlist_views import watchlisted_symbols  # noqa: E402
+from core_engine.price_engine import set_pin_source  # noqa: E402
+
+set_pin_source(watchlisted_symbols)
+
+# quote-serving processes run the price updater (see core_engine.price_engine)
+from core_engine.price_engine import start_price_engine  # noqa: E402
+
+start_price_engine()
@@ -5,7 +5,11 @@ Generated by 'django-admin startproject' using Django 6.0.
 """
 
 from pathlib import Path
+import atexit
 import os
+import shutil
+import sys
+import tempfile
 from datetime import timedelta
 from dotenv import load_dotenv
 
@@ -19,6 +23,32 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # --------------------------------------------------
 load_dotenv(BASE_DIR / ".env", override=True)
 
+# --------------------------------------------------
+# TEST RUNS (NO NETWORK, NO REPO CACHE FILES)
+# --------------------------------------------------
+# `manage.py test` replays market data from an empty recording dir (every
+# Yahoo call is a miss), keeps quotes in-process with no updater thread
+# and puts every local store in a throwaway dir. Set before any
+# core_engine import: those modules read their paths at import time.
+TESTING = len(sys.argv) > 1 and sys.argv[1] == "test"
+if TESTING:
+    TEST_DATA_DIR = tempfile.mkdtemp(prefix="seestox-test-")
+    atexit.register(shutil.rmtree, TEST_DATA_DIR, True)
+    _test_history_json = os.path.join(TEST_DATA_DIR, "prediction_history.json")
+    with open(_test_history_json, "w") as _handle:
+        _handle.write("[]")
+    os.environ.update({
+        "SEESTOX_MARKET_DATA_MODE": "replay",
+        "SEESTOX_MARKET_DATA_DIR": os.path.join(TEST_DATA_DIR, "market_data"),
+        "SEESTOX_QUOTE_SHARED": "0",
+        "SEESTOX_QUOTE_UPDATER": "0",
+        "SEESTOX_QUOTE_DB": os.path.join(TEST_DATA_DIR, "quotes.sqlite3"),
+        "SEESTOX_OHLCV_DIR": os.path.join(TEST_DATA_DIR, "price_data"),
+        "SEESTOX_HISTORY_DB": os.path.join(TEST_DATA_DIR, "prediction_history.sqlite3"),
+        "SEESTOX_HISTORY_COLUMNS": os.path.join(TEST_DATA_DIR, "prediction_history.columns.npz"),
+        "SEESTOX_PREDICTION_HISTORY_PATH": _test_history_json,
+    })
+
 # --------------------------------------------------
 # CORE SECURITY
 # --------------------------------------------------
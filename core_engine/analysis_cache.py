@@ -0,0 +1,142 @@
+# core_engine/analysis_cache.py
+# READ-THROUGH CACHE FOR analyze_stock() RESULTS (VERSION-CHECKED, SHORT TTL)
+
+import copy
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+
+from core_engine.data_fetch import is_market_open, last_bar_version
+from core_engine.ml_engine.confidence import confidence_champion_version
+from core_engine.ml_engine.expected_range.champion_selector import champion_version
+from core_engine.ml_engine.expected_range.model_registry import registry_version
+from core_engine.sentiment_engine import sentiment_version
+from core_engine.single_flight import SingleFlight
+
+
+# ==================================================
+# CONFIG
+# ==================================================
+
+# 0 disables the cache
+ANALYSIS_CACHE_TTL = float(os.getenv("SEESTOX_ANALYSIS_CACHE_TTL", "30"))
+ANALYSIS_CACHE_CLOSED_TTL = float(os.getenv("SEESTOX_ANALYSIS_CACHE_CLOSED_TTL", "300"))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("SEESTOX_ANALYSIS_CACHE_MAX_ENTRIES", "512"))
+
+logger = logging.getLogger("core_engine.analysis_cache")
+
+
+# ==================================================
+# DATA VERSION
+# ==================================================
+
+def data_version(resolved_symbol: str, sentiment_symbol: str) -> tuple:
+    """
+    Cheap fingerprint of everything an analysis is derived from: the last
+    cached daily bar, the sentiment snapshot and the champion models. No
+    network or history reads.
+    """
+    return (
+        last_bar_version(resolved_symbol),
+        sentiment_version(sentiment_symbol),
+        (champion_version(), registry_version(), confidence_champion_version()),
+    )
+
+
+# ==================================================
+# CACHE
+# ==================================================
+
+_ENTRIES: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (stored_at, version, result)
+_LOCK = threading.Lock()
+_STATS = {"hits": 0, "misses": 0, "expired": 0, "invalidated": 0, "evictions": 0}
+_FLIGHTS = SingleFlight("analysis")
+
+
+def _ttl() -> float:
+    return ANALYSIS_CACHE_TTL if is_market_open() else ANALYSIS_CACHE_CLOSED_TTL
+
+
+def _lookup(key: Hashable, version: tuple) -> Optional[Dict]:
+    with _LOCK:
+        entry = _ENTRIES.get(key)
+        if entry is None:
+            _STATS["misses"] += 1
+            return None
+        stored_at, stored_version, result = entry
+        if time.time() - stored_at >= _ttl():
+            reason = "expired"
+        elif stored_version != version:
+            reason = "invalidated"
+        else:
+            _ENTRIES.move_to_end(key)
+            _STATS["hits"] += 1
+            return result
+        del _ENTRIES[key]
+        _STATS[reason] += 1
+        _STATS["misses"] += 1
+        return None
+
+
+def _store(key: Hashable, version: tuple, result: Dict) -> None:
+    with _LOCK:
+        _ENTRIES.pop(key, None)
+        _ENTRIES[key] = (time.time(), version, result)
+        while len(_ENTRIES) > ANALYSIS_CACHE_MAX_ENTRIES:
+            _ENTRIES.popitem(last=False)
+            _STATS["evictions"] += 1
+
+
+def _compute(key: Hashable, resolved_symbol: str, sentiment_symbol: str, compute: Callable[[], Dict]) -> Dict:
+    result = compute()
+    # read after computing: the fetch / sentiment read above just set it
+    _store(key, data_version(resolved_symbol, sentiment_symbol), result)
+    return result
+
+
+def cached_analysis(
+    resolved_symbol: str,
+    sentiment_symbol: str,
+    compute: Callable[[], Dict],
+    use_cache: bool = True,
+) -> Dict:
+    """
+    Returns compute()'s result for the symbol, reusing the last one while
+    it is younger than the TTL and its data version still matches.
+    Concurrent misses share one computation. Callers get their own copy.
+    """
+    key = (resolved_symbol, str(sentiment_symbol).strip().upper())
+    if ANALYSIS_CACHE_TTL <= 0:
+        return compute()
+
+    if use_cache:
+        result = _lookup(key, data_version(resolved_symbol, sentiment_symbol))
+        if result is not None:
+            logger.debug("Analysis cache hit: %s", resolved_symbol)
+            return copy.deepcopy(result)
+
+    result = _FLIGHTS.do(("analysis",) + key, _compute, key, resolved_symbol, sentiment_symbol, compute)
+    return copy.deepcopy(result)
+
+
+def invalidate(resolved_symbol: Optional[str] = None) -> int:
+    with _LOCK:
+        keys = [k for k in _ENTRIES if resolved_symbol is None or k[0] == resolved_symbol]
+        for key in keys:
+            del _ENTRIES[key]
+    return len(keys)
+
+
+def analysis_cache_stats() -> Dict:
+    with _LOCK:
+        lookups = _STATS["hits"] + _STATS["misses"]
+        return {
+            **_STATS,
+            "entries": len(_ENTRIES),
+            "ttl": _ttl(),
+            "hit_rate": round(_STATS["hits"] / lookups, 4) if lookups else 0.0,
+            "flights": _FLIGHTS.stats(),
+        }
@@ -1,13 +1,18 @@
 # core_engine/analyzer.py
 # PHASE-2E.6 — RULE + ML-WIRED ANALYZER (SAFE MODE)
 
+import os
+
+from core_engine.analysis_cache import cached_analysis
 from core_engine.data_fetch import fetch_stock_data
+from core_engine.price_series import PriceSeries
 from core_engine.trend_engine import analyze_trend
-from core_engine.sentiment_engine import analyze_sentiment
+from core_engine.sentiment_engine import cached_sentiment
 from core_engine.risk_engine import analyze_risk
 from core_engine.prediction_engine import predict_next_day
 from core_engine.confidence_engine import calculate_confidence
 from core_engine.prediction_history import store_prediction
+from core_engine.stage_graph import Stage, run_stages
 from core_engine.symbol_resolver import resolve_symbol
 from core_engine.ml_engine.confidence import (
     load_confidence_champion,
@@ -30,28 +35,123 @@ from core_engine.ml_engine.expected_range.champion_predictor import (
 from core_engine.ml_engine.expected_range.feature_encoder import encode_single_features
 
 
-def analyze_stock(symbol: str) -> dict:
-    resolved = resolve_symbol(symbol)
-    if not resolved:
-        raise ValueError("Unknown symbol")
-    resolved_symbol, company_name = resolved
+# ==================================================
+# STAGE TIMEOUTS (SECONDS)
+# ==================================================
+
+PRICES_STAGE_TIMEOUT = float(os.getenv("SEESTOX_PRICES_STAGE_TIMEOUT", "30"))
+SENTIMENT_STAGE_TIMEOUT = float(os.getenv("SEESTOX_SENTIMENT_STAGE_TIMEOUT", "8"))
+CONFIDENCE_STAGE_TIMEOUT = float(os.getenv("SEESTOX_CONFIDENCE_STAGE_TIMEOUT", "5"))
+
+
+def analyze_stock(symbol: str, use_cache: bool = True) -> dict:
+    """
+    Full analysis for `symbol`. Repeated calls are served from the
+    analysis cache while the underlying data version is unchanged;
+    use_cache=False forces a fresh run (and refreshes the cache).
+    Every call records its prediction, cache hit or not.
+    """
+    resolved = resolve_symbol(symbol)
+    if not resolved:
+        raise ValueError("Unknown symbol")
+    resolved_symbol, company_name = resolved
+
+    result = cached_analysis(
+        resolved_symbol,
+        symbol,
+        lambda: _analyze(symbol, resolved_symbol, company_name),
+        use_cache=use_cache,
+    )
+    # side effect kept out of the cached computation (result is our copy)
+    store_prediction(**result.pop("_prediction_record"))
+    return result
 
-    # -----------------------------
-    # 1. Fetch Historical Data
-    # -----------------------------
-    df = fetch_stock_data(resolved_symbol)
-    df.attrs["symbol"] = resolved_symbol
+
+# ==================================================
+# I/O STAGES (INDEPENDENT, RUN CONCURRENTLY)
+# ==================================================
+
+def _load_prices(resolved_symbol: str) -> PriceSeries:
+    df = fetch_stock_data(resolved_symbol)
 
     if df is None or len(df) == 0 or "Close" not in df.columns:
         raise ValueError("Invalid historical data")
 
-    close_val = df["Close"].iloc[-1]
-    current_price = float(close_val.values[0]) if hasattr(close_val, "values") else float(close_val)
+    # normalized once; every engine below reads these arrays
+    series = PriceSeries.from_frame(df, symbol=resolved_symbol)
+    if len(series) == 0:
+        raise ValueError("Invalid historical data")
+    return series
+
+
+def _sentiment_fallback(error: BaseException) -> dict:
+    return {
+        "overall": "NEUTRAL",
+        "confidence": 0,
+        "score": 0.0,
+        "why": "Sentiment unavailable right now",
+        "trend_7d": 0.0,
+        "headlines": [],
+    }
+
+
+def _load_confidence(resolved_symbol: str) -> dict:
+    # history stats only: keyed by symbol, no price data needed
+    confidence_raw = calculate_confidence(resolved_symbol)
+    return {
+        "block": {
+            "success_rate": confidence_raw["success_rate"],
+            "failure_rate": confidence_raw["failure_rate"],
+            "neutral_rate": confidence_raw["neutral_rate"],
+            "sample_size": confidence_raw["sample_size"],
+            "verdict": confidence_raw["verdict"],
+        },
+        "champion": load_confidence_champion(resolved_symbol),
+    }
+
+
+def _confidence_fallback(error: BaseException) -> dict:
+    return {
+        "block": {
+            "success_rate": 0,
+            "failure_rate": 0,
+            "neutral_rate": 100,
+            "sample_size": 0,
+            "verdict": "INSUFFICIENT_DATA",
+            "source": "UNAVAILABLE",
+        },
+        "champion": {"status": "UNAVAILABLE"},
+    }
+
+
+def _analyze(symbol: str, resolved_symbol: str, company_name: str) -> dict:
+    # -----------------------------
+    # 1. Fetch Historical Data / Sentiment / History Stats
+    # -----------------------------
+    # latency = slowest stage, not the sum; only prices are mandatory
+    stages = run_stages([
+        Stage("prices", lambda: _load_prices(resolved_symbol), timeout=PRICES_STAGE_TIMEOUT),
+        Stage(
+            "sentiment",
+            lambda: cached_sentiment(symbol),
+            timeout=SENTIMENT_STAGE_TIMEOUT,
+            fallback=_sentiment_fallback,
+        ),
+        Stage(
+            "confidence",
+            lambda: _load_confidence(resolved_symbol),
+            timeout=CONFIDENCE_STAGE_TIMEOUT,
+            fallback=_confidence_fallback,
+        ),
+    ])
+
+    series = stages["prices"]
+    current_price = series.last_close
 
     # -----------------------------
     # 2. Trend Analysis
     # -----------------------------
-    trend_raw = analyze_trend(df)
+    trend_raw = analyze_trend(series)
     trend_block = {
         "trend": trend_raw.get("trend", "SIDEWAYS"),
         "strength": round(float(trend_raw.get("strength", 0.0)), 2),
@@ -63,7 +163,7 @@ def analyze_stock(symbol: str) -> dict:
     # -----------------------------
     # 3. Sentiment
     # -----------------------------
-    sentiment_raw = analyze_sentiment(symbol)
+    sentiment_raw = stages["sentiment"]
 
     sentiment_overall = sentiment_raw.get("overall", "NEUTRAL")
     sentiment_confidence = int(sentiment_raw.get("confidence", 0))
@@ -89,7 +189,7 @@ def analyze_stock(symbol: str) -> dict:
     # -----------------------------
     # 4. Risk
     # -----------------------------
-    risk_raw = analyze_risk(df, trend_block)
+    risk_raw = analyze_risk(series, trend_block)
     risk_block = {
         "risk_level": risk_raw.get("risk_level", "LOW"),
         "risk_score": int(risk_raw.get("risk_score", 0)),
@@ -98,7 +198,7 @@ def analyze_stock(symbol: str) -> dict:
     # -----------------------------
     # 5. Direction
     # -----------------------------
-    prediction_raw = predict_next_day(df)
+    prediction_raw = predict_next_day(series)
     up = int(prediction_raw.get("up_probability", 33))
     down = int(prediction_raw.get("down_probability", 33))
     sideways = max(0, 100 - (up + down))
@@ -106,7 +206,7 @@ def analyze_stock(symbol: str) -> dict:
     # -----------------------------
     # 6. Expected Range (RULE → ML → CHAMPION)
     # -----------------------------
-    range_data = calculate_base_range(df, current_price)
+    range_data = calculate_base_range(series, current_price)
 
     adjusted_range = adjust_expected_range(
         symbol=resolved_symbol,
@@ -118,7 +218,7 @@ def analyze_stock(symbol: str) -> dict:
 
     # 🔥 FEATURE VECTOR (MANDATORY)
     features = encode_single_features(
-        df=df,
+        df=series,
         trend=trend_block,
         sentiment=sentiment_block,
         risk=risk_block,
@@ -153,11 +253,11 @@ def analyze_stock(symbol: str) -> dict:
     }
 
     # -----------------------------
-    # 8. Store Prediction
+    # 8. Prediction Record (stored by analyze_stock)
     # -----------------------------
-    store_prediction(
-        symbol=resolved_symbol,
-        prediction={
+    prediction_record = {
+        "symbol": resolved_symbol,
+        "prediction": {
             "tomorrow": {
                 "up_probability": up,
                 "down_probability": down,
@@ -168,8 +268,8 @@ def analyze_stock(symbol: str) -> dict:
                 },
             }
         },
-        context=context,
-    )
+        "context": context,
+    }
 
     # -----------------------------
     # 9. Prediction Block (UI TRUTH)
@@ -188,17 +288,10 @@ def analyze_stock(symbol: str) -> dict:
     # -----------------------------
     # 10. Confidence
     # -----------------------------
-    confidence_raw = calculate_confidence(df)
-    confidence_block = {
-        "success_rate": confidence_raw["success_rate"],
-        "failure_rate": confidence_raw["failure_rate"],
-        "neutral_rate": confidence_raw["neutral_rate"],
-        "sample_size": confidence_raw["sample_size"],
-        "verdict": confidence_raw["verdict"],
-    }
+    confidence_block = dict(stages["confidence"]["block"])
 
     # ---- CONFIDENCE ML (SAFE MODE) ----
-    champion = load_confidence_champion(resolved_symbol)
+    champion = stages["confidence"]["champion"]
 
     if champion.get("status") == "ACTIVE":
         try:
@@ -254,4 +347,5 @@ def analyze_stock(symbol: str) -> dict:
         "prediction": prediction_block,
         "confidence": confidence_block,
         "context": context,
+        "_prediction_record": prediction_record,
     }
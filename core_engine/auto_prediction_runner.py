@@ -15,6 +15,7 @@ def run_auto_predictions():
     # IMPORT INSIDE FUNCTION (CRITICAL FIX)
     from core_engine.universe import TOP_100_STOCKS
     from core_engine.analyzer import analyze_stock
+    from core_engine.data_fetch import fetch_stock_data_many
 
     started_at = datetime.now()
     report = {
@@ -29,10 +30,23 @@ def run_auto_predictions():
     logger.info("Total stocks: %d", len(TOP_100_STOCKS))
 
     try:
+        # one chunked multi-ticker download instead of 100 round trips;
+        # analyze_stock() below then hits the warmed history cache
+        try:
+            prefetched = fetch_stock_data_many(TOP_100_STOCKS)
+            logger.info(
+                "Prefetched history for %d/%d stocks",
+                len(prefetched),
+                len(TOP_100_STOCKS),
+            )
+        except Exception:
+            logger.warning("Bulk history prefetch failed", exc_info=True)
+
         for symbol in TOP_100_STOCKS:
             logger.info("Processing %s", symbol)
             try:
-                analyze_stock(symbol)
+                # the daily run must store fresh predictions, not cached ones
+                analyze_stock(symbol, use_cache=False)
                 report["success"] += 1
             except Exception:
                 report["failed"] += 1
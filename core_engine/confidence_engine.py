@@ -4,6 +4,7 @@
 from typing import Dict, Union
 import pandas as pd
 
+from core_engine.price_series import PriceSeries
 from core_engine.prediction_history import (
     get_stats_for_symbol,
     get_confidence_trend
@@ -75,7 +76,7 @@ def _build_confidence(stats: Dict, symbol: str) -> Dict:
 # PUBLIC API (ANALYZER SAFE)
 # ==================================================
 
-def calculate_confidence(input_data: Union[str, pd.DataFrame]) -> Dict:
+def calculate_confidence(input_data: Union[str, pd.DataFrame, PriceSeries]) -> Dict:
     """
     🔐 Backward compatible:
     - analyzer.py expects flat keys → provided
@@ -91,6 +92,10 @@ def calculate_confidence(input_data: Union[str, pd.DataFrame]) -> Dict:
         symbol = input_data.attrs.get("symbol")
         if not symbol:
             return _neutral_confidence(note="Symbol missing in dataframe.")
+    elif isinstance(input_data, PriceSeries):
+        symbol = input_data.symbol
+        if not symbol:
+            return _neutral_confidence(note="Symbol missing in price series.")
     else:
         return _neutral_confidence(note="Invalid confidence input.")
 
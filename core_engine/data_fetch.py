@@ -1,35 +1,192 @@
 # core_engine/data_fetch.py
 
-import time
+import os
 import threading
-from datetime import datetime, time as dtime
-from zoneinfo import ZoneInfo
-
-import yfinance as yf
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from core_engine.frame_cache import FrameCache
+from core_engine.market_data_provider import get_provider
+from core_engine.ohlcv_store import (
+    bars_from_frame,
+    load_bars,
+    merge_bars,
+    save_bars,
+)
+from core_engine.single_flight import YAHOO_FLIGHTS
+from core_engine import trading_calendar
+from core_engine.trading_calendar import IST, is_fresh
 
 # ---------------- CACHE ---------------- #
-_CACHE = {}
-_CACHE_LOCK = threading.Lock()
+# LRU + TTL, bounded by entries and bytes; hands out read-only views
+HISTORY_CACHE_MAX_ENTRIES = int(os.getenv("SEESTOX_HISTORY_CACHE_MAX_ENTRIES", "256"))
+HISTORY_CACHE_MAX_BYTES = int(os.getenv("SEESTOX_HISTORY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+_CACHE = FrameCache(HISTORY_CACHE_MAX_ENTRIES, HISTORY_CACHE_MAX_BYTES)
 
 # remembers which Yahoo base symbol worked for a given canonical symbol
 _YF_SUCCESS_MAP = {}
 _YF_SUCCESS_LOCK = threading.Lock()
 
+# live-session TTL; outside sessions data is held until the next open
+# (see trading_calendar.expires_at)
 MARKET_OPEN_TTL = 30        # 30 sec
-MARKET_CLOSED_TTL = 1800    # 30 min
 
-IST = ZoneInfo("Asia/Kolkata")
+# auto-adjusted closes shift on every split/dividend; a top-up whose
+# overlapping bar moves by more than this re-downloads the stored range
+OHLCV_OVERLAP_RTOL = float(os.getenv("SEESTOX_OHLCV_OVERLAP_RTOL", "1e-4"))
+
+# tickers per multi-ticker yf.download() call in fetch_stock_data_many
+BULK_CHUNK_SIZE = int(os.getenv("SEESTOX_BULK_CHUNK_SIZE", "25"))
+
+# calendar-day approximations of Yahoo period strings (daily bars)
+_PERIOD_DAYS = {
+    "1d": 1,
+    "5d": 7,
+    "1mo": 31,
+    "3mo": 92,
+    "6mo": 183,
+    "1y": 366,
+    "2y": 731,
+    "5y": 1827,
+    "10y": 3653,
+}
+_MAX_PERIOD_START = np.datetime64("1900-01-01", "D")
 
 
 # ---------------- MARKET CLOCK ---------------- #
 def is_market_open():
-    # IMPORTANT: droplet usually runs UTC; use IST explicitly
-    now = datetime.now(IST).time()
-    return dtime(9, 15) <= now <= dtime(15, 30)
+    # IST sessions, weekends and NSE holidays
+    return trading_calendar.is_market_open()
 
 
 def _is_cache_valid(ts, ttl):
-    return (time.time() - ts) < ttl
+    return is_fresh(ts, ttl)
+
+
+def _period_start(period: str) -> np.datetime64:
+    """
+    First calendar date a daily `period` window must cover.
+    'max' (or anything unknown) maps to a far-past sentinel.
+    """
+    today = trading_calendar.now_ist().date()
+    if period == "ytd":
+        return np.datetime64(today.replace(month=1, day=1), "D")
+    days = _PERIOD_DAYS.get(period)
+    if days is None:
+        return _MAX_PERIOD_START
+    return np.datetime64(today - timedelta(days=days), "D")
+
+
+def _frame_from_bars(bars: dict, yf_symbol: str) -> pd.DataFrame:
+    """
+    Rebuilds the same frame shape yf.download() returns (MultiIndex columns,
+    'Date' column after reset_index) so downstream engines are unaffected.
+    """
+    order = ("close", "high", "low", "open", "volume")
+    columns = pd.MultiIndex.from_tuples(
+        [(col.capitalize(), yf_symbol) for col in order],
+        names=["Price", "Ticker"],
+    )
+    index = pd.DatetimeIndex(bars["date"].astype("datetime64[ns]"), name="Date")
+    values = np.column_stack([bars[col] for col in order]) if len(index) else np.empty((0, len(order)))
+    return pd.DataFrame(values, index=index, columns=columns).reset_index()
+
+
+def _store_covers(stored, start) -> bool:
+    return (
+        stored is not None
+        and stored.get("covered_from") is not None
+        and stored["covered_from"] <= start
+    )
+
+
+def _download_from(yf_symbol: str, start):
+    if start == _MAX_PERIOD_START:
+        full = get_provider().download(yf_symbol, period="max", progress=False, threads=False)
+    else:
+        full = get_provider().download(yf_symbol, start=str(start), progress=False, threads=False)
+    return bars_from_frame(full, yf_symbol, covered_from=start)
+
+
+def _topup_anchor(stored):
+    # the last stored bar may be partial; the one before is settled
+    return stored["date"][-2] if len(stored["date"]) > 1 else stored["date"][-1]
+
+
+def _overlap_matches(stored, fresh, anchor) -> bool:
+    """
+    False when the top-up re-priced the stored `anchor` bar, i.e. a split
+    or dividend re-adjusted the history since the bars were stored.
+    """
+    idx = np.flatnonzero(fresh["date"] == anchor)
+    if idx.size == 0:
+        return True
+    old = stored["close"][np.flatnonzero(stored["date"] == anchor)[0]]
+    new = fresh["close"][idx[0]]
+    return bool(np.isclose(new, old, rtol=OHLCV_OVERLAP_RTOL, atol=0.0))
+
+
+def _load_history_bars(yf_symbol: str, period: str, ttl: float):
+    """
+    Disk store first; Yahoo only for the missing trailing bars.
+    A full download happens only when the store does not cover `period`,
+    or when a top-up shows the stored bars were re-adjusted.
+    Returns every stored bar (at least `period` deep), not just the window.
+    """
+    start = _period_start(period)
+    stored = load_bars(yf_symbol)
+    covered = _store_covers(stored, start)
+
+    if covered:
+        if _is_cache_valid(stored.get("fetched_at") or 0.0, ttl):
+            return stored
+
+        anchor = _topup_anchor(stored)
+        try:
+            print(f"🌐 Topping up historical data: {yf_symbol} since {anchor}")
+            fresh = bars_from_frame(
+                get_provider().download(yf_symbol, start=str(anchor), progress=False, threads=False),
+                yf_symbol,
+            )
+            if _overlap_matches(stored, fresh, anchor):
+                bars = merge_bars(stored, fresh)
+            else:
+                print(f"🔁 Adjusted prices changed for {yf_symbol}, re-downloading stored range")
+                bars = _download_from(yf_symbol, stored["covered_from"])
+                if len(bars["date"]) == 0:
+                    raise ValueError("empty re-download")
+            save_bars(yf_symbol, bars)
+        except Exception as e:
+            # stale bars beat no bars
+            print(f"⚠️ Top-up failed for {yf_symbol}, serving stored bars: {e}")
+            bars = stored
+        return bars
+
+    print(f"🌐 Fetching historical data: {yf_symbol} ({period})")
+    fresh = _download_from(yf_symbol, start)
+    if len(fresh["date"]) == 0:
+        return None
+
+    bars = merge_bars(stored, fresh)
+    save_bars(yf_symbol, bars)
+    return bars
+
+
+def _shared_history_bars(yf_symbol: str, period: str, ttl: float):
+    """
+    _load_history_bars coalesced per symbol, whatever the period: callers
+    slice their own window from the shared bars. A caller that joined a
+    shallower load than its period needs flies once more (joined by the
+    other long-period callers), then loads on its own.
+    """
+    start = _period_start(period)
+    for _ in range(2):
+        bars = YAHOO_FLIGHTS.do(("history", yf_symbol), _load_history_bars, yf_symbol, period, ttl)
+        if bars is None or _store_covers(bars, start):
+            return bars
+    return _load_history_bars(yf_symbol, period, ttl)
 
 
 def _parse_symbol(symbol: str):
@@ -71,12 +228,93 @@ _YF_OVERRIDES = {
 }
 
 
+def history_cache_stats() -> dict:
+    return _CACHE.stats()
+
+
+def _remember_frame(base_symbol: str, suffix: str, yf_symbol: str, bars: dict):
+    """
+    Caches the full stored window for a symbol (one entry per symbol, not
+    per period) and returns a read-only view of it.
+    """
+    df = _frame_from_bars(bars, yf_symbol)
+    covered = bars.get("covered_from")
+    if covered is None and len(bars["date"]):
+        covered = bars["date"][0]
+    df.attrs["covered_from"] = covered
+
+    # the cache keeps `df` itself (frozen); callers get a view back
+    view = _CACHE.put((base_symbol, yf_symbol), df)
+
+    # remember the working mapping (base -> yahoo base without suffix)
+    with _YF_SUCCESS_LOCK:
+        _YF_SUCCESS_MAP[base_symbol] = yf_symbol.replace(suffix, "")
+    return view
+
+
+def _window_view(df, start):
+    """
+    Rows on/after `start` of a cached full-window frame, without copying
+    the column buffers. Index is reset like a fresh download.
+    """
+    df.attrs.pop("covered_from", None)
+    dates = df["Date"].to_numpy(dtype="datetime64[D]")
+    idx = int(np.searchsorted(dates, np.datetime64(start, "D"), side="left"))
+    if idx == 0:
+        return df
+    view = df.iloc[idx:].copy(deep=False)
+    view.index = pd.RangeIndex(len(view))
+    return view
+
+
+def _cached_window(base_symbol: str, yf_symbol: str, start, ttl: float):
+    """
+    Serves any daily period the cached window already covers
+    (e.g. 6mo out of a cached 1y) by slicing. None on miss/too short.
+    """
+    cached = _CACHE.get((base_symbol, yf_symbol), fresh=lambda ts: _is_cache_valid(ts, ttl))
+    if cached is None:
+        return None
+    covered = cached.attrs.get("covered_from")
+    if covered is None or covered > start:
+        return None
+    return _window_view(cached, start)
+
+
+def last_bar_version(symbol: str):
+    """
+    (date, close) of the newest cached daily bar for `symbol`, read from
+    the frame cache without any network call or freshness check; None
+    when nothing is cached. Changes whenever a top-up moves the last bar.
+    """
+    base_symbol, suffix = _parse_symbol(symbol)
+    with _YF_SUCCESS_LOCK:
+        known = _YF_SUCCESS_MAP.get(base_symbol)
+    entry = _CACHE.peek((base_symbol, f"{known or base_symbol}{suffix}"))
+    if entry is None:
+        return None
+    df = entry[1]
+    close = [c for c in df.columns if (c[0] if isinstance(c, tuple) else c) == "Close"]
+    if df.empty or not close or "Date" not in df.columns:
+        return None
+    return str(df["Date"].iloc[-1])[:10], float(df[close[0]].iloc[-1])
+
+
+def _finalize_frame(df, base_symbol: str, used_yf_symbol: str):
+    # IMPORTANT: keep canonical symbol in df
+    df["symbol"] = base_symbol
+    # optional debug
+    df.attrs["yf_symbol"] = used_yf_symbol
+    return df
+
+
 def fetch_stock_data(symbol: str, period="6mo"):
     base_symbol, suffix = _parse_symbol(symbol)
     if not base_symbol:
         raise ValueError("Empty symbol")
 
-    ttl = MARKET_OPEN_TTL if is_market_open() else MARKET_CLOSED_TTL
+    ttl = MARKET_OPEN_TTL
+    start = _period_start(period)
 
     # Build candidate Yahoo symbols
     candidates = []
@@ -104,44 +342,30 @@ def fetch_stock_data(symbol: str, period="6mo"):
     used_yf_symbol = None
 
     for yf_symbol in candidates:
-        cache_key = (base_symbol, yf_symbol, period)
-
         # -------- HISTORICAL CACHE -------- #
-        with _CACHE_LOCK:
-            if cache_key in _CACHE:
-                ts, cached_df = _CACHE[cache_key]
-                if _is_cache_valid(ts, ttl):
-                    print(f"⚡ Cache HIT ({'OPEN' if is_market_open() else 'CLOSED'}): {base_symbol} via {yf_symbol}")
-                    df = cached_df.copy()
-                    used_yf_symbol = yf_symbol
-                    break
-                else:
-                    del _CACHE[cache_key]
-
-        # -------- FETCH FROM YAHOO -------- #
+        cached_df = _cached_window(base_symbol, yf_symbol, start, ttl)
+        if cached_df is not None:
+            print(f"⚡ Cache HIT ({'OPEN' if is_market_open() else 'CLOSED'}): {base_symbol} via {yf_symbol}")
+            df = cached_df
+            used_yf_symbol = yf_symbol
+            break
+
+        # -------- DISK STORE + YAHOO TOP-UP -------- #
         if df is None:
             try:
-                print(f"🌐 Fetching historical data: {base_symbol} via {yf_symbol}")
-                tmp = yf.download(
-                    yf_symbol,
-                    period=period,
-                    progress=False,
-                    threads=False
-                )
-                if tmp is None or tmp.empty:
+                # concurrent misses on the same symbol share one fetch
+                bars = _shared_history_bars(yf_symbol, period, ttl)
+                if bars is None or len(bars["date"]) == 0:
                     last_err = f"No data for {yf_symbol}"
                     continue
 
-                tmp = tmp.reset_index()
-                df = tmp
-                used_yf_symbol = yf_symbol
-
-                with _CACHE_LOCK:
-                    _CACHE[cache_key] = (time.time(), df.copy())
+                window = _window_view(_remember_frame(base_symbol, suffix, yf_symbol, bars), start)
+                if window.empty:
+                    last_err = f"No data for {yf_symbol}"
+                    continue
 
-                # remember the working mapping (base -> yahoo base without suffix)
-                with _YF_SUCCESS_LOCK:
-                    _YF_SUCCESS_MAP[base_symbol] = yf_symbol.replace(suffix, "")
+                df = window
+                used_yf_symbol = yf_symbol
                 break
 
             except Exception as e:
@@ -154,7 +378,7 @@ def fetch_stock_data(symbol: str, period="6mo"):
     # -------- LIVE PRICE PATCH -------- #
     if is_market_open() and used_yf_symbol:
         try:
-            ticker = yf.Ticker(used_yf_symbol)
+            ticker = get_provider().ticker(used_yf_symbol)
             live_price = None
             try:
                 live_price = ticker.fast_info.get("last_price")
@@ -162,14 +386,134 @@ def fetch_stock_data(symbol: str, period="6mo"):
                 live_price = None
 
             if live_price:
-                df.loc[df.index[-1], "Close"] = float(live_price)
+                # cached buffers are read-only: swap in patched Close column(s)
+                for col in [c for c in df.columns if (c[0] if isinstance(c, tuple) else c) == "Close"]:
+                    close = df[col].to_numpy(dtype=np.float64, copy=True)
+                    close[-1] = float(live_price)
+                    df[col] = close
         except Exception:
             pass  # never crash
 
-    # IMPORTANT: keep canonical symbol in df
-    df["symbol"] = base_symbol
-    # optional debug
-    df.attrs["yf_symbol"] = used_yf_symbol
+    return _finalize_frame(df, base_symbol, used_yf_symbol)
 
-    return df
+
+def fetch_daily_history(symbol: str, period="6mo") -> pd.DataFrame:
+    """
+    fetch_stock_data() in the yf.Ticker.history() shape
+    (IST DatetimeIndex, flat Open/High/Low/Close/Volume columns),
+    served from the same per-symbol window cache.
+    """
+    df = fetch_stock_data(symbol, period=period)
+    flat = df.drop(columns="symbol", level=0).set_index("Date")
+    flat.columns = flat.columns.get_level_values(0)
+    flat.index = pd.DatetimeIndex(flat.index).tz_localize(IST)
+    return flat
+
+
+# ---------------- BULK FETCH ---------------- #
+def fetch_stock_data_many(symbols, period="6mo", chunk_size: int = None) -> dict:
+    """
+    Universe-wide variant of fetch_stock_data for scheduled jobs.
+
+    - Serves cache / disk-store hits without network
+    - Downloads the rest in chunked multi-ticker yf.download() calls
+      (grouped by download start so top-ups stay small)
+    - Fills the same frame cache + disk store, so later fetch_stock_data()
+      calls for these symbols are cache hits
+    - Falls back to fetch_stock_data() for tickers the batch missed
+      (renamed symbols, overrides)
+
+    Returns: {base_symbol: df}. Symbols with no data are omitted.
+    Live-price patching is left to fetch_stock_data().
+    """
+    chunk_size = max(1, int(chunk_size or BULK_CHUNK_SIZE))
+    ttl = MARKET_OPEN_TTL
+    start = _period_start(period)
+
+    results = {}
+    pending = []   # (download_start, base_symbol, suffix, yf_symbol, stored)
+    seen = set()
+
+    for symbol in symbols or []:
+        base_symbol, suffix = _parse_symbol(symbol)
+        if not base_symbol or base_symbol in seen:
+            continue
+        seen.add(base_symbol)
+
+        with _YF_SUCCESS_LOCK:
+            known = _YF_SUCCESS_MAP.get(base_symbol)
+        yf_symbol = f"{known or base_symbol}{suffix}"
+
+        cached = _cached_window(base_symbol, yf_symbol, start, ttl)
+        if cached is not None:
+            results[base_symbol] = _finalize_frame(cached, base_symbol, yf_symbol)
+            continue
+
+        stored = load_bars(yf_symbol)
+        if _store_covers(stored, start):
+            if _is_cache_valid(stored.get("fetched_at") or 0.0, ttl):
+                df = _window_view(_remember_frame(base_symbol, suffix, yf_symbol, stored), start)
+                results[base_symbol] = _finalize_frame(df, base_symbol, yf_symbol)
+                continue
+            pending.append((_topup_anchor(stored), base_symbol, suffix, yf_symbol, stored))
+        else:
+            pending.append((start, base_symbol, suffix, yf_symbol, stored))
+
+    pending.sort(key=lambda item: item[0])
+    groups = {}
+    for item in pending:
+        groups.setdefault(item[0], []).append(item)
+
+    missed = []
+    for download_start, items in groups.items():
+        for i in range(0, len(items), chunk_size):
+            chunk = items[i:i + chunk_size]
+            tickers = [item[3] for item in chunk]
+            print(f"🌐 Bulk fetching {len(tickers)} symbols since {download_start}")
+            try:
+                if download_start == _MAX_PERIOD_START:
+                    raw = get_provider().download(tickers, period="max", group_by="ticker", progress=False, threads=True)
+                else:
+                    raw = get_provider().download(tickers, start=str(download_start), group_by="ticker", progress=False, threads=True)
+            except Exception as e:
+                print(f"⚠️ Bulk fetch failed ({len(tickers)} symbols): {e}")
+                raw = None
+
+            for _, base_symbol, suffix, yf_symbol, stored in chunk:
+                covered = _store_covers(stored, start)
+                try:
+                    fresh = bars_from_frame(raw, yf_symbol, covered_from=None if covered else start)
+                except Exception:
+                    fresh = None
+
+                if fresh is None or len(fresh["date"]) == 0:
+                    if covered:
+                        # nothing new since the last stored bar (or the batch failed)
+                        bars = stored
+                    else:
+                        missed.append(base_symbol + suffix)
+                        continue
+                elif covered and not _overlap_matches(stored, fresh, download_start):
+                    # re-adjusted history: fetch_stock_data() re-downloads it
+                    missed.append(base_symbol + suffix)
+                    continue
+                else:
+                    bars = merge_bars(stored, fresh)
+                    save_bars(yf_symbol, bars)
+
+                df = _window_view(_remember_frame(base_symbol, suffix, yf_symbol, bars), start)
+                if df.empty:
+                    missed.append(base_symbol + suffix)
+                    continue
+
+                results[base_symbol] = _finalize_frame(df, base_symbol, yf_symbol)
+
+    for symbol in missed:
+        try:
+            df = fetch_stock_data(symbol, period=period)
+        except Exception:
+            continue
+        results[_parse_symbol(symbol)[0]] = df
+
+    return results
 
@@ -0,0 +1,167 @@
+# core_engine/frame_cache.py
+# BOUNDED LRU + TTL CACHE FOR READ-ONLY DATAFRAMES
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+import pandas as pd
+
+
+# ==================================================
+# FREEZING
+# ==================================================
+
+def _block_arrays(df: pd.DataFrame):
+    for blk in df._mgr.blocks:
+        values = blk.values
+        # extension arrays (e.g. DatetimeArray) wrap a plain ndarray
+        values = getattr(values, "_ndarray", values)
+        if hasattr(values, "flags"):
+            yield values
+
+
+def freeze_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Marks every column buffer read-only in place.
+    In-place writes (df.loc[...] = x) then raise instead of silently
+    corrupting a frame shared through the cache; adding or replacing
+    whole columns on a shallow copy still works.
+    """
+    for values in _block_arrays(df):
+        values.flags.writeable = False
+    return df
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    try:
+        return int(df.memory_usage(index=True, deep=False).sum())
+    except Exception:
+        return 0
+
+
+# ==================================================
+# CACHE
+# ==================================================
+
+class FrameCache:
+    """
+    Thread-safe LRU cache bounded by entry count and total bytes.
+
+    - put() freezes the frame and stores it without copying
+    - get() returns a shallow view (own column index / attrs, shared
+      read-only buffers), or None when missing or stale (older than
+      `ttl`, or rejected by the `fresh(stored_at)` predicate)
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (ts, df, nbytes)
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evictions = 0
+
+    def _drop(self, key) -> None:
+        _, _, nbytes = self._entries.pop(key)
+        self._bytes -= nbytes
+
+    def get(self, key: Hashable, ttl: Optional[float] = None, fresh=None) -> Optional[pd.DataFrame]:
+        entry = self.get_entry(key, ttl, fresh)
+        if entry is None:
+            return None
+        return entry[1]
+
+    def get_entry(self, key: Hashable, ttl: Optional[float] = None, fresh=None):
+        """
+        Returns (stored_at, view) or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            ts, df, _ = entry
+            stale = ttl is not None and (time.time() - ts) >= ttl
+            if stale or (fresh is not None and not fresh(ts)):
+                self._drop(key)
+                self._expired += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+        return ts, df.copy(deep=False)
+
+    def peek(self, key: Hashable):
+        """
+        (stored_at, view) regardless of age, without touching LRU order,
+        counters or expiry. None when missing.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            ts, df, _ = entry
+        return ts, df.copy(deep=False)
+
+    def put(self, key: Hashable, df: pd.DataFrame, ts: Optional[float] = None) -> pd.DataFrame:
+        """
+        Stores `df` (frozen in place, not copied) and returns a view of it.
+        Frames larger than the whole byte budget are not cached.
+        """
+        freeze_frame(df)
+        nbytes = frame_nbytes(df)
+
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+
+            if nbytes <= self.max_bytes:
+                self._entries[key] = (time.time() if ts is None else ts, df, nbytes)
+                self._bytes += nbytes
+
+                while self._entries and (
+                    len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+                ):
+                    oldest = next(iter(self._entries))
+                    self._drop(oldest)
+                    self._evictions += 1
+
+        return df.copy(deep=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "expired": self._expired,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
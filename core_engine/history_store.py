@@ -0,0 +1,916 @@
+# core_engine/history_store.py
+# PREDICTION HISTORY STORE (SQLITE, INDEXED BY SYMBOL / DATE / MODE / EVALUATED)
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# ==================================================
+# CONFIG
+# ==================================================
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HISTORY_DB_PATH = os.getenv("SEESTOX_HISTORY_DB") or os.path.join(BASE_DIR, "cache", "prediction_history.sqlite3")
+
+logger = logging.getLogger("core_engine.history_store")
+
+# the full record stays JSON; the columns are only what we filter on
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS predictions (
+        row_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        id TEXT,
+        symbol TEXT,
+        symbol_key TEXT,
+        date TEXT,
+        mode TEXT,
+        evaluated INTEGER NOT NULL DEFAULT 0,
+        has_range INTEGER NOT NULL DEFAULT 0,
+        result TEXT,
+        record TEXT NOT NULL,
+        dedupe_key TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_predictions_id ON predictions(id)",
+    "CREATE INDEX IF NOT EXISTS idx_predictions_symbol ON predictions(symbol, mode, evaluated)",
+    "CREATE INDEX IF NOT EXISTS idx_predictions_date ON predictions(date)",
+    "CREATE INDEX IF NOT EXISTS idx_predictions_mode ON predictions(mode)",
+    "CREATE INDEX IF NOT EXISTS idx_predictions_evaluated ON predictions(evaluated, has_range)",
+    # rolling window of outcomes: newest evaluated rows per symbol, read
+    # straight off the index (covering) with LIMIT
+    "CREATE INDEX IF NOT EXISTS idx_predictions_recent ON predictions(symbol, evaluated, row_id, result)",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+    # per-(symbol, mode, result) counters of evaluated ranged predictions,
+    # kept exact by triggers on every insert / update / delete
+    """
+    CREATE TABLE IF NOT EXISTS symbol_stats (
+        symbol TEXT NOT NULL,
+        mode TEXT NOT NULL,
+        result TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (symbol, mode, result)
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stats_insert AFTER INSERT ON predictions
+    WHEN NEW.evaluated = 1 AND NEW.has_range = 1 AND NEW.symbol IS NOT NULL
+    BEGIN
+        INSERT INTO symbol_stats(symbol, mode, result, count)
+        VALUES (NEW.symbol, IFNULL(NEW.mode, ''), IFNULL(NEW.result, ''), 1)
+        ON CONFLICT(symbol, mode, result) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stats_update_old AFTER UPDATE ON predictions
+    WHEN OLD.evaluated = 1 AND OLD.has_range = 1 AND OLD.symbol IS NOT NULL
+    BEGIN
+        UPDATE symbol_stats SET count = count - 1
+        WHERE symbol = OLD.symbol AND mode = IFNULL(OLD.mode, '') AND result = IFNULL(OLD.result, '');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stats_update_new AFTER UPDATE ON predictions
+    WHEN NEW.evaluated = 1 AND NEW.has_range = 1 AND NEW.symbol IS NOT NULL
+    BEGIN
+        INSERT INTO symbol_stats(symbol, mode, result, count)
+        VALUES (NEW.symbol, IFNULL(NEW.mode, ''), IFNULL(NEW.result, ''), 1)
+        ON CONFLICT(symbol, mode, result) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stats_delete AFTER DELETE ON predictions
+    WHEN OLD.evaluated = 1 AND OLD.has_range = 1 AND OLD.symbol IS NOT NULL
+    BEGIN
+        UPDATE symbol_stats SET count = count - 1
+        WHERE symbol = OLD.symbol AND mode = IFNULL(OLD.mode, '') AND result = IFNULL(OLD.result, '');
+    END
+    """,
+    # evaluated_version: bumped on every write that touches an evaluated
+    # row, so derived views of evaluated history (the ML column export)
+    # know when to rebuild
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_evaluated_insert AFTER INSERT ON predictions
+    WHEN NEW.evaluated = 1
+    BEGIN
+        UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'evaluated_version';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_evaluated_update AFTER UPDATE ON predictions
+    WHEN OLD.evaluated = 1 OR NEW.evaluated = 1
+    BEGIN
+        UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'evaluated_version';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_evaluated_delete AFTER DELETE ON predictions
+    WHEN OLD.evaluated = 1
+    BEGIN
+        UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'evaluated_version';
+    END
+    """,
+    # cold partitions: evaluated rows of closed months, one zlib-compressed
+    # JSON segment per (month, symbol), written once and never updated
+    """
+    CREATE TABLE IF NOT EXISTS segments (
+        segment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        month TEXT NOT NULL,
+        symbol TEXT,
+        row_count INTEGER NOT NULL,
+        first_row_id INTEGER NOT NULL,
+        last_row_id INTEGER NOT NULL,
+        created_at TEXT NOT NULL,
+        payload BLOB NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_segments_month ON segments(month, symbol)",
+    "CREATE INDEX IF NOT EXISTS idx_segments_symbol ON segments(symbol, last_row_id)",
+    # row_id -> segment, so archived rows are never re-inserted as new
+    """
+    CREATE TABLE IF NOT EXISTS archived_rows (
+        row_id INTEGER PRIMARY KEY,
+        id TEXT,
+        segment_id INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_archived_id ON archived_rows(id)",
+)
+
+# bump when symbol_stats needs rebuilding from the predictions table
+_STATS_VERSION = "1"
+
+_INSERT_SQL = """
+    INSERT INTO predictions(id, symbol, symbol_key, date, mode, evaluated, has_range, result, dedupe_key, record)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# returns no row when a pending row already holds the dedupe key
+_UPSERT_PENDING_SQL = _INSERT_SQL + """
+    ON CONFLICT(dedupe_key) WHERE evaluated = 0 AND dedupe_key IS NOT NULL DO NOTHING
+    RETURNING row_id
+"""
+
+# full-history saves: insert, or rewrite a hot row whose JSON changed;
+# archived row_ids are immutable and skipped
+_SAVE_SQL = """
+    INSERT INTO predictions(row_id, id, symbol, symbol_key, date, mode, evaluated, has_range, result, dedupe_key, record)
+    SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
+    WHERE NOT EXISTS (SELECT 1 FROM archived_rows WHERE row_id = ?)
+    ON CONFLICT(row_id) DO UPDATE SET
+        id = excluded.id, symbol = excluded.symbol, symbol_key = COALESCE(excluded.symbol_key, symbol_key),
+        date = excluded.date, mode = excluded.mode, evaluated = excluded.evaluated,
+        has_range = excluded.has_range, result = excluded.result, dedupe_key = excluded.dedupe_key,
+        record = excluded.record
+    WHERE record != excluded.record
+"""
+
+# record fields a dedupe key may use ("date" is the record_date)
+DEDUPE_FIELDS = ("symbol", "date", "mode", "symbol_key")
+
+# at most one pending row per dedupe key; created by migrate_dedupe()
+_PENDING_DEDUPE_INDEX = "idx_predictions_dedupe_pending"
+_PENDING_DEDUPE_SQL = f"""
+    CREATE UNIQUE INDEX IF NOT EXISTS {_PENDING_DEDUPE_INDEX} ON predictions(dedupe_key)
+    WHERE evaluated = 0 AND dedupe_key IS NOT NULL
+"""
+
+
+# ==================================================
+# RECORD HELPERS
+# ==================================================
+
+def has_expected_range(record: dict) -> bool:
+    expected = record.get("expected_range")
+    return isinstance(expected, dict) and expected.get("low") is not None and expected.get("high") is not None
+
+
+def record_date(record: dict) -> Optional[str]:
+    """
+    YYYY-MM-DD of a record: `date`, else legacy `timestamp` / `created_on`.
+    """
+    for key in ("date", "timestamp", "created_on"):
+        value = record.get(key)
+        if isinstance(value, str) and len(value) >= 10:
+            return value[:10]
+    return None
+
+
+def _columns(record: dict, symbol_key: Optional[str] = None) -> Tuple:
+    # symbol_key: the {symbol: [records]} key of the old dict-format file
+    return (
+        str(record["id"]) if record.get("id") else None,
+        record.get("symbol"),
+        symbol_key,
+        record_date(record),
+        record.get("mode"),
+        1 if record.get("evaluated") is True else 0,
+        1 if has_expected_range(record) else 0,
+        record.get("result"),
+    )
+
+
+def _dumps(record: dict) -> str:
+    return json.dumps(record, default=str)
+
+
+def dedupe_key(record: dict, fields: Tuple[str, ...], symbol_key: Optional[str] = None) -> Optional[str]:
+    """
+    Upsert key of a record for the configured fields, e.g.
+    ("symbol", "date", "mode") -> "TCS|2026-01-05|USER". None (never
+    deduplicated) when the key is off or a field is missing.
+    """
+    if not fields:
+        return None
+    values = []
+    for field in fields:
+        if field == "date":
+            value = record_date(record)
+        elif field == "symbol_key":
+            value = record.get("symbol") or symbol_key
+        else:
+            value = record.get(field)
+        if value is None or value == "":
+            return None
+        values.append(str(value))
+    return "|".join(values)
+
+
+def merge_refresh(existing: dict, refreshed: dict) -> dict:
+    """
+    Upsert of a same-key prediction: the refreshed fields win, the first
+    record's identity (id, created_on) is kept.
+    """
+    merged = {**existing, **refreshed}
+    for key in ("id", "created_on"):
+        if existing.get(key):
+            merged[key] = existing[key]
+    merged["updated_on"] = refreshed.get("created_on") or existing.get("updated_on")
+    merged["refresh_count"] = int(existing.get("refresh_count") or 0) + 1
+    return merged
+
+
+def record_month(record: dict) -> Optional[str]:
+    day = record_date(record)
+    return day[:7] if day else None
+
+
+def _month_bounds(date_from: Optional[str], date_to: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    return (date_from[:7] if date_from else None, date_to[:7] if date_to else None)
+
+
+def _encode_segment(rows: List[Tuple[int, Optional[str], str]]) -> bytes:
+    # rows carry the stored JSON text, so the record is not re-serialised
+    body = ",".join(f"[{row_id},{json.dumps(symbol_key)},{raw}]" for row_id, symbol_key, raw in rows)
+    return zlib.compress(f"[{body}]".encode("utf-8"), 6)
+
+
+def _decode_segment(payload: bytes, object_pairs_hook=None) -> List[Tuple[int, Optional[str], dict]]:
+    rows = json.loads(zlib.decompress(payload), object_pairs_hook=object_pairs_hook)
+    return [(row_id, symbol_key, record) for row_id, symbol_key, record in rows]
+
+
+# ==================================================
+# STORE
+# ==================================================
+
+class HistoryStore:
+    """
+    One row per prediction; the record itself is kept verbatim as JSON.
+
+    - appends and single-record updates touch one row (no full rewrite)
+    - per-symbol stats and pending scans are answered from indexes
+    - row order (row_id) is insertion order, matching the old list file
+    - `compact` moves evaluated rows of closed months into compressed,
+      read-only segments; date-range reads only open the months asked for
+    """
+
+    def __init__(self, path: str = HISTORY_DB_PATH, dedupe_fields: Iterable[str] = ()):
+        self.path = path
+        self.dedupe_fields = tuple(dedupe_fields)
+        unknown = set(self.dedupe_fields) - set(DEDUPE_FIELDS)
+        if unknown:
+            raise ValueError(f"Unsupported dedupe fields: {sorted(unknown)}")
+        self._local = threading.local()
+        self._version_conn = None
+        self._version_pid = None
+        self._version_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            self._migrate_schema(conn)
+            conn.execute("INSERT OR IGNORE INTO meta(key, value) VALUES ('evaluated_version', '0')")
+            conn.execute("INSERT OR IGNORE INTO meta(key, value) VALUES ('created_at', ?)", (datetime.now().isoformat(),))
+        if self.get_meta("stats_version") != _STATS_VERSION:
+            self.rebuild_stats()
+        # the table is only ever re-keyed by migrate_dedupe(); a process
+        # configured with another key inserts without deduplicating
+        self.dedupe_active = self._dedupe_migrated()
+        if not self.dedupe_active:
+            logger.warning(
+                "History dedupe key %s is not migrated in %s (table key: %s); appending without dedupe. "
+                "Run scripts/dedupe_prediction_history.py to switch.",
+                ",".join(self.dedupe_fields),
+                path,
+                self.get_meta("dedupe_fields") or "none",
+            )
+
+    def _dedupe_migrated(self) -> bool:
+        if not self.dedupe_fields:
+            return True
+        if self.get_meta("dedupe_fields") != ",".join(self.dedupe_fields):
+            return False
+        return self._conn().execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (_PENDING_DEDUPE_INDEX,)
+        ).fetchone() is not None
+
+    @property
+    def _key_fields(self) -> Tuple[str, ...]:
+        return self.dedupe_fields if self.dedupe_active else ()
+
+    @staticmethod
+    def _migrate_schema(conn) -> None:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(predictions)")}
+        if "dedupe_key" not in columns:
+            conn.execute("ALTER TABLE predictions ADD COLUMN dedupe_key TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_predictions_dedupe ON predictions(dedupe_key, evaluated)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ---------------- meta ---------------- #
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self._conn().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO meta(key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value),
+            )
+
+    def data_version(self) -> int:
+        """
+        Changes whenever any connection (any thread or process) commits.
+        Read on a dedicated connection that never writes, so its own
+        commits can't be missed.
+        """
+        with self._version_lock:
+            if self._version_conn is None or self._version_pid != os.getpid():
+                self._version_conn = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False)
+                self._version_pid = os.getpid()
+            return self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def evaluated_version(self) -> int:
+        """
+        Persistent counter of changes to evaluated rows (see triggers).
+        """
+        return int(self.get_meta("evaluated_version") or 0)
+
+    def count(self) -> int:
+        conn = self._conn()
+        hot = conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+        return hot + conn.execute("SELECT COUNT(*) FROM archived_rows").fetchone()[0]
+
+    # ---------------- writes ---------------- #
+    def _row(self, record: dict, symbol_key: Optional[str]) -> Tuple:
+        return (
+            *_columns(record, symbol_key),
+            dedupe_key(record, self._key_fields, symbol_key),
+            _dumps(record),
+        )
+
+    def insert(self, record: dict, symbol_key: Optional[str] = None) -> int:
+        conn = self._conn()
+        with conn:
+            cursor = conn.execute(_INSERT_SQL, self._row(record, symbol_key))
+        return cursor.lastrowid
+
+    def insert_many(self, items: Iterable[Tuple[dict, Optional[str]]]) -> int:
+        """
+        items: (record, symbol_key). One transaction.
+        """
+        rows = [self._row(record, key) for record, key in items]
+        conn = self._conn()
+        with conn:
+            conn.executemany(_INSERT_SQL, rows)
+        return len(rows)
+
+    def upsert_many(self, records: Iterable[dict]) -> Dict[str, int]:
+        """
+        Inserts records, except that a record whose dedupe key matches a
+        pending (not yet evaluated) row refreshes that row in place
+        (merge_refresh). Evaluated rows are never overwritten. One
+        transaction; later records in the batch see earlier ones.
+        Plain inserts until migrate_dedupe() has run for this key.
+        """
+        conn = self._conn()
+        inserted = updated = 0
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for record in records:
+                row = self._row(record, None)
+                if row[-2] is None:
+                    conn.execute(_INSERT_SQL, row)
+                    inserted += 1
+                    continue
+                # the pending-row unique index arbitrates; only a conflict
+                # reads the existing record back for the merge
+                if conn.execute(_UPSERT_PENDING_SQL, row).fetchone() is not None:
+                    inserted += 1
+                    continue
+                row_id, symbol_key, raw = conn.execute(
+                    "SELECT row_id, symbol_key, record FROM predictions WHERE dedupe_key = ? AND evaluated = 0",
+                    (row[-2],),
+                ).fetchone()
+                self._write_row(conn, row_id, merge_refresh(json.loads(raw), record), symbol_key)
+                updated += 1
+        return {"inserted": inserted, "updated": updated}
+
+    def update_fields(self, prediction_id: str, fields: Dict) -> bool:
+        """
+        Merges `fields` into the record with this `id` (first match, as
+        the list scan did). Returns False when no record has the id.
+        """
+        return self.update_many([{"prediction_id": prediction_id, "fields": fields}]) > 0
+
+    def update_many(self, updates: List[Dict]) -> int:
+        """
+        updates: {"row_id" and/or "prediction_id", "fields": {...}}.
+        Merged into the matching records in one transaction.
+        Returns the number of records updated.
+        """
+        conn = self._conn()
+        applied = 0
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for update in updates:
+                row = None
+                if update.get("row_id") is not None:
+                    row = conn.execute(
+                        "SELECT row_id, symbol_key, record FROM predictions WHERE row_id = ?",
+                        (int(update["row_id"]),),
+                    ).fetchone()
+                if row is None and update.get("prediction_id"):
+                    row = conn.execute(
+                        "SELECT row_id, symbol_key, record FROM predictions WHERE id = ? ORDER BY row_id LIMIT 1",
+                        (str(update["prediction_id"]),),
+                    ).fetchone()
+                if row is None:
+                    # unknown, or archived into a (read-only) segment
+                    continue
+                row_id, symbol_key, raw = row
+                record = json.loads(raw)
+                record.update(update["fields"])
+                self._write_row(conn, row_id, record, symbol_key)
+                applied += 1
+        return applied
+
+    def save_records(self, records: List[Tuple[Optional[int], dict, Optional[str]]]) -> Dict[str, int]:
+        """
+        records: (row_id or None, record, symbol_key). Rows whose JSON is
+        unchanged are skipped; row_id None is inserted. Archived rows are
+        immutable and left as they are. One transaction, one keyed
+        statement per record (no read of the stored history).
+        """
+        conn = self._conn()
+        written = inserted = 0
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            before = conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+            for row_id, record, symbol_key in records:
+                if row_id is None:
+                    conn.execute(_INSERT_SQL, self._row(record, symbol_key))
+                    inserted += 1
+                else:
+                    written += conn.execute(_SAVE_SQL, (row_id, *self._row(record, symbol_key), row_id)).rowcount
+            # an upsert counts 1 either way; new rows show up in the count
+            added = conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0] - before - inserted
+        return {"updated": written - added, "inserted": inserted + added}
+
+    def _write_row(self, conn, row_id: int, record: dict, symbol_key: Optional[str]) -> None:
+        conn.execute(
+            """
+            UPDATE predictions
+            SET id = ?, symbol = ?, symbol_key = COALESCE(?, symbol_key), date = ?, mode = ?, evaluated = ?,
+                has_range = ?, result = ?, dedupe_key = ?, record = ?
+            WHERE row_id = ?
+            """,
+            (*self._row(record, symbol_key), row_id),
+        )
+
+    # ---------------- dedupe ---------------- #
+    def migrate_dedupe(self, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Switches the table to this store's dedupe fields, in one
+        transaction: recomputes every hot row's key, collapses rows that
+        now share one (_collapse) and puts the pending-row unique index in
+        place. Re-running it collapses again. Explicit (scripts/dedupe_prediction_history.py),
+        so processes configured with different keys never re-key the table
+        back and forth. dry_run rolls everything back.
+        """
+        conn = self._conn()
+        fields = ",".join(self.dedupe_fields)
+        was_active = self.dedupe_active
+        self.dedupe_active = True  # rows rewritten below carry the new key
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(f"DROP INDEX IF EXISTS {_PENDING_DEDUPE_INDEX}")
+            rows = conn.execute("SELECT row_id, symbol_key, record FROM predictions").fetchall()
+            conn.executemany(
+                "UPDATE predictions SET dedupe_key = ? WHERE row_id = ?",
+                [
+                    (dedupe_key(json.loads(raw), self.dedupe_fields, symbol_key), row_id)
+                    for row_id, symbol_key, raw in rows
+                ],
+            )
+            result = self._collapse(conn, dry_run)
+            if self.dedupe_fields and not dry_run:
+                conn.execute(_PENDING_DEDUPE_SQL)
+            conn.execute(
+                "INSERT INTO meta(key, value) VALUES ('dedupe_fields', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (fields,),
+            )
+        except BaseException:
+            conn.rollback()
+            self.dedupe_active = was_active
+            raise
+        if dry_run:
+            conn.rollback()
+            self.dedupe_active = was_active
+            return result
+        conn.commit()
+        logger.info("History dedupe key set to %s", fields or "none")
+        return result
+
+    def _collapse(self, conn, dry_run: bool) -> Dict[str, int]:
+        """
+        Folds hot rows sharing a dedupe key into one:
+        - if any was evaluated, the newest evaluated row is kept as is
+        - otherwise the first row is kept, refreshed with the later ones
+        Archived segments are read-only and not touched.
+        """
+        groups = removed = 0
+        keys = conn.execute(
+            """
+            SELECT dedupe_key FROM predictions
+            WHERE dedupe_key IS NOT NULL
+            GROUP BY dedupe_key HAVING COUNT(*) > 1
+            """
+        ).fetchall()
+        for (key,) in keys:
+            rows = conn.execute(
+                "SELECT row_id, symbol_key, evaluated, record FROM predictions WHERE dedupe_key = ? ORDER BY row_id",
+                (key,),
+            ).fetchall()
+            evaluated = [row for row in rows if row[2]]
+            keep = evaluated[-1] if evaluated else rows[0]
+            drop = [row[0] for row in rows if row[0] != keep[0]]
+            groups += 1
+            removed += len(drop)
+            if dry_run:
+                continue
+            if not evaluated:
+                merged = json.loads(rows[0][3])
+                for row in rows[1:]:
+                    merged = merge_refresh(merged, json.loads(row[3]))
+                self._write_row(conn, keep[0], merged, keep[1])
+            conn.executemany("DELETE FROM predictions WHERE row_id = ?", [(row_id,) for row_id in drop])
+        if removed and not dry_run:
+            logger.info("Collapsed %s duplicate predictions in %s groups", removed, groups)
+        return {"groups": groups, "removed": removed}
+
+    # ---------------- reads ---------------- #
+    def fetch(
+        self,
+        symbol: Optional[str] = None,
+        mode: Optional[str] = None,
+        evaluated: Optional[bool] = None,
+        has_range: Optional[bool] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        object_pairs_hook=None,
+    ) -> List[Tuple[int, Optional[str], dict]]:
+        """
+        [(row_id, symbol_key, record)] in insertion order, filtered on the
+        indexed columns. date_from / date_to (YYYY-MM-DD, inclusive) drop
+        undated rows and limit the segments opened to those months.
+        object_pairs_hook is handed to json.loads for the records.
+        """
+        hot = self._fetch_hot(symbol, mode, evaluated, has_range, date_from, date_to, object_pairs_hook)
+        if evaluated is False:
+            return hot
+        cold = self._fetch_cold(symbol, mode, has_range, date_from, date_to, object_pairs_hook)
+        if not cold:
+            return hot
+        return sorted(hot + cold, key=lambda row: row[0])
+
+    def _fetch_hot(self, symbol, mode, evaluated, has_range, date_from, date_to, object_pairs_hook=None) -> List[Tuple[int, Optional[str], dict]]:
+        clauses, params = [], []
+        if symbol is not None:
+            clauses.append("symbol = ?")
+            params.append(symbol)
+        if mode is not None:
+            clauses.append("mode = ?")
+            params.append(mode)
+        if evaluated is not None:
+            clauses.append("evaluated = ?")
+            params.append(1 if evaluated else 0)
+        if has_range is not None:
+            clauses.append("has_range = ?")
+            params.append(1 if has_range else 0)
+        if date_from:
+            clauses.append("date >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append("date <= ?")
+            params.append(date_to)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._conn().execute(
+            f"SELECT row_id, symbol_key, record FROM predictions {where} ORDER BY row_id",
+            params,
+        ).fetchall()
+        return [
+            (row_id, symbol_key, json.loads(raw, object_pairs_hook=object_pairs_hook))
+            for row_id, symbol_key, raw in rows
+        ]
+
+    def raw_rows(self) -> List[Tuple[int, Optional[str], str]]:
+        """
+        [(row_id, symbol_key, record JSON)] of the hot table in insertion
+        order, unparsed, so callers can skip rows they already parsed.
+        """
+        return self._conn().execute("SELECT row_id, symbol_key, record FROM predictions ORDER BY row_id").fetchall()
+
+    def archived_rows(self, object_pairs_hook=None) -> List[Tuple[int, Optional[str], dict]]:
+        """
+        Every archived row, parsed. Only changes when compact() adds
+        segments (see segments_version).
+        """
+        return sorted(self._fetch_cold(None, None, None, None, None, object_pairs_hook), key=lambda row: row[0])
+
+    def segments_version(self) -> Tuple[int, int]:
+        row = self._conn().execute("SELECT COUNT(*), IFNULL(MAX(segment_id), 0) FROM segments").fetchone()
+        return (row[0], row[1])
+
+    def _segment_payloads(
+        self,
+        symbol: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ) -> List[bytes]:
+        month_from, month_to = _month_bounds(date_from, date_to)
+        clauses, params = [], []
+        if symbol is not None:
+            clauses.append("symbol = ?")
+            params.append(symbol)
+        if month_from:
+            clauses.append("month >= ?")
+            params.append(month_from)
+        if month_to:
+            clauses.append("month <= ?")
+            params.append(month_to)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return [
+            payload
+            for (payload,) in self._conn().execute(f"SELECT payload FROM segments {where} ORDER BY segment_id", params)
+        ]
+
+    def _fetch_cold(self, symbol, mode, has_range, date_from, date_to, object_pairs_hook=None) -> List[Tuple[int, Optional[str], dict]]:
+        rows = []
+        for payload in self._segment_payloads(symbol, date_from, date_to):
+            for row_id, symbol_key, record in _decode_segment(payload, object_pairs_hook):
+                if mode is not None and record.get("mode") != mode:
+                    continue
+                if has_range is not None and has_expected_range(record) != has_range:
+                    continue
+                if date_from or date_to:
+                    day = record_date(record)
+                    if day is None or (date_from and day < date_from) or (date_to and day > date_to):
+                        continue
+                rows.append((row_id, symbol_key, record))
+        return rows
+
+    def result_counts(self, symbol: str, mode: Optional[str] = None) -> Dict[Optional[str], int]:
+        """
+        {result: count} over evaluated records with an expected range,
+        from the materialized counters (no history scan).
+        """
+        sql = "SELECT result, SUM(count) FROM symbol_stats WHERE symbol = ?"
+        params = [symbol]
+        if mode:
+            sql += " AND mode = ?"
+            params.append(mode)
+        sql += " GROUP BY result HAVING SUM(count) > 0"
+        return {result or None: int(count) for result, count in self._conn().execute(sql, params)}
+
+    def recent_results(self, symbol: str, limit: int) -> List[Optional[str]]:
+        """
+        Results of the newest `limit` evaluated records, oldest first.
+        """
+        rows = self._conn().execute(
+            """
+            SELECT result FROM predictions
+            WHERE symbol = ? AND evaluated = 1
+            ORDER BY row_id DESC LIMIT ?
+            """,
+            (symbol, int(limit)),
+        ).fetchall()
+        results = [result for (result,) in reversed(rows)]
+        if len(results) >= limit:
+            return results
+
+        # older outcomes live in segments: open the newest ones until the
+        # window is full
+        need = int(limit) - len(results)
+        older: List[Tuple[int, Optional[str]]] = []
+        segments = self._conn().execute(
+            "SELECT last_row_id, payload FROM segments WHERE symbol = ? ORDER BY last_row_id DESC",
+            (symbol,),
+        )
+        for last_row_id, payload in segments:
+            if len(older) >= need and last_row_id < older[need - 1][0]:
+                break
+            older.extend((row_id, record.get("result")) for row_id, _, record in _decode_segment(payload))
+            older.sort(key=lambda item: item[0], reverse=True)
+        return [result for _, result in reversed(older[:need])] + results
+
+    def rebuild_stats(self) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM symbol_stats")
+            conn.execute(
+                """
+                INSERT INTO symbol_stats(symbol, mode, result, count)
+                SELECT symbol, IFNULL(mode, ''), IFNULL(result, ''), COUNT(*)
+                FROM predictions
+                WHERE evaluated = 1 AND has_range = 1 AND symbol IS NOT NULL
+                GROUP BY symbol, IFNULL(mode, ''), IFNULL(result, '')
+                """
+            )
+            cold: Dict[Tuple[str, str, str], int] = {}
+            for (payload,) in conn.execute("SELECT payload FROM segments WHERE symbol IS NOT NULL"):
+                for _, _, record in _decode_segment(payload):
+                    if has_expected_range(record):
+                        key = (record["symbol"], record.get("mode") or "", record.get("result") or "")
+                        cold[key] = cold.get(key, 0) + 1
+            conn.executemany(
+                """
+                INSERT INTO symbol_stats(symbol, mode, result, count) VALUES (?, ?, ?, ?)
+                ON CONFLICT(symbol, mode, result) DO UPDATE SET count = count + excluded.count
+                """,
+                [(*key, count) for key, count in cold.items()],
+            )
+            conn.execute(
+                "INSERT INTO meta(key, value) VALUES ('stats_version', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (_STATS_VERSION,),
+            )
+
+    # ---------------- partitions ---------------- #
+    def compact(self, before_month: str) -> Dict[str, int]:
+        """
+        Moves evaluated rows dated before `before_month` (YYYY-MM) into one
+        compressed segment per (month, symbol). Pending and undated rows
+        stay in the hot table. Counters are unchanged (the delete trigger
+        is offset in the same transaction).
+        """
+        conn = self._conn()
+        moved = created = 0
+        now = datetime.now().isoformat()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            groups = conn.execute(
+                """
+                SELECT DISTINCT substr(date, 1, 7), symbol FROM predictions
+                WHERE evaluated = 1 AND date IS NOT NULL AND date < ?
+                """,
+                (f"{before_month}-01",),
+            ).fetchall()
+            for month, symbol in groups:
+                rows = conn.execute(
+                    """
+                    SELECT row_id, id, symbol_key, record FROM predictions
+                    WHERE evaluated = 1 AND substr(date, 1, 7) = ? AND symbol IS ?
+                    ORDER BY row_id
+                    """,
+                    (month, symbol),
+                ).fetchall()
+                if not rows:
+                    continue
+                cursor = conn.execute(
+                    """
+                    INSERT INTO segments(month, symbol, row_count, first_row_id, last_row_id, created_at, payload)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        month,
+                        symbol,
+                        len(rows),
+                        rows[0][0],
+                        rows[-1][0],
+                        now,
+                        _encode_segment([(row_id, symbol_key, raw) for row_id, _, symbol_key, raw in rows]),
+                    ),
+                )
+                segment_id = cursor.lastrowid
+                conn.executemany(
+                    "INSERT INTO archived_rows(row_id, id, segment_id) VALUES (?, ?, ?)",
+                    [(row_id, prediction_id, segment_id) for row_id, prediction_id, _, _ in rows],
+                )
+                # put back what trg_stats_delete takes off: archived rows still count
+                conn.execute(
+                    """
+                    INSERT INTO symbol_stats(symbol, mode, result, count)
+                    SELECT symbol, IFNULL(mode, ''), IFNULL(result, ''), COUNT(*)
+                    FROM predictions
+                    WHERE row_id IN (SELECT row_id FROM archived_rows WHERE segment_id = ?)
+                      AND has_range = 1 AND symbol IS NOT NULL
+                    GROUP BY symbol, IFNULL(mode, ''), IFNULL(result, '')
+                    ON CONFLICT(symbol, mode, result) DO UPDATE SET count = count + excluded.count
+                    """,
+                    (segment_id,),
+                )
+                conn.execute(
+                    "DELETE FROM predictions WHERE row_id IN (SELECT row_id FROM archived_rows WHERE segment_id = ?)",
+                    (segment_id,),
+                )
+                moved += len(rows)
+                created += 1
+        if moved:
+            logger.info("Archived %s prediction rows into %s segments (before %s)", moved, created, before_month)
+        return {"archived": moved, "segments": created}
+
+    def partitions(self) -> List[Dict]:
+        """
+        Per-month summary: hot rows and archived (segment) rows.
+        """
+        conn = self._conn()
+        months: Dict[str, Dict] = {}
+        for month, hot in conn.execute(
+            "SELECT substr(date, 1, 7), COUNT(*) FROM predictions WHERE date IS NOT NULL GROUP BY 1"
+        ):
+            months.setdefault(month, {"month": month, "hot": 0, "archived": 0, "segments": 0, "bytes": 0})["hot"] = hot
+        for month, rows, segments, size in conn.execute(
+            "SELECT month, SUM(row_count), COUNT(*), SUM(length(payload)) FROM segments GROUP BY month"
+        ):
+            entry = months.setdefault(month, {"month": month, "hot": 0, "archived": 0, "segments": 0, "bytes": 0})
+            entry.update({"archived": rows, "segments": segments, "bytes": size})
+        return [months[month] for month in sorted(months)]
+
+
+# ==================================================
+# MIGRATION
+# ==================================================
+
+def flatten_container(data) -> List[Tuple[dict, Optional[str]]]:
+    """
+    Old prediction_history.json (list, or {symbol: [records]}) ->
+    [(record, symbol_key)] in file order.
+    """
+    items: List[Tuple[dict, Optional[str]]] = []
+    if isinstance(data, list):
+        items = [(record, None) for record in data if isinstance(record, dict)]
+    elif isinstance(data, dict):
+        for symbol_key, records in data.items():
+            if not isinstance(records, list):
+                continue
+            for record in records:
+                if isinstance(record, dict):
+                    items.append((record, symbol_key))
+    return items
+
+
+def migrate_json_file(store: HistoryStore, json_path: str) -> int:
+    """
+    Imports a JSON history file into an (empty) store in one transaction.
+    """
+    with open(json_path, "r") as f:
+        data = json.load(f)
+    items = flatten_container(data)
+    cleaned = []
+    for record, symbol_key in items:
+        record = dict(record)
+        record.pop("_symbol_key", None)
+        cleaned.append((record, symbol_key))
+    count = store.insert_many(cleaned)
+    logger.info("Migrated %s prediction records from %s", count, json_path)
+    return count
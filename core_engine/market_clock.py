@@ -1,5 +1,4 @@
-from datetime import datetime, time
+# core_engine/market_clock.py
+# Kept for older imports; the IST trading calendar is the single source.
 
-def is_market_open():
-    now = datetime.now().time()
-    return time(9, 15) <= now <= time(15, 30)
+from core_engine.trading_calendar import is_market_open  # noqa: F401
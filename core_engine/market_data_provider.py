@@ -0,0 +1,307 @@
+# core_engine/market_data_provider.py
+# MARKET DATA PROVIDER (LIVE YAHOO / RECORD TO DISK / OFFLINE REPLAY)
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+from typing import Optional
+
+import yfinance as yf
+
+
+# ==================================================
+# CONFIG
+# ==================================================
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# live | record | replay
+MARKET_DATA_MODE = os.getenv("SEESTOX_MARKET_DATA_MODE", "live").strip().lower()
+MARKET_DATA_DIR = os.getenv("SEESTOX_MARKET_DATA_DIR") or os.path.join(BASE_DIR, "cache", "market_data")
+REPLAY_LATENCY_MS = float(os.getenv("SEESTOX_REPLAY_LATENCY_MS", "0"))
+
+# fast_info is a lazy object; these are the fields we read
+_FAST_INFO_FIELDS = ("last_price", "previous_close", "open", "day_high", "day_low", "last_volume")
+
+logger = logging.getLogger("core_engine.market_data_provider")
+
+
+class ReplayMiss(LookupError):
+    """Nothing was recorded for this request."""
+
+
+# ==================================================
+# LIVE
+# ==================================================
+
+class LiveProvider:
+    """
+    Straight to yfinance. Every engine goes through get_provider()
+    instead of importing yfinance, so the source can be swapped.
+    """
+
+    mode = "live"
+
+    def download(self, tickers, **kwargs):
+        return yf.download(tickers, **kwargs)
+
+    def ticker(self, symbol: str):
+        return yf.Ticker(symbol)
+
+
+# ==================================================
+# RECORDING STORE
+# ==================================================
+
+def _normalize(value):
+    if isinstance(value, (list, tuple, set)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in sorted(value.items())}
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+class RecordingStore:
+    """
+    One pickle per response, named by a hash of the exact request.
+    index.json also maps a "loose" key (call + symbols + the other request
+    arguments, with start / end reduced to "given") to the newest
+    recording so replays keep working after the calendar moves (download
+    start dates are derived from today), without serving a different
+    period or interval.
+
+    Recordings are trusted local files (pickle); never replay untrusted dirs.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        self._index = None
+
+    def _index_path(self) -> str:
+        return os.path.join(self.root, "index.json")
+
+    def _load_index(self) -> dict:
+        if self._index is None:
+            try:
+                with open(self._index_path(), "r", encoding="utf-8") as handle:
+                    self._index = json.load(handle)
+            except Exception:
+                self._index = {}
+        return self._index
+
+    @staticmethod
+    def _digest(key) -> str:
+        raw = json.dumps(_normalize(key), sort_keys=True)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def save(self, key, loose_key, value) -> None:
+        digest = self._digest(key)
+        path = os.path.join(self.root, f"{digest}.pkl")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        with self._lock:
+            try:
+                os.makedirs(self.root, exist_ok=True)
+                with open(tmp_path, "wb") as handle:
+                    pickle.dump(
+                        {"key": _normalize(key), "recorded_at": time.time(), "value": value},
+                        handle,
+                        protocol=pickle.HIGHEST_PROTOCOL,
+                    )
+                os.replace(tmp_path, path)
+
+                index = self._load_index()
+                index[self._digest(loose_key)] = digest
+                with open(self._index_path() + ".tmp", "w", encoding="utf-8") as handle:
+                    json.dump(index, handle)
+                os.replace(self._index_path() + ".tmp", self._index_path())
+            except Exception:
+                logger.warning("Failed to record market data: %s", key, exc_info=True)
+
+    def load(self, key, loose_key):
+        for digest in (self._digest(key), None):
+            if digest is None:
+                with self._lock:
+                    digest = self._load_index().get(self._digest(loose_key))
+                if digest is None:
+                    break
+            path = os.path.join(self.root, f"{digest}.pkl")
+            if os.path.exists(path):
+                with open(path, "rb") as handle:
+                    return pickle.load(handle)["value"]
+        raise ReplayMiss(f"No recording for {_normalize(key)}")
+
+
+# arguments that don't change the returned data, and date bounds that
+# move with the calendar (only their presence is part of a loose key)
+_DISPLAY_KWARGS = ("progress", "threads")
+_DATE_KWARGS = ("start", "end")
+
+
+def _loose_kwargs(kwargs: dict) -> dict:
+    loose = {k: v for k, v in kwargs.items() if k not in _DISPLAY_KWARGS + _DATE_KWARGS}
+    loose.update({k: "*" for k in _DATE_KWARGS if kwargs.get(k) is not None})
+    return loose
+
+
+def _download_keys(tickers, kwargs):
+    symbols = [tickers] if isinstance(tickers, str) else sorted(tickers)
+    return ("download", symbols, kwargs), ("download", symbols, _loose_kwargs(kwargs))
+
+
+def _history_keys(symbol: str, kwargs):
+    return ("history", symbol, kwargs), ("history", symbol, _loose_kwargs(kwargs))
+
+
+# ==================================================
+# RECORD
+# ==================================================
+
+class _RecordingTicker:
+    def __init__(self, symbol: str, live, store: RecordingStore):
+        self._symbol = symbol
+        self._live = live
+        self._store = store
+
+    def history(self, **kwargs):
+        value = self._live.history(**kwargs)
+        self._store.save(*_history_keys(self._symbol, kwargs), value)
+        return value
+
+    def __getattr__(self, name):
+        value = getattr(self._live, name)
+        if callable(value):
+            return value
+        if name == "fast_info":
+            value = {field: _safe_get(value, field) for field in _FAST_INFO_FIELDS}
+        self._store.save(("ticker", self._symbol, name), ("ticker", self._symbol, name), value)
+        return value
+
+
+def _safe_get(mapping, field):
+    try:
+        return mapping.get(field)
+    except Exception:
+        return None
+
+
+class RecordingProvider(LiveProvider):
+    """
+    Live Yahoo responses, each written to the recording store as it passes.
+    """
+
+    mode = "record"
+
+    def __init__(self, store: RecordingStore):
+        self.store = store
+
+    def download(self, tickers, **kwargs):
+        value = super().download(tickers, **kwargs)
+        key, loose_key = _download_keys(tickers, kwargs)
+        self.store.save(key, loose_key, value)
+        return value
+
+    def ticker(self, symbol: str):
+        return _RecordingTicker(symbol, super().ticker(symbol), self.store)
+
+
+# ==================================================
+# REPLAY
+# ==================================================
+
+class _ReplayTicker:
+    def __init__(self, symbol: str, provider: "ReplayProvider"):
+        self._symbol = symbol
+        self._provider = provider
+
+    def history(self, **kwargs):
+        return self._provider._serve(*_history_keys(self._symbol, kwargs))
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        try:
+            return self._provider._serve(("ticker", self._symbol, name), ("ticker", self._symbol, name))
+        except ReplayMiss as exc:
+            # getattr(ticker, name, default) callers expect AttributeError
+            raise AttributeError(str(exc)) from None
+
+
+class ReplayProvider:
+    """
+    Serves recorded responses with no network. `latency_ms` is slept on
+    every call to approximate Yahoo round-trips in benchmarks.
+    Unrecorded requests raise ReplayMiss (callers already treat Yahoo
+    failures as missing data).
+    """
+
+    mode = "replay"
+
+    def __init__(self, store: RecordingStore, latency_ms: float = 0.0):
+        self.store = store
+        self.latency_ms = max(0.0, float(latency_ms))
+
+    def _serve(self, key, loose_key):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        return self.store.load(key, loose_key)
+
+    def download(self, tickers, **kwargs):
+        key, loose_key = _download_keys(tickers, kwargs)
+        return self._serve(key, loose_key)
+
+    def ticker(self, symbol: str):
+        return _ReplayTicker(symbol, self)
+
+
+# ==================================================
+# ACCESSOR
+# ==================================================
+
+_PROVIDER = None
+_PROVIDER_LOCK = threading.Lock()
+
+
+def _build_provider(mode: str, root: str, latency_ms: float):
+    if mode == "record":
+        return RecordingProvider(RecordingStore(root))
+    if mode == "replay":
+        return ReplayProvider(RecordingStore(root), latency_ms=latency_ms)
+    if mode != "live":
+        logger.warning("Unknown SEESTOX_MARKET_DATA_MODE=%r, using live", mode)
+    return LiveProvider()
+
+
+def get_provider():
+    global _PROVIDER
+    if _PROVIDER is None:
+        with _PROVIDER_LOCK:
+            if _PROVIDER is None:
+                _PROVIDER = _build_provider(MARKET_DATA_MODE, MARKET_DATA_DIR, REPLAY_LATENCY_MS)
+                if _PROVIDER.mode != "live":
+                    logger.info("Market data provider: %s (%s)", _PROVIDER.mode, MARKET_DATA_DIR)
+    return _PROVIDER
+
+
+def set_provider(provider=None, mode: Optional[str] = None, root: Optional[str] = None, latency_ms: Optional[float] = None):
+    """
+    Swaps the process-wide provider (benchmarks, scripts).
+    Pass an instance, or a mode plus optional dir/latency.
+    """
+    global _PROVIDER
+    if provider is None:
+        provider = _build_provider(
+            (mode or MARKET_DATA_MODE).lower(),
+            root or MARKET_DATA_DIR,
+            REPLAY_LATENCY_MS if latency_ms is None else latency_ms,
+        )
+    with _PROVIDER_LOCK:
+        _PROVIDER = provider
+    return provider
@@ -1,4 +1,5 @@
 from .champion_selector import (
+    confidence_champion_version,
     load_confidence_champion,
     select_confidence_champion,
 )
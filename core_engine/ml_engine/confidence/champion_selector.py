@@ -22,6 +22,9 @@ FAILURE_TAGS = {"FAILURE", "UPPER_BREAK", "LOWER_BREAK"}
 
 logger = logging.getLogger("core_engine.ml_engine.confidence.champion_selector")
 
+# bumped whenever this process stores a new champion
+_GENERATION = 0
+
 
 # ===============================
 # INTERNAL HELPERS
@@ -76,6 +79,10 @@ def _lock_active(updated_on: str) -> bool:
 # LOAD CHAMPION
 # ===============================
 
+def confidence_champion_version() -> int:
+    return _GENERATION
+
+
 def load_confidence_champion(symbol: str) -> dict:
     history, _, _ = load_history_any()
 
@@ -217,6 +224,7 @@ def select_confidence_champion(symbol: str) -> dict:
     )
 
     # ---------- STORE (LOCKED) ----------
+    global _GENERATION
     if existing_index is not None:
         history[existing_index]["confidence_champion"] = champion
     else:
@@ -225,5 +233,6 @@ def select_confidence_champion(symbol: str) -> dict:
             "confidence_champion": champion,
         })
     save_history_any(history, container_type, container_data)
+    _GENERATION += 1
 
     return champion
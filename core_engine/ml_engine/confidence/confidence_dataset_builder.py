@@ -1,15 +1,10 @@
 # core_engine/ml_engine/confidence/confidence_dataset_builder.py
 # ER-7.1 — CONFIDENCE DATASET BUILDER
 
-import json
-import os
+import numpy as np
 
-# --------------------------------------------------
-# CONFIG
-# --------------------------------------------------
-
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-HISTORY_FILE = os.path.join(BASE_DIR, "prediction_history.json")
+from core_engine.ml_engine.history_columns import encode, load_columns
+from core_engine.prediction_history import history_snapshot
 
 
 # --------------------------------------------------
@@ -35,20 +30,16 @@ RISK_MAP = {
     "HIGH": 1,
 }
 
+RESULT_LABELS = ["INSIDE_RANGE", "UPPER_BREAK", "LOWER_BREAK"]
+
 
 # --------------------------------------------------
 # LOAD HISTORY
 # --------------------------------------------------
 
 def _load_history():
-    if not os.path.exists(HISTORY_FILE):
-        return []
-
-    try:
-        with open(HISTORY_FILE, "r") as f:
-            return json.load(f)
-    except Exception:
-        return []
+    # shared read-only snapshot (parsed once per history version)
+    return history_snapshot().records
 
 
 # --------------------------------------------------
@@ -62,57 +53,33 @@ def build_confidence_dataset(symbol: str | None = None):
     Output:
       X → list of feature vectors
       y → list of labels (1=correct, 0=wrong)
-    """
-
-    history = _load_history()
-
-    X = []
-    y = []
-
-    for record in history:
-
-        # -------------------------------
-        # FILTERS
-        # -------------------------------
-        if record.get("evaluated") is not True:
-            continue
 
-        if symbol and record.get("symbol") != symbol:
-            continue
-
-        context = record.get("context", {})
-        expected = record.get("expected_range")
-
-        if not isinstance(expected, dict):
-            continue
-
-        result = record.get("result")
-        if result not in ("INSIDE_RANGE", "UPPER_BREAK", "LOWER_BREAK"):
-            continue
-
-        # -------------------------------
-        # LABEL
-        # -------------------------------
-        hit = 1 if result == "INSIDE_RANGE" else 0
-
-        # -------------------------------
-        # FEATURES
-        # -------------------------------
-        trend = TREND_MAP.get(context.get("trend"), 0)
-        sentiment = SENTIMENT_MAP.get(context.get("sentiment"), 0)
-        risk = RISK_MAP.get(context.get("risk"), 0)
-
-        avg_error = float(record.get("range_error") or 0.0)
-        ml_used = 1 if context.get("ml_applied") else 0
-
-        X.append([
-            avg_error,
-            trend,
-            sentiment,
-            risk,
-            ml_used,
-        ])
-
-        y.append(hit)
+    Built from the columnar export of evaluated history (vectorised).
+    """
 
-    return X, y
+    columns = load_columns()
+
+    # -------------------------------
+    # FILTERS
+    # -------------------------------
+    mask = columns["has_range_dict"] & np.isin(columns["result"], RESULT_LABELS)
+    if symbol:
+        mask &= columns["symbol"] == symbol
+
+    # -------------------------------
+    # LABEL
+    # -------------------------------
+    y = (columns["result"][mask] == "INSIDE_RANGE").astype(int)
+
+    # -------------------------------
+    # FEATURES
+    # -------------------------------
+    X = np.column_stack([
+        columns["range_error"][mask],
+        encode(columns["ctx_trend"][mask], TREND_MAP),
+        encode(columns["ctx_sentiment"][mask], SENTIMENT_MAP),
+        encode(columns["ctx_risk"][mask], RISK_MAP),
+        columns["ml_applied"][mask].astype(np.float64),
+    ])
+
+    return X.tolist(), y.tolist()
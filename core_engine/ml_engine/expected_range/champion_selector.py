@@ -228,6 +228,17 @@ def select_champion(scorecard: Dict) -> Dict:
 # LOAD CHAMPION
 # ==================================================
 
+def champion_version():
+    """
+    (mtime_ns, size) of the champion file; None when no champion exists.
+    """
+    try:
+        stat = os.stat(CHAMPION_FILE)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
 def load_champion() -> Dict:
     if not os.path.exists(CHAMPION_FILE):
         return {
@@ -4,6 +4,8 @@
 from typing import List, Dict, Tuple
 import numpy as np
 
+from core_engine.price_series import as_price_series
+
 
 # ===============================
 # ENCODING MAPS (RULE BASED)
@@ -118,10 +120,10 @@ def encode_single_features(df, trend, sentiment, risk, base_range):
     """
     Convert live stock state into feature vector
     Order MUST match training dataset
+    (df: PriceSeries from the analyzer, or a legacy DataFrame)
     """
 
-    close_value = df["Close"].iloc[-1]
-    close_price = float(close_value.iloc[0]) if hasattr(close_value, "iloc") else float(close_value)
+    close_price = as_price_series(df).last_close
 
     trend_enc = TREND_MAP.get(trend.get("trend"), 0)
     sentiment_enc = SENTIMENT_MAP.get(sentiment.get("overall"), 0)
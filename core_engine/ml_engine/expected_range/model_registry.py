@@ -13,6 +13,7 @@ from core_engine.ml_engine.expected_range.model_persistence import (
 
 _MODEL_CACHE: Optional[Dict] = None
 _META_CACHE: Optional[Dict] = None
+_GENERATION = 0  # bumped on every (re)load
 
 
 # ==================================================
@@ -20,10 +21,11 @@ _META_CACHE: Optional[Dict] = None
 # ==================================================
 
 def _ensure_loaded():
-    global _MODEL_CACHE, _META_CACHE
+    global _MODEL_CACHE, _META_CACHE, _GENERATION
 
     if _MODEL_CACHE is None:
         _MODEL_CACHE = load_all_models()
+        _GENERATION += 1
 
     if _META_CACHE is None:
         _META_CACHE = load_model_meta()
@@ -61,10 +63,11 @@ def refresh_registry() -> dict:
     """
     Force reload models + meta (after retraining).
     """
-    global _MODEL_CACHE, _META_CACHE
+    global _MODEL_CACHE, _META_CACHE, _GENERATION
 
     _MODEL_CACHE = load_all_models()
     _META_CACHE = load_model_meta()
+    _GENERATION += 1
 
     return {
         "status": "REFRESHED",
@@ -72,6 +75,13 @@ def refresh_registry() -> dict:
     }
 
 
+def registry_version() -> int:
+    """
+    Changes whenever the loaded models are replaced (0 = not loaded yet).
+    """
+    return _GENERATION
+
+
 # ==================================================
 # SIMPLE HEALTH CHECK
 # ==================================================
@@ -0,0 +1,299 @@
+# core_engine/ml_engine/history_columns.py
+# COLUMNAR EXPORT OF EVALUATED PREDICTION HISTORY (NPZ, FOR DATASET BUILDERS)
+
+import logging
+import os
+import threading
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from core_engine.history_store import record_date
+from core_engine.prediction_history import _history_store, history_backend, history_snapshot, load_history_range
+
+
+# ==================================================
+# CONFIG
+# ==================================================
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+HISTORY_COLUMNS_PATH = (
+    os.getenv("SEESTOX_HISTORY_COLUMNS")
+    or os.path.join(BASE_DIR, "cache", "prediction_history.columns.npz")
+)
+
+# bump when a projected field or its normalisation changes
+_PROJECTION_VERSION = "1"
+
+logger = logging.getLogger("core_engine.ml_engine.history_columns")
+
+# why a record is unusable for the expected-range dataset, in the order
+# the checks run (0 = usable)
+ER_SKIP_REASONS = (
+    "ok",
+    "missing_expected_range",
+    "missing_actual_close",
+    "invalid_low_high",
+    "missing_context_price",
+    "range_width_non_positive",
+)
+(
+    ER_OK,
+    ER_MISSING_EXPECTED_RANGE,
+    ER_MISSING_ACTUAL_CLOSE,
+    ER_INVALID_LOW_HIGH,
+    ER_MISSING_CONTEXT_PRICE,
+    ER_RANGE_WIDTH_NON_POSITIVE,
+) = range(len(ER_SKIP_REASONS))
+
+
+# ==================================================
+# RECORD NORMALISATION
+# ==================================================
+
+def resolve_expected_range(record: Dict) -> Dict | None:
+    expected = record.get("expected_range")
+    if isinstance(expected, dict) and expected.get("low") is not None and expected.get("high") is not None:
+        return expected
+
+    prediction = record.get("prediction")
+    if isinstance(prediction, dict) and prediction.get("low") is not None and prediction.get("high") is not None:
+        return prediction
+
+    nested = None
+    if isinstance(prediction, dict):
+        nested = prediction.get("expected_range")
+    if isinstance(nested, dict) and nested.get("low") is not None and nested.get("high") is not None:
+        return nested
+
+    return None
+
+
+def resolve_actual_close(record: Dict):
+    actual_close = record.get("actual_close")
+    if actual_close is None:
+        actual_close = record.get("close")
+    if actual_close is None:
+        actual_close = record.get("actual")
+    return actual_close
+
+
+def resolve_context(record: Dict) -> Dict:
+    context = record.get("context", {})
+    # copy: history records are shared (read-only) snapshot objects
+    context = dict(context) if isinstance(context, dict) else {}
+    for key in ("price", "atr", "trend", "sentiment", "risk", "risk_score", "volatility_regime"):
+        if context.get(key) is None and record.get(key) is not None:
+            context[key] = record.get(key)
+    return context
+
+
+def _risk_score(context: Dict) -> float:
+    risk_score_raw = context.get("risk_score", None)
+    if risk_score_raw is None:
+        risk_score = {"LOW": 0, "MEDIUM": 1, "HIGH": 2}.get(context.get("risk", "LOW"), 0)
+    else:
+        try:
+            risk_score = float(risk_score_raw)
+        except Exception:
+            risk_score = 0
+    return float(min(max(risk_score, 0), 2))
+
+
+def _label(value) -> str:
+    return "" if value is None else str(value)
+
+
+def _expected_range_fields(record: Dict) -> tuple:
+    """
+    (skip, low, high, actual_close, price, atr, risk_score, trend,
+    sentiment, volatility_regime) with the expected-range builder's rules.
+    """
+    nan = float("nan")
+    unusable = (nan, nan, nan, nan, nan, nan, "", "", "")
+
+    expected = resolve_expected_range(record)
+    if not isinstance(expected, dict):
+        return (ER_MISSING_EXPECTED_RANGE, *unusable)
+    actual_close = resolve_actual_close(record)
+    if actual_close is None:
+        return (ER_MISSING_ACTUAL_CLOSE, *unusable)
+
+    context = resolve_context(record)
+    try:
+        low = float(expected.get("low"))
+        high = float(expected.get("high"))
+        actual_close = float(actual_close)
+    except Exception:
+        return (ER_INVALID_LOW_HIGH, *unusable)
+
+    try:
+        if context.get("price") is None:
+            return (ER_MISSING_CONTEXT_PRICE, *unusable)
+        price = float(context.get("price"))
+        atr = float(context.get("atr", 0.0))
+    except Exception:
+        return (ER_MISSING_CONTEXT_PRICE, *unusable)
+
+    skip = ER_OK if high - low > 0 else ER_RANGE_WIDTH_NON_POSITIVE
+    return (
+        skip,
+        low,
+        high,
+        actual_close,
+        price,
+        atr,
+        _risk_score(context),
+        _label(context.get("trend", "SIDEWAYS")),
+        _label(context.get("sentiment", "NEUTRAL")),
+        _label(context.get("volatility_regime", "NORMAL")),
+    )
+
+
+def _range_error(record: Dict) -> float:
+    try:
+        return float(record.get("range_error") or 0.0)
+    except Exception:
+        return 0.0
+
+
+def build_columns(records: Iterable[Dict]) -> Dict[str, np.ndarray]:
+    """
+    One row per evaluated record. Expected-range fields are resolved
+    (legacy `prediction` ranges, record-level context fallbacks) and
+    validated up front (`er_skip`); `ctx_*` are the raw context labels
+    the confidence builder encodes.
+    """
+    rows = []
+    for record in records:
+        if not isinstance(record, dict) or record.get("evaluated") is not True:
+            continue
+        raw_context = record.get("context")
+        raw_context = raw_context if isinstance(raw_context, dict) else {}
+        rows.append((
+            int(record.get("_row_id") or 0),
+            _label(record.get("symbol")),
+            record_date(record) or "",
+            _label(record.get("mode")),
+            _label(record.get("result")),
+            *_expected_range_fields(record),
+            isinstance(record.get("expected_range"), dict),
+            _range_error(record),
+            _label(raw_context.get("trend")),
+            _label(raw_context.get("sentiment")),
+            _label(raw_context.get("risk")),
+            bool(raw_context.get("ml_applied")),
+        ))
+
+    names = (
+        "row_id", "symbol", "date", "mode", "result",
+        "er_skip", "expected_low", "expected_high", "actual_close", "price", "atr", "risk_score",
+        "trend", "sentiment", "volatility_regime",
+        "has_range_dict", "range_error", "ctx_trend", "ctx_sentiment", "ctx_risk", "ml_applied",
+    )
+    dtypes = (
+        np.int64, str, str, str, str,
+        np.int8, np.float64, np.float64, np.float64, np.float64, np.float64, np.float64,
+        str, str, str,
+        bool, np.float64, str, str, str, bool,
+    )
+    fields = list(zip(*rows)) if rows else [()] * len(names)
+    return {name: np.array(values, dtype=dtype) for name, values, dtype in zip(names, fields, dtypes)}
+
+
+# ==================================================
+# EXPORT FILE
+# ==================================================
+
+_CACHE: Dict[str, object] = {"signature": None, "columns": None}
+_LOCK = threading.Lock()
+_STATS = {"memory_hits": 0, "file_loads": 0, "rebuilds": 0}
+
+
+def _signature() -> str:
+    # persistent across processes: the file is reused after restarts
+    if history_backend() == "sqlite":
+        store = _history_store()
+        return f"v{_PROJECTION_VERSION}|sqlite|{store.get_meta('created_at')}|{store.evaluated_version()}"
+    return f"v{_PROJECTION_VERSION}|json|{history_snapshot().version}"
+
+
+def _read_file(path: str, signature: str) -> Optional[Dict[str, np.ndarray]]:
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if str(data["_signature"]) != signature:
+                return None
+            return {name: data[name] for name in data.files if not name.startswith("_")}
+    except Exception:
+        logger.warning("Unreadable history column file %s; rebuilding", path, exc_info=True)
+        return None
+
+
+def _write_file(path: str, signature: str, columns: Dict[str, np.ndarray]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            np.savez(f, _signature=np.array(signature), **columns)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_columns(path: Optional[str] = None) -> Dict[str, np.ndarray]:
+    """
+    The evaluated-history columns, rebuilt only when evaluated history
+    changed (memory, then the npz file, then a rebuild). Arrays are
+    shared and read-only.
+    """
+    path = path or HISTORY_COLUMNS_PATH
+    signature = _signature()
+    with _LOCK:
+        if _CACHE["signature"] == (path, signature):
+            _STATS["memory_hits"] += 1
+            return _CACHE["columns"]
+
+        columns = _read_file(path, signature)
+        if columns is None:
+            columns = build_columns(load_history_range(evaluated=True))
+            try:
+                _write_file(path, signature, columns)
+            except Exception:
+                logger.warning("Failed to write history column file %s", path, exc_info=True)
+            _STATS["rebuilds"] += 1
+        else:
+            _STATS["file_loads"] += 1
+        for values in columns.values():
+            values.flags.writeable = False
+        _CACHE["signature"] = (path, signature)
+        _CACHE["columns"] = columns
+        return columns
+
+
+def date_mask(columns: Dict[str, np.ndarray], date_from=None, date_to=None) -> np.ndarray:
+    dates = columns["date"]
+    mask = np.ones(len(dates), dtype=bool)
+    if date_from:
+        mask &= dates >= str(date_from)[:10]
+    if date_to:
+        mask &= (dates <= str(date_to)[:10]) & (dates != "")
+    return mask
+
+
+def encode(values: np.ndarray, mapping: Dict[str, float], default: float = 0) -> np.ndarray:
+    """
+    Vectorised dict lookup for label columns.
+    """
+    return np.select([values == label for label in mapping], list(mapping.values()), default=default).astype(np.float64)
+
+
+def history_columns_stats() -> Dict:
+    columns = _CACHE["columns"]
+    return {
+        **_STATS,
+        "rows": len(columns["row_id"]) if columns else 0,
+        "signature": _CACHE["signature"][1] if _CACHE["signature"] else None,
+    }
@@ -2,16 +2,17 @@
 # PHASE-3C — RANGE ERROR AGGREGATION (SYMBOL WISE)
 
 from collections import defaultdict
-from core_engine.prediction_history import _load_history
+from core_engine.prediction_history import load_history_range
 
 
-def aggregate_range_errors(symbol: str | None = None):
+def aggregate_range_errors(symbol: str | None = None, date_from=None, date_to=None):
     """
     Aggregates historical range errors.
     If symbol is None → aggregates ALL symbols.
+    date_from / date_to (inclusive, optional) limit the history read.
     """
 
-    history = _load_history()
+    history = load_history_range(date_from, date_to, symbol=symbol, evaluated=True)
 
     stats = defaultdict(lambda: {
         "count": 0,
@@ -2,10 +2,11 @@
 # PHASE-3B — RANGE ERROR TRACKING (LIVE WIRING | BACKWARD SAFE)
 
 from datetime import datetime
-from core_engine.data_fetch import fetch_stock_data
+from core_engine.data_fetch import fetch_stock_data, fetch_stock_data_many
 from core_engine.prediction_history import (
     load_pending_predictions,
-    update_prediction_result,
+    result_update,
+    update_prediction_results,
 )
 
 
@@ -27,6 +28,17 @@ def evaluate_expected_ranges():
         }
 
     evaluated = 0
+    updates = []
+
+    # warm the history cache in batched downloads (one round trip per chunk)
+    try:
+        fetch_stock_data_many([
+            pred.get("symbol")
+            for pred in pending_predictions
+            if pred.get("id") and pred.get("symbol")
+        ])
+    except Exception as e:
+        print(f"[RangeErrorTracker] Bulk prefetch failed: {e}")
 
     for pred in pending_predictions:
         try:
@@ -80,22 +92,25 @@ def evaluate_expected_ranges():
                 error = round(expected_low - actual_close, 2)
 
             # -------------------------------
-            # UPDATE HISTORY (SAFE)
+            # QUEUE HISTORY UPDATE (WRITTEN ONCE BELOW)
             # -------------------------------
-            update_prediction_result(
+            updates.append(result_update(
                 prediction_id=prediction_id,
                 actual_close=actual_close,
                 result=result,
                 error=error,
                 evaluated_on=datetime.now().isoformat(),
-            )
-
-            evaluated += 1
+            ))
 
         except Exception as e:
             # Absolute fail-safe: never break pipeline
             print(f"[RangeErrorTracker] Failed for {pred.get('symbol')}: {e}")
 
+    try:
+        evaluated = update_prediction_results(updates)
+    except Exception as e:
+        print(f"[RangeErrorTracker] Bulk history update failed: {e}")
+
     return {
         "status": "EVALUATION_COMPLETE",
         "evaluated": evaluated,
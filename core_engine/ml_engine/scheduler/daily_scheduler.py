@@ -19,6 +19,7 @@ from core_engine.ml_engine.expected_range.model_trainer import (
 from core_engine.ml_engine.expected_range.model_persistence import save_models
 from core_engine.ml_engine.expected_range.model_registry import refresh_registry
 from core_engine.ml_engine.expected_range.champion_selector import select_champion
+from core_engine.prediction_history import compact_history
 
 logger = logging.getLogger("core_engine.ml_engine.daily_scheduler")
 REPORT_PATH = (
@@ -141,6 +142,13 @@ def run_daily_ml_cycle(symbol: str = None) -> dict:
     except Exception:
         logger.debug("Failed to read expected range history size", exc_info=True)
 
+    # evaluated months past the hot window go to compressed segments
+    try:
+        report["steps"]["history_compaction"] = compact_history()
+    except Exception as exc:
+        logger.warning("History compaction failed", exc_info=True)
+        report["steps"]["history_compaction"] = {"status": "ERROR", "note": str(exc)}
+
     # --------------------------------------------------
     # 2. Aggregate Range Errors
     # --------------------------------------------------
@@ -2,13 +2,19 @@
 # FAST SINGLE-SOURCE NEWS ENGINE (GOOGLE RSS)
 
 import feedparser
+import os
 import time
 import threading
 from datetime import datetime, timezone
 from urllib.parse import quote_plus
 
+from core_engine.trading_calendar import is_fresh
+
 NEWS_CACHE = {}
-CACHE_TTL = 60  # 60 seconds
+CACHE_TTL = 60  # 60 seconds (market hours)
+# market closed: hold until next session, but headlines still move on
+# weekends/holidays, so cap the age
+CLOSED_MAX_AGE = int(os.getenv("SEESTOX_NEWS_CLOSED_MAX_AGE", str(6 * 3600)))
 _CACHE_LOCK = threading.Lock()
 _REFRESHING = set()
 
@@ -87,7 +93,7 @@ def get_market_news(query="MARKET", force_refresh=False):
     with _CACHE_LOCK:
         if query in NEWS_CACHE:
             cached = NEWS_CACHE[query]
-            if now - cached["time"] < CACHE_TTL:
+            if is_fresh(cached["time"], CACHE_TTL, CLOSED_MAX_AGE, now=now):
                 return cached["data"]
 
     # Cache stale / missing -> return OLD if exists
@@ -0,0 +1,199 @@
+# core_engine/ohlcv_store.py
+# PERSISTENT DAILY OHLCV STORE (PER-SYMBOL BINARY COLUMNS)
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+
+# ==================================================
+# CONFIG
+# ==================================================
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STORE_DIR = os.getenv("SEESTOX_OHLCV_DIR") or os.path.join(BASE_DIR, "cache", "price_data")
+
+PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+
+_STORE_LOCK = threading.Lock()
+logger = logging.getLogger("core_engine.ohlcv_store")
+
+
+# ==================================================
+# INTERNAL HELPERS
+# ==================================================
+
+def _store_path(yf_symbol: str) -> str:
+    safe = "".join(ch if ch.isalnum() or ch in "._-" else "_" for ch in yf_symbol.upper())
+    return os.path.join(STORE_DIR, f"{safe}.npz")
+
+
+def _empty_bars() -> Dict:
+    bars = {"date": np.array([], dtype="datetime64[D]")}
+    for col in PRICE_COLUMNS:
+        bars[col] = np.array([], dtype=np.float64)
+    bars["covered_from"] = None
+    bars["fetched_at"] = 0.0
+    return bars
+
+
+# ==================================================
+# READ / WRITE
+# ==================================================
+
+def load_bars(yf_symbol: str) -> Optional[Dict]:
+    """
+    Loads stored daily bars for a Yahoo symbol (e.g. 'TCS.NS').
+    Returns None when nothing is stored or the file is unreadable.
+    """
+    path = _store_path(yf_symbol)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            bars = {"date": data["date"].astype("datetime64[D]")}
+            for col in PRICE_COLUMNS:
+                bars[col] = data[col].astype(np.float64)
+            covered = data["covered_from"]
+            bars["covered_from"] = covered.astype("datetime64[D]")[()] if covered.size else None
+            bars["fetched_at"] = float(data["fetched_at"])
+    except Exception:
+        logger.warning("Unreadable OHLCV store file: %s", path, exc_info=True)
+        return None
+
+    if len(bars["date"]) == 0:
+        return None
+    return bars
+
+
+def save_bars(yf_symbol: str, bars: Dict) -> None:
+    """
+    Atomically writes bars (tmp file + rename) so readers never see a torn file.
+    """
+    path = _store_path(yf_symbol)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    covered = bars.get("covered_from")
+    fetched_at = bars.get("fetched_at")
+    arrays = {
+        "date": np.asarray(bars["date"], dtype="datetime64[D]"),
+        "covered_from": (
+            np.array([covered], dtype="datetime64[D]")
+            if covered is not None
+            else np.array([], dtype="datetime64[D]")
+        ),
+        "fetched_at": np.float64(time.time() if fetched_at is None else fetched_at),
+    }
+    for col in PRICE_COLUMNS:
+        arrays[col] = np.asarray(bars[col], dtype=np.float64)
+
+    with _STORE_LOCK:
+        try:
+            os.makedirs(STORE_DIR, exist_ok=True)
+            with open(tmp_path, "wb") as handle:
+                np.savez(handle, **arrays)
+            os.replace(tmp_path, path)
+        except Exception:
+            logger.warning("Failed to persist OHLCV store: %s", path, exc_info=True)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+# ==================================================
+# TRANSFORMS
+# ==================================================
+
+def merge_bars(existing: Optional[Dict], fresh: Dict) -> Dict:
+    """
+    Merges freshly downloaded bars into stored bars.
+    Fresh rows win on duplicate dates (the last stored bar is often partial).
+    """
+    if not existing or len(existing["date"]) == 0:
+        return fresh
+    if len(fresh["date"]) == 0:
+        merged = dict(existing)
+        merged["fetched_at"] = fresh.get("fetched_at") or existing.get("fetched_at")
+        return merged
+
+    keep = ~np.isin(existing["date"], fresh["date"])
+    merged = {
+        "date": np.concatenate([existing["date"][keep], fresh["date"]]),
+    }
+    for col in PRICE_COLUMNS:
+        merged[col] = np.concatenate([existing[col][keep], fresh[col]])
+
+    order = np.argsort(merged["date"], kind="stable")
+    for key in ("date",) + PRICE_COLUMNS:
+        merged[key] = merged[key][order]
+
+    covered = [c for c in (existing.get("covered_from"), fresh.get("covered_from")) if c is not None]
+    merged["covered_from"] = min(covered) if covered else None
+    merged["fetched_at"] = fresh.get("fetched_at") or existing.get("fetched_at")
+    return merged
+
+
+def slice_bars(bars: Dict, start) -> Dict:
+    """
+    Returns bars on/after `start` (numpy datetime64[D] or None for everything).
+    """
+    if start is None:
+        return bars
+    idx = int(np.searchsorted(bars["date"], np.datetime64(start, "D"), side="left"))
+    sliced = {key: bars[key][idx:] for key in ("date",) + PRICE_COLUMNS}
+    sliced["covered_from"] = bars.get("covered_from")
+    sliced["fetched_at"] = bars.get("fetched_at")
+    return sliced
+
+
+def bars_from_frame(df, yf_symbol: str, covered_from=None) -> Dict:
+    """
+    Converts a yf.download() frame (flat or MultiIndex columns) into bars.
+    """
+    import pandas as pd
+
+    bars = _empty_bars()
+    bars["covered_from"] = covered_from
+    bars["fetched_at"] = time.time()
+
+    if df is None or df.empty:
+        return bars
+
+    frame = df
+    if isinstance(frame.columns, pd.MultiIndex):
+        level0 = set(frame.columns.get_level_values(0))
+        if "Close" in level0:
+            tickers = set(frame.columns.get_level_values(1))
+            if yf_symbol in tickers:
+                frame = frame.xs(yf_symbol, axis=1, level=1)
+            else:
+                frame = frame.droplevel(1, axis=1)
+        else:
+            frame = frame[yf_symbol]
+
+    if "Date" in frame.columns:
+        frame = frame.set_index("Date")
+
+    index = pd.DatetimeIndex(frame.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+
+    close = pd.to_numeric(frame["Close"], errors="coerce").to_numpy(dtype=np.float64)
+    valid = ~np.isnan(close)
+
+    bars["date"] = index.values.astype("datetime64[D]")[valid]
+    for col in PRICE_COLUMNS:
+        source = col.capitalize()
+        if source in frame.columns:
+            values = pd.to_numeric(frame[source], errors="coerce").to_numpy(dtype=np.float64)
+        else:
+            values = np.full(len(frame), np.nan)
+        bars[col] = values[valid]
+
+    return bars
@@ -2,50 +2,55 @@
 # PHASE-2P.2 — FUTURE-SAFE, WARNING-FREE PREDICTION ENGINE
 
 import numpy as np
-import pandas as pd
 
+from core_engine.price_series import PriceSeries, as_price_series
 
-def predict_next_day(df: pd.DataFrame) -> dict:
+
+def predict_next_day(df) -> dict:
     """
     Lightweight next-day prediction based on:
     - Recent momentum
     - Recent volatility
     - No ML (safe & deterministic)
 
+    Accepts a PriceSeries (analyzer) or a legacy DataFrame.
     Returns EXACT structure expected by analyzer.
     """
 
-    if df is None or df.empty or "Close" not in df.columns:
-        return _neutral_prediction(df)
+    try:
+        series = as_price_series(df)
+    except Exception:
+        return _neutral_prediction(None)
 
-    close_series = df["Close"]
+    close = series.close
 
-    if len(close_series) < 6:
-        return _neutral_prediction(df)
+    if len(close) < 6:
+        return _neutral_prediction(series)
 
     # ✅ SAFE scalar extraction
-    current_price = close_series.iloc[-1].item()
+    current_price = series.last_close
 
     # -----------------------------
     # MOMENTUM (LAST 5 CANDLES)
     # -----------------------------
-    returns = close_series.pct_change().dropna()
+    returns = close[1:] / close[:-1] - 1.0
+    returns = returns[~np.isnan(returns)]
 
-    if returns.empty:
-        return _neutral_prediction(df)
+    if returns.size == 0:
+        return _neutral_prediction(series)
 
-    recent_returns = returns.tail(5)
-    momentum_score = recent_returns.mean().item()
+    momentum_score = float(returns[-5:].mean())
 
     # -----------------------------
     # VOLATILITY (LAST 10 CANDLES)
     # -----------------------------
-    recent_slice = returns.tail(10)
+    recent_slice = returns[-10:]
 
-    if recent_slice.empty:
+    if recent_slice.size < 2:
+        # sample std (ddof=1) is undefined for a single return
         recent_volatility = 0.01
     else:
-        recent_volatility = recent_slice.std().item()
+        recent_volatility = float(recent_slice.std(ddof=1))
 
     if np.isnan(recent_volatility) or recent_volatility <= 0:
         recent_volatility = 0.01
@@ -83,9 +88,9 @@ def predict_next_day(df: pd.DataFrame) -> dict:
 # FALLBACK
 # ==================================================
 
-def _neutral_prediction(df: pd.DataFrame) -> dict:
+def _neutral_prediction(series: PriceSeries) -> dict:
     try:
-        price = df["Close"].iloc[-1].item()
+        price = series.last_close
     except Exception:
         price = 0.0
 
@@ -6,8 +6,13 @@ import logging
 from pathlib import Path
 from datetime import datetime, timedelta
 
-from core_engine.data_fetch import fetch_stock_data
-from core_engine.prediction_history import load_history_any, save_history_any
+from core_engine.data_fetch import fetch_stock_data, fetch_stock_data_many
+from core_engine.prediction_history import (
+    flush_pending_predictions,
+    load_history_any,
+    record_update,
+    update_prediction_results,
+)
 
 
 # ==================================================
@@ -87,6 +92,32 @@ def _get_next_trading_close(symbol: str, prediction_date: str):
         return None
 
 
+def _prefetch_history(history: list) -> None:
+    """
+    Warms the history cache for every symbol that still needs a market close,
+    using batched downloads instead of one request per record.
+    """
+    symbols = []
+    for record in history:
+        if not isinstance(record, dict) or record.get("evaluated") is True:
+            continue
+        if _resolve_expected_range(record) is None:
+            continue
+        if any(record.get(key) is not None for key in ("actual_close", "close", "actual")):
+            continue
+        symbol = record.get("symbol") or record.get("_symbol_key")
+        if symbol:
+            symbols.append(symbol)
+
+    if not symbols:
+        return
+
+    try:
+        fetch_stock_data_many(symbols, period="6mo")
+    except Exception:
+        logger.warning("Bulk history prefetch failed", exc_info=True)
+
+
 def _parse_prediction_date(record: dict) -> str | None:
     date_val = record.get("date")
     if isinstance(date_val, str) and len(date_val) >= 10:
@@ -150,10 +181,13 @@ def evaluate_predictions():
     Safely ignores broken / legacy records.
     """
 
-    history, container_type, container_data = load_history_any()
+    flush_pending_predictions()
+    history, _, _ = load_history_any()
+    _prefetch_history(history)
     evaluated_now = 0
     skipped = 0
     errors = {}
+    updates = []
 
     for record in history:
         try:
@@ -226,6 +260,14 @@ def evaluate_predictions():
             context = _ensure_context(record)
             record["context"] = context
 
+            updates.append(record_update(record, {
+                key: record[key]
+                for key in (
+                    "expected_range", "actual_close", "range_error", "evaluated",
+                    "evaluated_on", "result", "outcome", "context",
+                )
+                if key in record
+            }))
             evaluated_now += 1
 
         except Exception as exc:
@@ -233,7 +275,8 @@ def evaluate_predictions():
             errors[key] = str(exc)
             skipped += 1
 
-    save_history_any(history, container_type, container_data)
+    # all outcomes in one write
+    update_prediction_results(updates)
 
     return {
         "status": "OK",
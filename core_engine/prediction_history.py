@@ -1,13 +1,27 @@
 # core_engine/prediction_history.py
 # PHASE-3A+ - PREDICTION HISTORY WITH AUTO vs USER SPLIT (STABLE)
 
+import atexit
+import heapq
 import json
+import logging
 import os
+import queue
 import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Dict, Optional, Tuple, List
 from uuid import uuid4
 
+from core_engine.history_store import (
+    HistoryStore,
+    dedupe_key,
+    merge_refresh,
+    migrate_json_file,
+    record_date,
+)
+
 
 # ==================================================
 # CONFIG
@@ -18,6 +32,37 @@ HISTORY_FILE = os.path.join(BASE_DIR, "prediction_history.json")
 _HISTORY_LOCK = threading.Lock()
 _LAST_HISTORY_PATH = None
 
+# sqlite (indexed store, default) | json (legacy whole-file rewrite)
+HISTORY_BACKEND = os.getenv("SEESTOX_HISTORY_BACKEND", "sqlite").strip().lower()
+_STORE = None
+_STORE_LOCK = threading.Lock()
+logger = logging.getLogger("core_engine.prediction_history")
+
+# write-behind for store_prediction: records are queued and group-committed
+# by a background writer every HISTORY_FLUSH_INTERVAL seconds
+HISTORY_WRITE_BEHIND = os.getenv("SEESTOX_HISTORY_WRITE_BEHIND", "1").strip().lower() not in ("0", "false", "no")
+HISTORY_FLUSH_INTERVAL = float(os.getenv("SEESTOX_HISTORY_FLUSH_INTERVAL", "0.5"))
+HISTORY_QUEUE_MAX = int(os.getenv("SEESTOX_HISTORY_QUEUE_MAX", "1000"))
+HISTORY_ENQUEUE_TIMEOUT = float(os.getenv("SEESTOX_HISTORY_ENQUEUE_TIMEOUT", "0.05"))
+# a failed batch is retried with doubling backoff, capped at this many seconds
+HISTORY_RETRY_BACKOFF_MAX = float(os.getenv("SEESTOX_HISTORY_RETRY_BACKOFF_MAX", "30"))
+
+# months kept hot (row per prediction); older evaluated months are
+# compacted into read-only compressed segments
+HISTORY_HOT_MONTHS = int(os.getenv("SEESTOX_HISTORY_HOT_MONTHS", "3"))
+
+# opt-in upsert key for store_prediction, e.g. "symbol,date,mode": a
+# refresh of the same stock on the same day (and mode) updates the
+# pending record instead of adding one. Comma-separated record fields;
+# "none" (default) appends every call. The sqlite store applies a key only
+# after scripts/dedupe_prediction_history.py has migrated the table to it.
+_DEDUPE_SETTING = os.getenv("SEESTOX_HISTORY_DEDUPE_KEY", "none").strip().lower()
+HISTORY_DEDUPE_KEY = (
+    ()
+    if _DEDUPE_SETTING in ("", "none", "off")
+    else tuple(field.strip() for field in _DEDUPE_SETTING.split(",") if field.strip())
+)
+
 
 # ==================================================
 # INTERNAL HELPERS
@@ -31,6 +76,7 @@ def _history_candidates() -> List[str]:
         candidates.append(env_path)
 
     candidates.append(os.path.join(os.getcwd(), "prediction_history.json"))
+    candidates.append(os.path.join(os.path.dirname(BASE_DIR), "prediction_history.json"))
     candidates.append(HISTORY_FILE)
     candidates.append(os.path.join(BASE_DIR, "prediction_history.json"))
     candidates.append(os.path.join(BASE_DIR, "ml_engine", "prediction_history.json"))
@@ -63,6 +109,7 @@ def _resolve_history_path() -> str:
 def _strip_internal_fields(record: dict) -> dict:
     cleaned = dict(record)
     cleaned.pop("_symbol_key", None)
+    cleaned.pop("_row_id", None)
     return cleaned
 
 
@@ -81,52 +128,300 @@ def _record_identity(record: dict) -> Tuple:
     )
 
 
+# ==================================================
+# SQLITE STORE
+# ==================================================
+
+def history_backend() -> str:
+    return "json" if HISTORY_BACKEND == "json" else "sqlite"
+
+
+def migrate_json_history(source: Optional[str] = None, force: bool = False) -> int:
+    """
+    One-shot import of the JSON history (list or dict format) into the
+    store. Skipped once done, or when the store already has records,
+    unless `force`. Returns the number of records imported.
+    """
+    store = _history_store(migrate=False)
+    if not force and (store.get_meta("migrated_from") is not None or store.count()):
+        return 0
+    path = source or _select_history_file()
+    count = 0
+    if path and os.path.exists(path):
+        count = migrate_json_file(store, path)
+    store.set_meta("migrated_from", path or "")
+    store.set_meta("migrated_at", datetime.now().isoformat())
+    return count
+
+
+def _history_store(migrate: bool = True) -> HistoryStore:
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                _STORE = HistoryStore(dedupe_fields=HISTORY_DEDUPE_KEY)
+                if migrate:
+                    try:
+                        migrate_json_history()
+                    except Exception:
+                        logger.exception("Prediction history migration failed")
+    return _STORE
+
+
+def _flatten_rows(rows) -> List[Dict]:
+    records = []
+    for row_id, symbol_key, record in rows:
+        record["_row_id"] = row_id
+        if not record.get("symbol") and symbol_key:
+            record["_symbol_key"] = symbol_key
+        records.append(record)
+    return records
+
+
 # ==================================================
 # STORAGE
 # ==================================================
 
 def _load_history():
+    return history_snapshot().records
+
+
+def _atomic_dump(path: str, data) -> None:
+    """
+    Writes JSON to a temp file and renames it over `path`, so a crash
+    mid-dump never leaves a truncated history file.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _save_history(data):
     with _HISTORY_LOCK:
         history_path = _resolve_history_path()
-        if not os.path.exists(history_path):
-            return []
+        _atomic_dump(history_path, data)
+
+
+# ==================================================
+# SHARED SNAPSHOT (PARSED ONCE PER HISTORY VERSION)
+# ==================================================
+
+class FrozenRecord(dict):
+    """
+    Read-only dict used for snapshot records (nested objects included).
+    dict(record) gives a mutable shallow copy; copy.deepcopy a mutable
+    deep one.
+    """
+
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("history snapshot records are read-only; copy them with dict(record)")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+def _thaw(value):
+    if isinstance(value, dict):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_thaw(item) for item in value]
+    return value
+
+
+@dataclass(frozen=True)
+class HistorySnapshot:
+    """
+    One parsed view of the prediction history, shared by every reader
+    until the file / database changes.
+
+    `records` is the flat record list (FrozenRecord, with `_row_id` /
+    `_symbol_key` like load_history_any); `container` is the parsed JSON
+    file (None for sqlite).
+    """
+
+    records: Tuple[Dict, ...]
+    container_type: str
+    container: object
+    source: Optional[str]
+    version: Tuple
+    loaded_at: float
+
+
+_SNAPSHOT: Optional[HistorySnapshot] = None
+_SNAPSHOT_LOCK = threading.Lock()
+_SNAPSHOT_STATS = {"hits": 0, "loads": 0, "parsed_rows": 0, "cold_loads": 0}
+
+# sqlite rebuilds reuse what the previous one parsed (guarded by
+# _SNAPSHOT_LOCK): hot rows by row_id while their JSON text is unchanged,
+# archived segments until compact() adds more
+_HOT_ROWS: Dict = {"path": None, "rows": {}}  # rows: row_id -> (json, record)
+_COLD_ROWS: Dict = {"key": None, "records": ()}
+
+
+def _file_signature(path: Optional[str]) -> Optional[Tuple]:
+    if not path:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return (path, None, None, None)
+    # history files are replaced (os.replace), so the inode changes too
+    return (path, stat.st_ino, stat.st_mtime_ns, stat.st_size)
 
+
+def _history_version() -> Tuple:
+    if history_backend() == "sqlite":
+        store = _history_store()
+        return ("sqlite", store.path, store.data_version())
+    return ("json", _file_signature(_select_history_file()))
+
+
+def _flatten_container(data) -> List[Dict]:
+    flat_records: List[Dict] = []
+    if isinstance(data, list):
+        flat_records = [r for r in data if isinstance(r, dict)]
+    elif isinstance(data, dict):
+        for symbol_key, records in data.items():
+            if not isinstance(records, list):
+                continue
+            for record in records:
+                if not isinstance(record, dict):
+                    continue
+                if not record.get("symbol"):
+                    record = {**record, "_symbol_key": symbol_key}
+                flat_records.append(record)
+    return flat_records
+
+
+def _frozen_row(row_id: int, symbol_key: Optional[str], record: Dict) -> Dict:
+    if not record.get("symbol") and symbol_key:
+        return FrozenRecord(record, _row_id=row_id, _symbol_key=symbol_key)
+    return FrozenRecord(record, _row_id=row_id)
+
+
+def _load_sqlite_records(store: HistoryStore) -> List[Dict]:
+    """
+    Full record list, parsing only hot rows that are new or changed since
+    the last rebuild; archived rows are parsed once per compaction.
+    """
+    cold_key = (store.path, store.segments_version())
+    if _COLD_ROWS["key"] != cold_key:
+        _COLD_ROWS["records"] = tuple(
+            _frozen_row(row_id, symbol_key, record)
+            for row_id, symbol_key, record in store.archived_rows(object_pairs_hook=FrozenRecord)
+        )
+        _COLD_ROWS["key"] = cold_key
+        _SNAPSHOT_STATS["cold_loads"] += 1
+
+    previous = _HOT_ROWS["rows"] if _HOT_ROWS["path"] == store.path else {}
+    rows = {}
+    hot_records = []
+    for row_id, symbol_key, raw in store.raw_rows():
+        cached = previous.get(row_id)
+        if cached is not None and cached[0] == raw:
+            record = cached[1]
+        else:
+            record = _frozen_row(row_id, symbol_key, json.loads(raw, object_pairs_hook=FrozenRecord))
+            _SNAPSHOT_STATS["parsed_rows"] += 1
+        rows[row_id] = (raw, record)
+        hot_records.append(record)
+    _HOT_ROWS.update(path=store.path, rows=rows)
+
+    if not _COLD_ROWS["records"]:
+        return hot_records
+    # both sides are in row_id order
+    return list(heapq.merge(_COLD_ROWS["records"], hot_records, key=lambda record: record["_row_id"]))
+
+
+def _load_snapshot(version: Tuple) -> HistorySnapshot:
+    if version[0] == "sqlite":
+        records = _load_sqlite_records(_history_store())
+        return HistorySnapshot(tuple(records), "sqlite", None, version[1], version, time.time())
+
+    history_path = version[1][0] if version[1] else None
+    data = None
+    if history_path and os.path.exists(history_path):
         try:
-            with open(history_path, "r") as f:
-                return json.load(f)
+            with _HISTORY_LOCK:
+                with open(history_path, "r") as f:
+                    data = json.load(f, object_pairs_hook=FrozenRecord)
         except Exception:
-            return []
+            logger.exception("Failed to parse prediction history: %s", history_path)
+            data = None
+    if not isinstance(data, (list, dict)):
+        return HistorySnapshot((), "list", [], history_path, version, time.time())
+
+    records = tuple(
+        record if isinstance(record, FrozenRecord) else FrozenRecord(record)
+        for record in _flatten_container(data)
+    )
+    container_type = "dict" if isinstance(data, dict) else "list"
+    return HistorySnapshot(records, container_type, data, history_path, version, time.time())
 
 
-def _save_history(data):
-    with _HISTORY_LOCK:
-        history_path = _resolve_history_path()
-        with open(history_path, "w") as f:
-            json.dump(data, f, indent=2)
+def history_snapshot() -> HistorySnapshot:
+    """
+    The shared read-only history. Parsed once per file version (JSON:
+    inode / mtime / size; sqlite: commit counter, re-parsing only rows
+    that changed); concurrent callers wait for the one load in flight
+    instead of parsing again.
+    """
+    global _SNAPSHOT
+    version = _history_version()
+    snapshot = _SNAPSHOT
+    if snapshot is None or snapshot.version != version:
+        with _SNAPSHOT_LOCK:
+            snapshot = _SNAPSHOT
+            if snapshot is None or snapshot.version != version:
+                snapshot = _SNAPSHOT = _load_snapshot(version)
+                _SNAPSHOT_STATS["loads"] += 1
+                return snapshot
+    _SNAPSHOT_STATS["hits"] += 1
+    return snapshot
+
+
+def history_snapshot_stats() -> Dict:
+    snapshot = _SNAPSHOT
+    return {
+        **_SNAPSHOT_STATS,
+        "records": len(snapshot.records) if snapshot else 0,
+        "source": snapshot.source if snapshot else None,
+        "loaded_at": snapshot.loaded_at if snapshot else None,
+    }
 
 
 def load_history_any() -> Tuple[List[Dict], str, object]:
     """
     Loads prediction history from list or dict formats.
     Returns: (flat_records, container_type, container_data)
+    With the sqlite backend container_type is "sqlite" and records carry
+    an internal `_row_id` used by save_history_any.
+    Records are mutable copies of the shared snapshot; read-only callers
+    should use history_snapshot() instead.
     """
     global _LAST_HISTORY_PATH
-    history_path = _select_history_file()
-    _LAST_HISTORY_PATH = history_path
+    snapshot = history_snapshot()
+    if snapshot.container_type == "sqlite":
+        return [_thaw(record) for record in snapshot.records], "sqlite", None
 
-    if not history_path or not os.path.exists(history_path):
-        return [], "list", []
-
-    try:
-        with _HISTORY_LOCK:
-            with open(history_path, "r") as f:
-                data = json.load(f)
-    except Exception:
-        return [], "list", []
+    _LAST_HISTORY_PATH = snapshot.source
+    data = _thaw(snapshot.container)
 
+    # flat records are the container's own dicts, so in-place edits reach
+    # save_history_any
     flat_records: List[Dict] = []
-    container_type = "list" if isinstance(data, list) else "dict" if isinstance(data, dict) else "list"
-
     if isinstance(data, list):
         flat_records = [r for r in data if isinstance(r, dict)]
     elif isinstance(data, dict):
@@ -139,25 +434,27 @@ def load_history_any() -> Tuple[List[Dict], str, object]:
                 if not record.get("symbol"):
                     record["_symbol_key"] = symbol_key
                 flat_records.append(record)
-
-    evaluated_true = sum(
-        1 for r in flat_records
-        if isinstance(r, dict) and r.get("evaluated") is True
-    )
-    return flat_records, container_type, data
+    return flat_records, snapshot.container_type, data
 
 
 def save_history_any(flat_records: List[Dict], container_type: str, container_data) -> None:
     """
     Saves prediction history back into original list/dict format.
     """
+    if container_type == "sqlite":
+        _history_store().save_records([
+            (record.get("_row_id"), _strip_internal_fields(record), record.get("_symbol_key"))
+            for record in flat_records
+            if isinstance(record, dict)
+        ])
+        return
+
     history_path = _LAST_HISTORY_PATH or _select_history_file() or HISTORY_FILE
 
     if container_type == "list":
         cleaned = [_strip_internal_fields(r) for r in flat_records if isinstance(r, dict)]
         with _HISTORY_LOCK:
-            with open(history_path, "w") as f:
-                json.dump(cleaned, f, indent=2)
+            _atomic_dump(history_path, cleaned)
         return
 
     if not isinstance(container_data, dict):
@@ -191,8 +488,132 @@ def save_history_any(flat_records: List[Dict], container_type: str, container_da
             records_list.append(cleaned)
 
     with _HISTORY_LOCK:
-        with open(history_path, "w") as f:
-            json.dump(container_data, f, indent=2)
+        _atomic_dump(history_path, container_data)
+
+
+# ==================================================
+# DATE-RANGE READS / PARTITIONS
+# ==================================================
+
+def _day(value) -> Optional[str]:
+    return str(value)[:10] if value else None
+
+
+def filter_date_range(records: List[Dict], date_from=None, date_to=None) -> List[Dict]:
+    """
+    Keeps records dated within [date_from, date_to] (dates or
+    YYYY-MM-DD strings; None = open). Undated records are dropped once
+    a bound is given.
+    """
+    date_from, date_to = _day(date_from), _day(date_to)
+    if not date_from and not date_to:
+        return records
+    kept = []
+    for record in records:
+        day = record_date(record) if isinstance(record, dict) else None
+        if day is None or (date_from and day < date_from) or (date_to and day > date_to):
+            continue
+        kept.append(record)
+    return kept
+
+
+def load_history_range(
+    date_from=None,
+    date_to=None,
+    symbol: Optional[str] = None,
+    evaluated: Optional[bool] = None,
+) -> List[Dict]:
+    """
+    Flat records within a date range (inclusive), optionally for one
+    symbol / evaluated state. With the sqlite backend only the hot rows
+    and the archived months in range are read.
+    """
+    if history_backend() == "sqlite":
+        rows = _history_store().fetch(
+            symbol=symbol,
+            evaluated=evaluated,
+            date_from=_day(date_from),
+            date_to=_day(date_to),
+        )
+        return _flatten_rows(rows)
+
+    records = list(filter_date_range(history_snapshot().records, date_from, date_to))
+    if symbol is not None:
+        records = [r for r in records if r.get("symbol") == symbol]
+    if evaluated is not None:
+        records = [r for r in records if (r.get("evaluated") is True) == evaluated]
+    return records
+
+
+def compact_history(hot_months: Optional[int] = None) -> Dict:
+    """
+    Archives evaluated predictions older than the last `hot_months`
+    months (current month included) into compressed segments.
+    """
+    if history_backend() != "sqlite":
+        return {"status": "SKIPPED", "note": "json backend"}
+    hot_months = HISTORY_HOT_MONTHS if hot_months is None else max(1, int(hot_months))
+    flush_pending_predictions()
+
+    today = datetime.now()
+    index = today.year * 12 + (today.month - 1) - (hot_months - 1)
+    before_month = f"{index // 12:04d}-{index % 12 + 1:02d}"
+    result = _history_store().compact(before_month)
+    return {"status": "DONE", "before": before_month, **result}
+
+
+def collapse_duplicate_predictions(dry_run: bool = False) -> Dict:
+    """
+    Migration to the dedupe key: folds existing records that share a key
+    (see HistoryStore._collapse for which one survives) and, for sqlite,
+    switches the store to the key (HistoryStore.migrate_dedupe).
+    """
+    if not HISTORY_DEDUPE_KEY:
+        return {"status": "SKIPPED", "note": "dedupe key disabled"}
+    flush_pending_predictions()
+
+    if history_backend() == "sqlite":
+        result = _history_store().migrate_dedupe(dry_run=dry_run)
+        return {"status": "DRY_RUN" if dry_run else "DONE", "key": list(HISTORY_DEDUPE_KEY), **result}
+
+    history, container_type, container_data = load_history_any()
+    if container_type != "list":
+        # dict-format files can't drop records through save_history_any
+        return {"status": "SKIPPED", "note": f"{container_type} history format"}
+
+    groups: Dict[str, List[int]] = {}
+    for idx, record in enumerate(history):
+        key = dedupe_key(record, HISTORY_DEDUPE_KEY)
+        if key is not None:
+            groups.setdefault(key, []).append(idx)
+
+    drop = set()
+    collapsed = 0
+    for indexes in groups.values():
+        if len(indexes) < 2:
+            continue
+        collapsed += 1
+        evaluated = [idx for idx in indexes if history[idx].get("evaluated") is True]
+        keep = evaluated[-1] if evaluated else indexes[0]
+        if not evaluated:
+            for idx in indexes[1:]:
+                history[keep] = merge_refresh(history[keep], history[idx])
+        drop.update(idx for idx in indexes if idx != keep)
+
+    if drop and not dry_run:
+        save_history_any([r for idx, r in enumerate(history) if idx not in drop], container_type, container_data)
+    return {
+        "status": "DRY_RUN" if dry_run else "DONE",
+        "key": list(HISTORY_DEDUPE_KEY),
+        "groups": collapsed,
+        "removed": len(drop),
+    }
+
+
+def history_partitions() -> List[Dict]:
+    if history_backend() != "sqlite":
+        return []
+    return _history_store().partitions()
 
 
 # ==================================================
@@ -210,7 +631,6 @@ def store_prediction(
     mode: USER | AUTO
     """
 
-    history, container_type, container_data = load_history_any()
     tomorrow = prediction.get("tomorrow", {})
 
     # ----------------------------------
@@ -254,10 +674,198 @@ def store_prediction(
     if isinstance(context, dict):
         record["context"] = context
 
-    history.append(record)
+    if HISTORY_WRITE_BEHIND:
+        # off the request path; the writer group-commits
+        _WRITER.submit(record)
+        return
+    _write_records([record])
+
+
+def _write_records(records: List[Dict]) -> None:
+    if history_backend() == "sqlite":
+        # indexed rows, not a rewrite of the whole history
+        store = _history_store()
+        if HISTORY_DEDUPE_KEY:
+            store.upsert_many(records)
+        else:
+            store.insert_many([(record, None) for record in records])
+        return
+
+    history, container_type, container_data = load_history_any()
+    for record in records:
+        _upsert_record(history, record)
     save_history_any(history, container_type, container_data)
 
 
+def _upsert_record(history: List[Dict], record: Dict) -> None:
+    key = dedupe_key(record, HISTORY_DEDUPE_KEY)
+    if key is not None:
+        for idx in range(len(history) - 1, -1, -1):
+            existing = history[idx]
+            if (
+                isinstance(existing, dict)
+                and existing.get("evaluated") is not True
+                and dedupe_key(existing, HISTORY_DEDUPE_KEY, existing.get("_symbol_key")) == key
+            ):
+                history[idx] = merge_refresh(existing, record)
+                return
+    history.append(record)
+
+
+# ==================================================
+# WRITE-BEHIND
+# ==================================================
+
+class _PredictionWriter:
+    """
+    Bounded in-memory queue drained by one background thread.
+
+    - each flush writes everything queued in one transaction / file swap
+    - a failed batch (locked db, full disk) stays at the front and is
+      retried with backoff; while HISTORY_QUEUE_MAX records wait for a
+      retry, new ones are left queued
+    - a full queue blocks the caller for HISTORY_ENQUEUE_TIMEOUT, then
+      writes synchronously; if that fails too the error reaches the
+      caller (never drops)
+    - flush() drains synchronously (shutdown, tests, readers that must
+      see every record)
+    """
+
+    def __init__(self, maxsize: int, interval: float):
+        self.interval = max(0.01, interval)
+        self._queue = queue.Queue(maxsize=max(1, maxsize))
+        self._flush_lock = threading.Lock()
+        self._retry: List[Dict] = []  # failed records, oldest first
+        self._backoff = 0.0
+        self._retry_at = 0.0
+        self._thread_pid = None
+        self._start_lock = threading.Lock()
+        # counters are bumped from request threads and the writer thread
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "batches": 0,
+            "max_depth": 0,
+            "full_waits": 0,
+            "sync_writes": 0,
+            "failures": 0,
+            "last_batch": 0,
+            "last_flush_ms": 0.0,
+        }
+
+    def _ensure_thread(self) -> None:
+        # restarted in forked children, where the thread does not exist
+        if self._thread_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread_pid != os.getpid():
+                self._thread_pid = os.getpid()
+                threading.Thread(target=self._run, name="prediction-writer", daemon=True).start()
+
+    def submit(self, record: Dict) -> None:
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._count("full_waits")
+            try:
+                self._queue.put(record, timeout=HISTORY_ENQUEUE_TIMEOUT)
+            except queue.Full:
+                self._count("sync_writes")
+                self._write([record])
+                return
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self._stats["enqueued"] += 1
+            self._stats["max_depth"] = max(self._stats["max_depth"], depth)
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _drain(self) -> List[Dict]:
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _write(self, records: List[Dict]) -> None:
+        started = time.perf_counter()
+        try:
+            _write_records(records)
+        except Exception:
+            self._count("failures")
+            raise
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        with self._stats_lock:
+            self._stats["written"] += len(records)
+            self._stats["batches"] += 1
+            self._stats["last_batch"] = len(records)
+            self._stats["last_flush_ms"] = elapsed_ms
+
+    def flush(self) -> int:
+        """
+        Writes records kept from a failed flush, then the queue, as one
+        batch. Returns how many were written (0 when the batch failed
+        and was kept for the next flush).
+        """
+        with self._flush_lock:
+            batch = self._retry
+            if len(batch) < self._queue.maxsize:
+                batch = batch + self._drain()
+            if not batch:
+                return 0
+            try:
+                self._write(batch)
+            except Exception:
+                self._retry = batch
+                self._backoff = min(HISTORY_RETRY_BACKOFF_MAX, max(self.interval, self._backoff * 2))
+                self._retry_at = time.monotonic() + self._backoff
+                logger.exception("Failed to write %s prediction records; retrying in %.1fs", len(batch), self._backoff)
+                return 0
+            self._retry = []
+            self._backoff = 0.0
+            return len(batch)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            if time.monotonic() < self._retry_at:
+                continue
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Prediction writer flush failed")
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        return {
+            **stats,
+            "depth": self._queue.qsize(),
+            "capacity": self._queue.maxsize,
+            "retrying": len(self._retry),
+        }
+
+
+_WRITER = _PredictionWriter(HISTORY_QUEUE_MAX, HISTORY_FLUSH_INTERVAL)
+atexit.register(_WRITER.flush)
+
+
+def flush_pending_predictions() -> int:
+    """
+    Writes queued predictions now. Returns how many were written.
+    """
+    return _WRITER.flush()
+
+
+def prediction_writer_stats() -> Dict:
+    return _WRITER.stats()
+
+
 # ==================================================
 # READ API - AUTO vs USER AWARE
 # ==================================================
@@ -271,6 +879,13 @@ def get_stats_for_symbol(symbol: str, mode: Optional[str] = None) -> Dict:
       - AUTO  -> system predictions
     """
 
+    if history_backend() == "sqlite":
+        counts = _history_store().result_counts(symbol, mode)
+        success = counts.get("SUCCESS", 0)
+        failure = counts.get("FAILURE", 0)
+        neutral = sum(counts.values()) - success - failure
+        return _stats_payload(success, failure, neutral)
+
     history = _load_history()
 
     success = failure = neutral = 0
@@ -302,6 +917,10 @@ def get_stats_for_symbol(symbol: str, mode: Optional[str] = None) -> Dict:
         else:
             neutral += 1
 
+    return _stats_payload(success, failure, neutral)
+
+
+def _stats_payload(success: int, failure: int, neutral: int) -> Dict:
     total = success + failure + neutral
 
     if total == 0:
@@ -327,27 +946,30 @@ def get_stats_for_symbol(symbol: str, mode: Optional[str] = None) -> Dict:
 # ==================================================
 
 def get_confidence_trend(symbol: str, window: int = 7) -> dict:
-    history, _, _ = load_history_any()
-
-    records = [
-        r for r in history
-        if isinstance(r, dict)
-        and r.get("symbol") == symbol
-        and r.get("evaluated") is True
-    ]
-
-    if len(records) < window * 2:
+    if history_backend() == "sqlite":
+        # only the last 2 * window outcomes are needed
+        results = _history_store().recent_results(symbol, window * 2)
+    else:
+        history, _, _ = load_history_any()
+        results = [
+            r.get("result") for r in history
+            if isinstance(r, dict)
+            and r.get("symbol") == symbol
+            and r.get("evaluated") is True
+        ]
+
+    if len(results) < window * 2:
         return {
             "delta": 0,
             "direction": "STABLE",
             "note": "Not enough historical data"
         }
 
-    recent = records[-window:]
-    previous = records[-window * 2:-window]
+    recent = results[-window:]
+    previous = results[-window * 2:-window]
 
     def score(block):
-        success = sum(1 for r in block if r.get("result") == "SUCCESS")
+        success = sum(1 for result in block if result == "SUCCESS")
         total = len(block)
         return round((success / total) * 100) if total else 0
 
@@ -369,7 +991,11 @@ def load_pending_predictions():
     - have expected_range
     - are not evaluated yet
     """
-    history, _, _ = load_history_any()
+    flush_pending_predictions()
+    if history_backend() == "sqlite":
+        history = _flatten_rows(_history_store().fetch(evaluated=False, has_range=True))
+    else:
+        history, _, _ = load_history_any()
     return [
         h for h in history
         if isinstance(h, dict)
@@ -387,17 +1013,79 @@ def update_prediction_result(
     error: float,
     evaluated_on: str,
 ):
-    history, container_type, container_data = load_history_any()
+    update_prediction_results([
+        result_update(prediction_id, actual_close, result, error, evaluated_on)
+    ])
+
+
+def result_update(prediction_id: str, actual_close: float, result: str, error: float, evaluated_on: str) -> Dict:
+    """
+    One update_prediction_results() entry for a record with an `id`.
+    """
+    return {
+        "prediction_id": prediction_id,
+        "fields": {
+            "actual_close": actual_close,
+            "result": result,
+            "range_error": error,
+            "evaluated": True,
+            "evaluated_on": evaluated_on,
+        },
+    }
+
+
+def record_update(record: dict, fields: Dict) -> Dict:
+    """
+    update_prediction_results() entry that also matches legacy records
+    without an `id` (by store row, or by identity in the JSON file).
+    """
+    return {
+        "prediction_id": record.get("id"),
+        "row_id": record.get("_row_id"),
+        "identity": (record.get("symbol") or record.get("_symbol_key"), _record_identity(record)),
+        "fields": fields,
+    }
 
+
+def update_prediction_results(updates: List[Dict]) -> int:
+    """
+    Applies many evaluation outcomes at once: one transaction with the
+    sqlite store, one load + one write of the JSON file otherwise.
+    Entries come from result_update() / record_update().
+    Returns the number of records updated.
+    """
+    updates = [u for u in updates if isinstance(u, dict) and u.get("fields")]
+    if not updates:
+        return 0
+    # queued predictions must exist before they can be updated
+    flush_pending_predictions()
+
+    if history_backend() == "sqlite":
+        return _history_store().update_many(updates)
+
+    history, container_type, container_data = load_history_any()
+    by_id = {}
+    by_identity = {}
     for record in history:
         if not isinstance(record, dict):
             continue
-        if record.get("id") == prediction_id:
-            record["actual_close"] = actual_close
-            record["result"] = result
-            record["range_error"] = error
-            record["evaluated"] = True
-            record["evaluated_on"] = evaluated_on
-            break
+        if record.get("id"):
+            by_id.setdefault(record["id"], record)
+        key = (record.get("symbol") or record.get("_symbol_key"), _record_identity(record))
+        by_identity.setdefault(key, record)
+
+    applied = 0
+    for update in updates:
+        record = None
+        if update.get("prediction_id"):
+            record = by_id.get(update["prediction_id"])
+        if record is None and update.get("identity") is not None:
+            record = by_identity.get(tuple(update["identity"]))
+        if record is None:
+            continue
+        record.update(update["fields"])
+        applied += 1
 
-    save_history_any(history, container_type, container_data)
+    if applied:
+        save_history_any(history, container_type, container_data)
+    return applied
@@ -3,62 +3,445 @@
 # HYBRID PRICE ENGINE (REAL + CACHE)
 # =====================================
 
+import logging
+import math
+import os
+import secrets
 import time
 import threading
-import yfinance as yf
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from core_engine.market_data_provider import get_provider
+from core_engine.ohlcv_store import bars_from_frame
+from core_engine.quote_store import QuoteStore
+from core_engine import tick_buffer
+from core_engine.trading_calendar import IST, is_fresh, is_market_open, market_phase, next_session_open, settlement_at
 
 PRICE_CACHE = {}
 CHANGE_CACHE = {}
 LAST_FETCH = {}
 
-FETCH_INTERVAL = 3  # seconds (Yahoo API hit)
+FETCH_INTERVAL = 3  # seconds between updater cycles (market hours)
 LOCK = threading.Lock()
 
+# ---- session schedule ----
+# Outside 09:15-15:30 IST the updater idles: session quotes are held
+# through the close, refreshed once after settlement, then served as the
+# settled value until the next open. While closed it only wakes every
+# QUOTE_CLOSED_POLL seconds (or on a new symbol) to pick up cold symbols.
+QUOTE_CLOSED_POLL = float(os.getenv("SEESTOX_QUOTE_CLOSED_POLL", "60"))
+_WAKE = threading.Event()
 
-def _fetch_quote_from_yahoo(symbol: str):
-    try:
-        ticker = yf.Ticker(symbol + ".NS")
-        data = ticker.history(period="5d")
+# ---- batched refresh ----
+# Each symbol is refreshed about once per QUOTE_STALENESS_TARGET seconds.
+# A cycle refreshes at most QUOTE_MAX_PER_CYCLE of the stalest symbols in
+# multi-ticker chunks on a small pool, so cycle cost stays flat as the
+# symbol set grows.
+QUOTE_STALENESS_TARGET = float(os.getenv("SEESTOX_QUOTE_STALENESS_TARGET", "15"))
+QUOTE_BATCH_SIZE = int(os.getenv("SEESTOX_QUOTE_BATCH_SIZE", "50"))
+QUOTE_WORKERS = int(os.getenv("SEESTOX_QUOTE_WORKERS", "4"))
+QUOTE_MAX_PER_CYCLE = int(os.getenv("SEESTOX_QUOTE_MAX_PER_CYCLE", "200"))
 
-        if data.empty:
-            return None, None
+# ---- demand tracking ----
+# Symbols seen within QUOTE_HOT_WINDOW (or held by a subscriber or pin)
+# refresh at the staleness target; colder ones QUOTE_COLD_FACTOR times
+# slower. Nobody asking for QUOTE_IDLE_EVICT_MINUTES (and no subscriber
+# or pin) -> evicted.
+QUOTE_HOT_WINDOW = float(os.getenv("SEESTOX_QUOTE_HOT_WINDOW", "120"))
+QUOTE_COLD_FACTOR = float(os.getenv("SEESTOX_QUOTE_COLD_FACTOR", "4"))
+QUOTE_IDLE_EVICT_MINUTES = float(os.getenv("SEESTOX_QUOTE_IDLE_EVICT_MINUTES", "15"))
+QUOTE_DEMAND_HALF_LIFE = 300.0  # seconds
 
-        closes = data["Close"].dropna().tolist()
-        if not closes:
-            return None, None
+SUBSCRIPTIONS = {}
 
-        close = float(closes[-1])
-        prev = float(closes[-2]) if len(closes) >= 2 else None
-        change_pct = None
-        if prev and prev != 0:
-            change_pct = round(((close - prev) / prev) * 100, 2)
+# ---- watchlist pins ----
+# Symbols on any watchlist are pinned. Every updater re-reads the set from
+# the pin source (the Watchlist table, see set_pin_source) each
+# QUOTE_PIN_INTERVAL seconds, so pins survive restarts and do not depend on
+# which worker handled an add or remove.
+QUOTE_PIN_INTERVAL = float(os.getenv("SEESTOX_QUOTE_PIN_INTERVAL", "30"))
+_PIN_SOURCE = None
 
-        return round(close, 2), change_pct
+# ---- cross-worker sharing ----
+# One elected process polls Yahoo and writes the shared quote table; the
+# other workers publish their clients' interest and pull changed rows.
+QUOTE_SHARED = os.getenv("SEESTOX_QUOTE_SHARED", "1").strip().lower() not in ("0", "false", "no")
+QUOTE_SYNC_INTERVAL = float(os.getenv("SEESTOX_QUOTE_SYNC_INTERVAL", "1"))
+QUOTE_INTEREST_INTERVAL = float(os.getenv("SEESTOX_QUOTE_INTEREST_INTERVAL", "5"))
 
-    except Exception:
-        return None, None
+# ---- updater ----
+# Only processes that serve quotes run the updater: the WSGI/ASGI entry
+# points call start_price_engine(); importing this module (celery, the
+# scheduler, management commands, tests) never starts a thread.
+QUOTE_UPDATER = os.getenv("SEESTOX_QUOTE_UPDATER", "1").strip().lower() not in ("0", "false", "no")
 
+_STORE = None
+_STORE_FAILED = False
+_SYNCED_VERSION = 0
+_ENGINE_STARTED = False
+_ENGINE_LOCK = threading.Lock()
 
-        if data.empty:
-            return None, None
+# ---- change feed ----
+# QUOTE_VERSION[symbol] is the version of the symbol's last value change.
+# With the shared store versions come from its global counter (so they
+# agree across workers); standalone they are stamped locally.
+QUOTE_VERSION = {}
+_VERSION = 0
+# versions are only comparable within one epoch: the shared store's, or
+# this process's own when it stamps versions locally
+_EPOCH = secrets.randbits(62)
+_QUOTES_CHANGED = threading.Condition(LOCK)
 
-        close = float(data["Close"].iloc[-1])
-        prev = float(data["Close"].iloc[-2]) if len(data["Close"]) > 1 else None
-        change_pct = None
-        if prev and prev != 0:
-            change_pct = round(((close - prev) / prev) * 100, 2)
+_LAST_ATTEMPT = {}
+_POOL = ThreadPoolExecutor(max_workers=max(1, QUOTE_WORKERS), thread_name_prefix="quote-fetch")
+logger = logging.getLogger("core_engine.price_engine")
 
-        return round(close, 2), change_pct
 
-    except Exception:
+class Subscription:
+    __slots__ = (
+        "refcount", "pinned", "last_access", "demand", "demand_ts",
+        "remote_refcount", "remote_access", "remote_demand",
+    )
+
+    def __init__(self, now: float):
+        # open streams in this process (subscribe / unsubscribe)
+        self.refcount = 0
+        # on some watchlist (set by _refresh_pins)
+        self.pinned = False
+        self.last_access = now
+        self.demand = 0.0
+        self.demand_ts = now
+        # other workers' interest (merged by the elected updater)
+        self.remote_refcount = 0
+        self.remote_access = 0.0
+        self.remote_demand = 0.0
+
+    def touch(self, now: float) -> None:
+        # exponentially decayed request count
+        self.demand = self.demand_at(now) + 1.0
+        self.demand_ts = now
+        self.last_access = now
+
+    def local_demand_at(self, now: float) -> float:
+        elapsed = max(0.0, now - self.demand_ts)
+        return self.demand * math.pow(0.5, elapsed / QUOTE_DEMAND_HALF_LIFE)
+
+    def demand_at(self, now: float) -> float:
+        return self.local_demand_at(now) + self.remote_demand
+
+    @property
+    def total_refcount(self) -> int:
+        return self.refcount + self.remote_refcount
+
+    @property
+    def held(self) -> bool:
+        return self.pinned or self.total_refcount > 0
+
+    @property
+    def latest_access(self) -> float:
+        return max(self.last_access, self.remote_access)
+
+    def is_hot(self, now: float) -> bool:
+        return self.held or now - self.latest_access <= QUOTE_HOT_WINDOW
+
+
+def _touch(symbol: str, now: float = None) -> None:
+    # caller holds LOCK
+    now = time.time() if now is None else now
+    sub = SUBSCRIPTIONS.get(symbol)
+    if sub is None:
+        sub = SUBSCRIPTIONS[symbol] = Subscription(now)
+    sub.touch(now)
+
+
+def _quote_from_closes(closes):
+    if closes.size == 0:
         return None, None
 
+    close = float(closes[-1])
+    prev = float(closes[-2]) if closes.size >= 2 else None
+    change_pct = None
+    if prev and prev != 0:
+        change_pct = round(((close - prev) / prev) * 100, 2)
+
+    return round(close, 2), change_pct
+
+
+def _fetch_quote_batch(symbols):
+    """
+    One multi-ticker download (last 5 daily bars) for a chunk of symbols.
+    Returns {symbol: (price, change_pct)} for the symbols that came back.
+    """
+    tickers = [f"{symbol}.NS" for symbol in symbols]
+    try:
+        raw = get_provider().download(
+            tickers,
+            period="5d",
+            group_by="ticker",
+            progress=False,
+            threads=False,
+        )
+    except Exception:
+        logger.warning("Quote batch failed (%s symbols)", len(symbols), exc_info=True)
+        return {}
+
+    quotes = {}
+    for symbol, yf_symbol in zip(symbols, tickers):
+        try:
+            closes = bars_from_frame(raw, yf_symbol)["close"]
+        except Exception:
+            continue
+        price, change_pct = _quote_from_closes(closes)
+        if price:
+            quotes[symbol] = (price, change_pct)
+    return quotes
+
+
+def _fetch_quotes(symbols):
+    chunk_size = max(1, QUOTE_BATCH_SIZE)
+    chunks = [symbols[i:i + chunk_size] for i in range(0, len(symbols), chunk_size)]
+    if not chunks:
+        return {}
+    if len(chunks) == 1:
+        return _fetch_quote_batch(chunks[0])
+
+    quotes = {}
+    for result in _POOL.map(_fetch_quote_batch, chunks):
+        quotes.update(result)
+    return quotes
+
+
+def _apply_local(rows) -> list:
+    """
+    rows: (symbol, price, change_pct, fetched_at, version). Only symbols
+    this worker tracks are applied; version None is stamped locally.
+    Wakes stream waiters and returns the symbols whose value changed.
+    New in-session observations also feed the intraday bar ring.
+    """
+    global _VERSION
+    changed = []
+    ticks = []
+    with LOCK:
+        for symbol, price, change_pct, fetched_at, version in rows:
+            # symbol may have been removed while the batch was in flight
+            if symbol not in PRICE_CACHE:
+                continue
+            # never let an older row overwrite a newer local quote
+            previous_fetch = LAST_FETCH.get(symbol, 0.0)
+            if fetched_at < previous_fetch:
+                continue
+            if fetched_at > previous_fetch and price is not None:
+                ticks.append((symbol, fetched_at, price))
+            LAST_FETCH[symbol] = fetched_at
+            if version is not None:
+                _VERSION = max(_VERSION, version)
+            if PRICE_CACHE[symbol] == price and CHANGE_CACHE[symbol] == change_pct:
+                continue
+            if version is None:
+                _VERSION += 1
+                version = _VERSION
+            PRICE_CACHE[symbol] = price
+            CHANGE_CACHE[symbol] = change_pct
+            QUOTE_VERSION[symbol] = version
+            changed.append(symbol)
+        if changed:
+            _QUOTES_CHANGED.notify_all()
+
+    session = {}
+    for symbol, fetched_at, price in ticks:
+        if fetched_at not in session:
+            session[fetched_at] = is_market_open(fetched_at)
+        if session[fetched_at]:
+            tick_buffer.record_tick(symbol, fetched_at, price)
+    return changed
+
+
+def _apply_quotes(quotes, fetched_at=None):
+    fetched_at = time.time() if fetched_at is None else fetched_at
+    versions = {}
+
+    store = _quote_store()
+    if store is not None and quotes:
+        try:
+            versions = store.publish_quotes(
+                {symbol: (price, change_pct, fetched_at) for symbol, (price, change_pct) in quotes.items()}
+            )
+        except Exception:
+            logger.warning("Failed to publish quotes to shared store", exc_info=True)
+
+    _apply_local([
+        (symbol, price, change_pct, fetched_at, versions.get(symbol))
+        for symbol, (price, change_pct) in quotes.items()
+    ])
+
+
+# ==================================================
+# SHARED STORE (CROSS-WORKER)
+# ==================================================
+
+def _quote_store():
+    global _STORE, _STORE_FAILED
+    if not QUOTE_SHARED or _STORE_FAILED:
+        return None
+    if _STORE is None:
+        with _ENGINE_LOCK:
+            if _STORE is None and not _STORE_FAILED:
+                try:
+                    _STORE = QuoteStore()
+                except Exception:
+                    # read-only FS etc.: fall back to one updater per process
+                    logger.warning("Shared quote store unavailable, running standalone", exc_info=True)
+                    _STORE_FAILED = True
+    return _STORE
+
+
+def _worker_id() -> str:
+    return str(os.getpid())
+
+
+def _sync_from_store(store) -> int:
+    """
+    Pulls rows changed since the last sync into the local caches.
+    """
+    global _SYNCED_VERSION
+    rows = store.quotes_since(_SYNCED_VERSION)
+    if not rows:
+        return 0
+    _apply_local(rows)
+    _SYNCED_VERSION = max(_SYNCED_VERSION, rows[-1][4])
+    return len(rows)
+
+
+def _publish_interest(store, now: float) -> None:
+    cutoff = now - QUOTE_IDLE_EVICT_MINUTES * 60
+    with LOCK:
+        rows = [
+            (symbol, sub.last_access, sub.refcount, sub.local_demand_at(now))
+            for symbol, sub in SUBSCRIPTIONS.items()
+            if sub.refcount > 0 or sub.last_access >= cutoff
+        ]
+    store.publish_interest(_worker_id(), rows)
+
+
+def _merge_remote_interest(store, now: float) -> None:
+    """
+    Elected updater only: folds other workers' interest into the local
+    subscription table so they are polled (and evicted) like local ones.
+    """
+    remote = store.read_interest(since=now - QUOTE_INTEREST_INTERVAL * 6, exclude_worker=_worker_id())
+    with LOCK:
+        for symbol, sub in SUBSCRIPTIONS.items():
+            if symbol not in remote:
+                sub.remote_refcount = 0
+                sub.remote_access = 0.0
+                sub.remote_demand = 0.0
+        for symbol, (last_access, refcount, demand) in remote.items():
+            sub = SUBSCRIPTIONS.get(symbol)
+            if sub is None:
+                sub = SUBSCRIPTIONS[symbol] = Subscription(0.0)
+            sub.remote_refcount = refcount
+            sub.remote_access = last_access
+            sub.remote_demand = demand
+            if symbol not in PRICE_CACHE:
+                PRICE_CACHE[symbol] = None
+                CHANGE_CACHE[symbol] = None
+                LAST_FETCH[symbol] = 0.0
+    store.prune_interest(before=now - QUOTE_IDLE_EVICT_MINUTES * 60)
+
+
+def _staleness_target(symbol: str, now: float) -> float:
+    sub = SUBSCRIPTIONS.get(symbol)
+    if sub is not None and sub.is_hot(now):
+        return QUOTE_STALENESS_TARGET
+    return QUOTE_STALENESS_TARGET * QUOTE_COLD_FACTOR
+
+
+def _due_symbols(now=None):
+    """
+    Symbols whose quote is past their staleness target (quotes stay valid
+    until the next session once the market has settled), skipping ones
+    attempted within the target. Highest recent demand first, then stalest.
+    """
+    now = time.time() if now is None else now
+    settling = market_phase(now) == "settling"
+    with LOCK:
+        due = []
+        for symbol in PRICE_CACHE:
+            last_fetch = LAST_FETCH.get(symbol, 0.0)
+            # close -> settlement: hold session quotes for the settlement pass
+            if settling and last_fetch:
+                continue
+            target = _staleness_target(symbol, now)
+            if is_fresh(last_fetch, target, now=now):
+                continue
+            if now - _LAST_ATTEMPT.get(symbol, 0.0) < target:
+                continue
+            sub = SUBSCRIPTIONS.get(symbol)
+            demand = sub.demand_at(now) if sub is not None else 0.0
+            due.append((-demand, LAST_FETCH.get(symbol, 0.0), symbol))
+    due.sort()
+    return [symbol for _, _, symbol in due[:max(1, QUOTE_MAX_PER_CYCLE)]]
+
+
+def _refresh_pins(symbols) -> None:
+    """
+    Pins exactly `symbols` (tracked, hot, never evicted) and unpins the rest.
+    """
+    symbols = set(symbols)
+    with LOCK:
+        for symbol, sub in SUBSCRIPTIONS.items():
+            sub.pinned = symbol in symbols
+        for symbol in symbols:
+            sub = SUBSCRIPTIONS.get(symbol)
+            if sub is None:
+                sub = SUBSCRIPTIONS[symbol] = Subscription(0.0)
+            sub.pinned = True
+            if symbol not in PRICE_CACHE:
+                PRICE_CACHE[symbol] = None
+                CHANGE_CACHE[symbol] = None
+                LAST_FETCH[symbol] = 0.0
+
+
+def _forget(symbol: str) -> None:
+    # caller holds LOCK
+    PRICE_CACHE.pop(symbol, None)
+    CHANGE_CACHE.pop(symbol, None)
+    LAST_FETCH.pop(symbol, None)
+    QUOTE_VERSION.pop(symbol, None)
+    _LAST_ATTEMPT.pop(symbol, None)
+    SUBSCRIPTIONS.pop(symbol, None)
+    tick_buffer.forget(symbol)
+
+
+def evict_idle_symbols(now=None) -> list:
+    """
+    Drops symbols with no subscriber, no pin and no request for
+    QUOTE_IDLE_EVICT_MINUTES, so one-off lookups stop being polled.
+    """
+    now = time.time() if now is None else now
+    cutoff = now - QUOTE_IDLE_EVICT_MINUTES * 60
+    with LOCK:
+        idle = [
+            symbol for symbol in PRICE_CACHE
+            if (
+                SUBSCRIPTIONS.get(symbol) is None
+                or (not SUBSCRIPTIONS[symbol].held and SUBSCRIPTIONS[symbol].latest_access < cutoff)
+            )
+        ]
+        for symbol in idle:
+            _forget(symbol)
+    if idle:
+        logger.info("Evicted %s idle quote symbols", len(idle))
+    return idle
+
 
 def get_price(symbol: str):
     """
     FAST READ:
     - JS calls every 3 sec
     - This function NEVER calls Yahoo directly
+    - pure read: demand is recorded by register_symbol() / subscribe()
     """
 
     with LOCK:
@@ -70,61 +453,243 @@ def get_change_percent(symbol: str):
         return CHANGE_CACHE.get(symbol)
 
 
+def quote_version() -> int:
+    with LOCK:
+        return _VERSION
+
+
+def quote_epoch() -> str:
+    """
+    Names the sequence quote_version() counts in. A `since` version from
+    another epoch (another standalone worker, a restart, a recreated
+    store) cannot be compared and must get a full snapshot.
+    """
+    store = _quote_store()
+    if store is not None:
+        return f"s{store.epoch:x}"
+    return f"p{_EPOCH:x}"
+
+
+def quotes_changed_since(symbols, version: int):
+    """
+    Returns (current_version, {symbol: (price, change_pct, version)}) for
+    the given symbols whose value changed after `version`.
+    """
+    with LOCK:
+        changed = {
+            symbol: (PRICE_CACHE.get(symbol), CHANGE_CACHE.get(symbol), QUOTE_VERSION[symbol])
+            for symbol in symbols
+            if QUOTE_VERSION.get(symbol, 0) > version
+        }
+        return _VERSION, changed
+
+
+def wait_for_quote_change(version: int, timeout: float) -> int:
+    """
+    Blocks until any quote moves past `version` (or timeout) and returns
+    the current version. Fed by the updater / store sync, no polling.
+    """
+    with _QUOTES_CHANGED:
+        _QUOTES_CHANGED.wait_for(lambda: _VERSION > version, timeout=timeout)
+        return _VERSION
+
+
+def _refresh_cycle() -> None:
+    evict_idle_symbols()
+    symbols = _due_symbols()
+    if symbols:
+        attempted_at = time.time()
+        with LOCK:
+            for symbol in symbols:
+                _LAST_ATTEMPT[symbol] = attempted_at
+        _apply_quotes(_fetch_quotes(symbols))
+
+
+def _updater_sleep(now: float) -> float:
+    """
+    Seconds until the elected updater's next cycle: FETCH_INTERVAL in
+    session, else until settlement / the next open, capped by
+    QUOTE_CLOSED_POLL.
+    """
+    phase = market_phase(now)
+    if phase == "open":
+        return FETCH_INTERVAL
+    if phase == "settling":
+        wake = settlement_at(datetime.fromtimestamp(now, IST).date()).timestamp()
+    else:
+        wake = next_session_open(now).timestamp()
+    return max(FETCH_INTERVAL, min(QUOTE_CLOSED_POLL, wake - now))
+
+
 def _price_updater():
     """
-    BACKGROUND THREAD
-    - Updates PRICE_CACHE every 60 seconds
+    BACKGROUND THREAD (one per worker)
+    - elected updater: merges every worker's interest, refreshes the
+      stalest due symbols in batches (see _updater_sleep for the pace)
+    - other workers: pull changed quotes every QUOTE_SYNC_INTERVAL
+    - both publish their own clients' interest and re-read watchlist pins
     """
+    last_interest = 0.0
+    last_pins = 0.0
     while True:
+        leader = True
         try:
-            with LOCK:
-                symbols = list(PRICE_CACHE.keys())
+            store = _quote_store()
+            leader = store is None or store.try_acquire_leadership()
+            now = time.time()
 
-            updates = {}
-            for symbol in symbols:
-                price, change_pct = _fetch_quote_from_yahoo(symbol)
-                if price:
-                    updates[symbol] = (price, change_pct)
-
-            if updates:
-                with LOCK:
-                    for symbol, quote in updates.items():
-                        price, change_pct = quote
-                        PRICE_CACHE[symbol] = price
-                        CHANGE_CACHE[symbol] = change_pct
-                        LAST_FETCH[symbol] = time.time()
+            if _PIN_SOURCE is not None and now - last_pins >= QUOTE_PIN_INTERVAL:
+                _refresh_pins(_PIN_SOURCE())
+                last_pins = now
+
+            if store is not None and now - last_interest >= QUOTE_INTEREST_INTERVAL:
+                _publish_interest(store, now)
+                last_interest = now
+
+            if leader:
+                if store is not None:
+                    _merge_remote_interest(store, now)
+                _refresh_cycle()
+            else:
+                evict_idle_symbols(now)
+
+            if store is not None:
+                # followers' eager fetches land here for the updater too
+                _sync_from_store(store)
 
         except Exception:
-            pass
+            logger.warning("Quote refresh cycle failed", exc_info=True)
 
-        time.sleep(FETCH_INTERVAL)
+        if leader:
+            # a newly registered symbol wakes the updater early
+            _WAKE.wait(_updater_sleep(time.time()))
+            _WAKE.clear()
+        else:
+            time.sleep(QUOTE_SYNC_INTERVAL)
 
 
 def register_symbol(symbol: str, eager: bool = True):
     """
-    Call this ONCE when stock is added.
-    eager=False avoids blocking request threads.
+    Call this ONCE when stock is added (repeat calls just record demand).
+    The only place request demand is counted: one call per symbol per
+    request. eager=False avoids blocking request threads.
     """
     with LOCK:
+        _touch(symbol)
         if symbol in PRICE_CACHE:
             return
         # reserve slot so background updater picks it up
         PRICE_CACHE[symbol] = None
         CHANGE_CACHE[symbol] = None
         LAST_FETCH[symbol] = 0.0
+    _WAKE.set()
+
+    # another worker (or the updater) may already hold a quote
+    store = _quote_store()
+    if store is not None:
+        try:
+            rows = store.read_quotes([symbol])
+        except Exception:
+            rows = []
+        _apply_local(rows)
+        if rows and is_fresh(rows[0][3], QUOTE_STALENESS_TARGET):
+            return
 
     if not eager:
         return
 
-    price, change_pct = _fetch_quote_from_yahoo(symbol)
     with LOCK:
-        if symbol in PRICE_CACHE and price is not None:
-            PRICE_CACHE[symbol] = price
-            CHANGE_CACHE[symbol] = change_pct
-            LAST_FETCH[symbol] = time.time()
+        _LAST_ATTEMPT[symbol] = time.time()
+    quote = _fetch_quotes([symbol]).get(symbol)
+    if quote:
+        _apply_quotes({symbol: quote})
 
 
-# =====================================
-# START BACKGROUND UPDATER (ON IMPORT)
-# =====================================
-threading.Thread(target=_price_updater, daemon=True).start()
+def subscribe(symbol: str, eager: bool = False):
+    """
+    Interest held by an open stream in this process. Subscribed symbols
+    stay hot and are never evicted until unsubscribed. Watchlists are
+    pinned from the database instead (see _refresh_pins), since their add
+    and remove may land on different workers.
+    """
+    with LOCK:
+        sub = SUBSCRIPTIONS.get(symbol)
+        if sub is None:
+            sub = SUBSCRIPTIONS[symbol] = Subscription(time.time())
+        sub.refcount += 1
+    # records the access itself
+    register_symbol(symbol, eager=eager)
+
+
+def unsubscribe(symbol: str):
+    with LOCK:
+        sub = SUBSCRIPTIONS.get(symbol)
+        if sub is not None and sub.refcount > 0:
+            sub.refcount -= 1
+
+
+def set_pin_source(source) -> None:
+    """
+    source() returns the symbols to keep pinned (see _refresh_pins).
+    The updater calls it every QUOTE_PIN_INTERVAL seconds.
+    """
+    global _PIN_SOURCE
+    _PIN_SOURCE = source
+
+
+def subscription_stats() -> dict:
+    now = time.time()
+    with LOCK:
+        subs = dict(SUBSCRIPTIONS)
+        tracked = len(PRICE_CACHE)
+    return {
+        "phase": market_phase(now),
+        "tracked": tracked,
+        "subscribed": sum(1 for sub in subs.values() if sub.refcount > 0),
+        "pinned": sum(1 for sub in subs.values() if sub.pinned),
+        "hot": sum(1 for sub in subs.values() if sub.is_hot(now)),
+        "top_demand": sorted(
+            ((symbol, round(sub.demand_at(now), 2)) for symbol, sub in subs.items()),
+            key=lambda item: -item[1],
+        )[:10],
+    }
+
+
+def start_price_engine() -> bool:
+    """
+    Opts this process in: starts its background updater thread once
+    (idempotent). Disabled with SEESTOX_QUOTE_UPDATER=0.
+    """
+    global _ENGINE_STARTED
+    if not QUOTE_UPDATER:
+        return False
+    with _ENGINE_LOCK:
+        if _ENGINE_STARTED:
+            return True
+        _ENGINE_STARTED = True
+    threading.Thread(target=_price_updater, name="price-engine", daemon=True).start()
+    return True
+
+
+def _reset_after_fork():
+    # threads, locks held by them, the fetch pool's workers and sqlite
+    # connections do not survive fork(): rebuild them in the child. Only
+    # a parent that had opted in (preloaded app server) restarts the
+    # updater; other forking processes (celery prefork) stay passive.
+    global _ENGINE_STARTED, _STORE, _SYNCED_VERSION, _POOL, _EPOCH, LOCK, _ENGINE_LOCK, _QUOTES_CHANGED, _WAKE
+    restart = _ENGINE_STARTED
+    _EPOCH = secrets.randbits(62)
+    LOCK = threading.Lock()
+    _QUOTES_CHANGED = threading.Condition(LOCK)
+    _WAKE = threading.Event()
+    _ENGINE_LOCK = threading.Lock()
+    _POOL = ThreadPoolExecutor(max_workers=max(1, QUOTE_WORKERS), thread_name_prefix="quote-fetch")
+    _ENGINE_STARTED = False
+    _STORE = None
+    _SYNCED_VERSION = 0
+    if restart:
+        start_price_engine()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,123 @@
+# core_engine/price_series.py
+# IMMUTABLE STRUCT-OF-ARRAYS PRICE SERIES (ANALYSIS HOT PATH)
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+def _column(values) -> np.ndarray:
+    """
+    Contiguous read-only float64 array; no copy when `values` already is one.
+    """
+    arr = np.ascontiguousarray(values, dtype=np.float64)
+    if arr.flags.writeable:
+        if arr.base is not None:
+            # never flip flags on a caller's buffer
+            arr = arr.copy()
+        arr.flags.writeable = False
+    return arr
+
+
+def _frame_column(df: pd.DataFrame, name: str):
+    if isinstance(df.columns, pd.MultiIndex):
+        # yfinance (Price, Ticker) columns: select the full tuple so the
+        # result is a view of the block rather than a one-column copy
+        matches = [col for col in df.columns if col[0] == name]
+        if not matches:
+            return None
+        col = df[matches[0]]
+    elif name in df.columns:
+        col = df[name]
+    else:
+        return None
+    if isinstance(col, pd.DataFrame):
+        col = col.iloc[:, 0]
+    return pd.to_numeric(col, errors="coerce").to_numpy()
+
+
+@dataclass(frozen=True)
+class PriceSeries:
+    """
+    Daily OHLCV bars as parallel NumPy columns, built once per request.
+
+    Columns are float64 and read-only; `dates` is datetime64[D].
+    Engines read arrays directly instead of re-wrapping DataFrames.
+    """
+
+    symbol: Optional[str]
+    dates: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, symbol: Optional[str] = None) -> "PriceSeries":
+        """
+        Accepts fetch_stock_data() frames (MultiIndex, 'Date' column) and
+        yf.Ticker.history() frames (flat columns, DatetimeIndex).
+        Rows without a close are dropped.
+        """
+        if df is None or len(df) == 0 or "Close" not in df.columns:
+            raise ValueError("Invalid price data")
+
+        if "Date" in df.columns:
+            dates = df["Date"]
+            if isinstance(dates, pd.DataFrame):
+                dates = dates.iloc[:, 0]
+            dates = pd.DatetimeIndex(dates)
+        else:
+            dates = pd.DatetimeIndex(df.index)
+        if dates.tz is not None:
+            dates = dates.tz_localize(None)
+
+        close = _frame_column(df, "Close")
+        columns = {}
+        for name in ("Open", "High", "Low", "Volume"):
+            values = _frame_column(df, name)
+            columns[name] = values if values is not None else np.full(len(close), np.nan)
+
+        valid = ~np.isnan(close.astype(np.float64, copy=False))
+        if not valid.all():
+            close = close[valid]
+            dates = dates[valid]
+            columns = {name: values[valid] for name, values in columns.items()}
+
+        return cls(
+            symbol=symbol or df.attrs.get("symbol"),
+            dates=_column_dates(dates),
+            open=_column(columns["Open"]),
+            high=_column(columns["High"]),
+            low=_column(columns["Low"]),
+            close=_column(close),
+            volume=_column(columns["Volume"]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    @property
+    def last_close(self) -> float:
+        return float(self.close[-1])
+
+
+def _column_dates(dates: pd.DatetimeIndex) -> np.ndarray:
+    arr = np.ascontiguousarray(dates.values.astype("datetime64[D]"))
+    arr.flags.writeable = False
+    return arr
+
+
+def as_price_series(data, symbol: Optional[str] = None) -> PriceSeries:
+    """
+    Engines call this at their boundary so they accept either a
+    PriceSeries (no work) or a legacy DataFrame (converted once).
+    """
+    if isinstance(data, PriceSeries):
+        return data
+    if isinstance(data, pd.DataFrame):
+        return PriceSeries.from_frame(data, symbol=symbol)
+    raise TypeError(f"Expected PriceSeries or DataFrame, got {type(data).__name__}")
@@ -0,0 +1,216 @@
+# core_engine/quote_store.py
+# CROSS-WORKER QUOTE TABLE (SQLITE WAL + FILE-LOCK LEADER ELECTION)
+
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes: every process updates on its own
+    fcntl = None
+
+
+# ==================================================
+# CONFIG
+# ==================================================
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QUOTE_DB_PATH = os.getenv("SEESTOX_QUOTE_DB") or os.path.join(BASE_DIR, "cache", "quotes.sqlite3")
+
+logger = logging.getLogger("core_engine.quote_store")
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS quotes (
+        symbol TEXT PRIMARY KEY,
+        price REAL,
+        change_pct REAL,
+        fetched_at REAL NOT NULL,
+        version INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_quotes_version ON quotes(version)",
+    """
+    CREATE TABLE IF NOT EXISTS interest (
+        symbol TEXT NOT NULL,
+        worker TEXT NOT NULL,
+        last_access REAL NOT NULL,
+        refcount INTEGER NOT NULL,
+        demand REAL NOT NULL,
+        updated_at REAL NOT NULL,
+        PRIMARY KEY (symbol, worker)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_interest_updated ON interest(updated_at)",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+)
+
+
+class QuoteStore:
+    """
+    One quote table shared by every worker on the host.
+
+    - the process holding `<db>.lock` (flock) is the elected updater and
+      the only one polling Yahoo; the OS releases it if that process dies
+    - every worker publishes which symbols its clients asked for
+      (interest rows), so the updater polls the union
+    - readers pull rows with version > last seen; WAL keeps reads from
+      blocking the updater's writes
+    """
+
+    def __init__(self, path: str = QUOTE_DB_PATH):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self._local = threading.local()
+        self._lock_handle = None
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            conn.execute("INSERT OR IGNORE INTO meta(key, value) VALUES ('version', 0)")
+            # identifies this table's version sequence (a recreated db restarts at 0)
+            conn.execute("INSERT OR IGNORE INTO meta(key, value) VALUES ('epoch', ?)", (secrets.randbits(62),))
+        self.epoch = conn.execute("SELECT value FROM meta WHERE key = 'epoch'").fetchone()[0]
+
+    # ---------------- connections ---------------- #
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ---------------- leadership ---------------- #
+    @property
+    def is_leader(self) -> bool:
+        return self._lock_handle is not None
+
+    def try_acquire_leadership(self) -> bool:
+        """
+        Non-blocking; keeps the lock once held. Without fcntl every
+        process reports itself as leader (standalone behaviour).
+        """
+        if fcntl is None:
+            return True
+        with self._lock:
+            if self._lock_handle is not None:
+                return True
+            handle = open(self.lock_path, "a+")
+            try:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                handle.close()
+                return False
+            handle.seek(0)
+            handle.truncate()
+            handle.write(str(os.getpid()))
+            handle.flush()
+            self._lock_handle = handle
+            logger.info("Quote updater elected (pid %s)", os.getpid())
+            return True
+
+    def release_leadership(self) -> None:
+        with self._lock:
+            if self._lock_handle is None or fcntl is None:
+                return
+            try:
+                fcntl.flock(self._lock_handle.fileno(), fcntl.LOCK_UN)
+            finally:
+                self._lock_handle.close()
+                self._lock_handle = None
+
+    # ---------------- quotes ---------------- #
+    def publish_quotes(self, quotes: Dict[str, Tuple[Optional[float], Optional[float], float]]) -> Dict[str, int]:
+        """
+        quotes: {symbol: (price, change_pct, fetched_at)}.
+        Every row gets its own version from one global counter.
+        Returns {symbol: version}.
+        """
+        if not quotes:
+            return {}
+        conn = self._conn()
+        versions = {}
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            current = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+            rows = []
+            for symbol, (price, change_pct, fetched_at) in quotes.items():
+                current += 1
+                versions[symbol] = current
+                rows.append((symbol, price, change_pct, fetched_at, current))
+            conn.executemany(
+                """
+                INSERT INTO quotes(symbol, price, change_pct, fetched_at, version)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(symbol) DO UPDATE SET
+                    price = excluded.price,
+                    change_pct = excluded.change_pct,
+                    fetched_at = excluded.fetched_at,
+                    version = excluded.version
+                """,
+                rows,
+            )
+            conn.execute("UPDATE meta SET value = ? WHERE key = 'version'", (current,))
+        return versions
+
+    def quotes_since(self, version: int) -> List[Tuple[str, Optional[float], Optional[float], float, int]]:
+        return self._conn().execute(
+            "SELECT symbol, price, change_pct, fetched_at, version FROM quotes WHERE version > ? ORDER BY version",
+            (int(version),),
+        ).fetchall()
+
+    def read_quotes(self, symbols: Iterable[str]) -> List[Tuple[str, Optional[float], Optional[float], float, int]]:
+        symbols = list(symbols)
+        if not symbols:
+            return []
+        placeholders = ",".join("?" for _ in symbols)
+        return self._conn().execute(
+            f"SELECT symbol, price, change_pct, fetched_at, version FROM quotes WHERE symbol IN ({placeholders})",
+            symbols,
+        ).fetchall()
+
+    # ---------------- interest ---------------- #
+    def publish_interest(self, worker: str, rows: Iterable[Tuple[str, float, int, float]]) -> None:
+        """
+        rows: (symbol, last_access, refcount, demand) for one worker.
+        Replaces that worker's previous rows.
+        """
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM interest WHERE worker = ?", (worker,))
+            conn.executemany(
+                "INSERT INTO interest(symbol, worker, last_access, refcount, demand, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [(symbol, worker, last_access, refcount, demand, now) for symbol, last_access, refcount, demand in rows],
+            )
+
+    def read_interest(self, since: float, exclude_worker: Optional[str] = None) -> Dict[str, Tuple[float, int, float]]:
+        """
+        Interest of live workers merged per symbol:
+        {symbol: (latest access, total refcount, total demand)}.
+        """
+        rows = self._conn().execute(
+            """
+            SELECT symbol, MAX(last_access), SUM(refcount), SUM(demand)
+            FROM interest
+            WHERE updated_at >= ? AND worker != ?
+            GROUP BY symbol
+            """,
+            (since, exclude_worker or ""),
+        ).fetchall()
+        return {symbol: (last_access, int(refcount or 0), float(demand or 0.0)) for symbol, last_access, refcount, demand in rows}
+
+    def prune_interest(self, before: float) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM interest WHERE updated_at < ?", (before,))
@@ -4,6 +4,8 @@
 import numpy as np
 import pandas as pd
 
+from core_engine.price_series import as_price_series
+
 
 def _to_1d_array(data) -> np.ndarray:
     """
@@ -65,19 +67,20 @@ def _detect_volatility_regime(close: np.ndarray) -> str:
         return "NORMAL"
 
 
-def calculate_base_range(df: pd.DataFrame, current_price: float) -> dict:
+def calculate_base_range(df, current_price: float) -> dict:
     """
     MAIN RULE-BASED EXPECTED RANGE CALCULATOR
-    (Zero pandas ambiguity)
+    (Zero pandas ambiguity; PriceSeries or legacy DataFrame)
     """
 
     if df is None or len(df) == 0:
         raise ValueError("Invalid price data for range calculation")
 
-    # Convert everything to numpy
-    high = _to_1d_array(df["High"])
-    low = _to_1d_array(df["Low"])
-    close = _to_1d_array(df["Close"])
+    # Read-only numpy columns (no conversion for a PriceSeries)
+    series = as_price_series(df)
+    high = series.high
+    low = series.low
+    close = series.close
 
     # ATR
     atr = _calculate_atr(high, low, close)
@@ -1,11 +1,18 @@
 # core_engine/sentiment_engine.py
 # PHASE-2E.4 — EXPLAINABLE, FRESH & TREND-AWARE SENTIMENT
 
-from typing import List, Dict
+from typing import List, Dict, Optional
 import feedparser
 from datetime import datetime, timezone, timedelta
+import copy
+import itertools
+from collections import OrderedDict
 import os
 import json
+import threading
+import time
+
+from core_engine.single_flight import SingleFlight
 
 
 # ==================================================
@@ -16,6 +23,12 @@ MAX_HEADLINES = 6
 MAX_NEWS_AGE_DAYS = 45
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 TREND_STORE = os.path.join(BASE_DIR, "sentiment_trend.json")
+
+# analysis-path snapshots (cached_sentiment): one RSS read per symbol per
+# SENTIMENT_TTL seconds, at most SENTIMENT_CACHE_MAX_ENTRIES symbols (LRU).
+# 0 disables. analyze_sentiment() itself always reads the feed.
+SENTIMENT_TTL = float(os.getenv("SEESTOX_SENTIMENT_TTL", "300"))
+SENTIMENT_CACHE_MAX_ENTRIES = int(os.getenv("SEESTOX_SENTIMENT_CACHE_MAX_ENTRIES", "256"))
 
 SOURCE_TRUST = {
     "bloomberg": 1.0,
@@ -42,10 +55,80 @@ NEGATIVE_KEYWORDS = [
 ]
 
 
+# ==================================================
+# SNAPSHOTS
+# ==================================================
+
+_SNAPSHOTS: "OrderedDict[str, tuple]" = OrderedDict()  # SYMBOL -> (taken_at, version, result), LRU order
+_SNAPSHOT_LOCK = threading.Lock()
+_VERSIONS = itertools.count(1)
+_FLIGHTS = SingleFlight("sentiment")
+
+
+def _fresh_snapshot(key: str, touch: bool = False) -> Optional[tuple]:
+    with _SNAPSHOT_LOCK:
+        snapshot = _SNAPSHOTS.get(key)
+        if snapshot is None:
+            return None
+        if time.time() - snapshot[0] >= SENTIMENT_TTL:
+            del _SNAPSHOTS[key]
+            return None
+        if touch:
+            _SNAPSHOTS.move_to_end(key)
+    return snapshot
+
+
+def _take_snapshot(symbol: str, key: str) -> tuple:
+    snapshot = _fresh_snapshot(key, touch=True)
+    if snapshot is None:
+        snapshot = (time.time(), next(_VERSIONS), analyze_sentiment(symbol))
+        with _SNAPSHOT_LOCK:
+            _SNAPSHOTS[key] = snapshot
+            _SNAPSHOTS.move_to_end(key)
+            while len(_SNAPSHOTS) > max(1, SENTIMENT_CACHE_MAX_ENTRIES):
+                _SNAPSHOTS.popitem(last=False)
+    return snapshot
+
+
+def sentiment_version(symbol: str) -> Optional[int]:
+    """
+    Id of the live sentiment snapshot for `symbol` (new id per RSS read),
+    None once it expired or was never taken.
+    """
+    snapshot = _fresh_snapshot(str(symbol).strip().upper())
+    return snapshot[1] if snapshot else None
+
+
+def sentiment_cache_stats() -> Dict:
+    with _SNAPSHOT_LOCK:
+        live = sum(1 for taken_at, _, _ in _SNAPSHOTS.values() if time.time() - taken_at < SENTIMENT_TTL)
+        total = len(_SNAPSHOTS)
+    return {
+        "ttl": SENTIMENT_TTL,
+        "max_entries": SENTIMENT_CACHE_MAX_ENTRIES,
+        "snapshots": total,
+        "live": live,
+        "flights": _FLIGHTS.stats(),
+    }
+
+
 # ==================================================
 # MAIN ENGINE
 # ==================================================
 
+def cached_sentiment(symbol: str) -> Dict:
+    """
+    analyze_sentiment() for the analysis pipeline: served from a per-symbol
+    snapshot up to SENTIMENT_TTL seconds old (see sentiment_version);
+    concurrent misses share one RSS read.
+    """
+    if SENTIMENT_TTL <= 0:
+        return analyze_sentiment(symbol)
+    key = str(symbol).strip().upper()
+    snapshot = _FLIGHTS.do(("news", key), _take_snapshot, symbol, key)
+    return copy.deepcopy(snapshot[2])
+
+
 def analyze_sentiment(symbol: str) -> Dict:
     news_items = get_news_items(symbol)
 
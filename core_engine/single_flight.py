@@ -0,0 +1,99 @@
+# core_engine/single_flight.py
+# SINGLE-FLIGHT REQUEST COALESCING (ONE IN-FLIGHT FETCH PER KEY)
+
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Concurrent callers asking for the same key while a fetch is running
+    wait for that fetch and share its result (or its exception).
+
+    Keys are tuples whose first element is the kind of call
+    ("history", "info", "news", "intraday") so counters can be split.
+    Results are shared objects: callers must treat them as read-only.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._executed: Dict[str, int] = {}
+        self._coalesced: Dict[str, int] = {}
+
+    @staticmethod
+    def _kind(key) -> str:
+        if isinstance(key, tuple) and key:
+            return str(key[0])
+        return "default"
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        kind = self._kind(key)
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self._executed[kind] = self._executed.get(kind, 0) + 1
+            else:
+                call.waiters += 1
+                self._coalesced[kind] = self._coalesced.get(kind, 0) + 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            executed = dict(self._executed)
+            coalesced = dict(self._coalesced)
+            in_flight = len(self._calls)
+
+        kinds = sorted(set(executed) | set(coalesced))
+        return {
+            "name": self.name,
+            "executed": sum(executed.values()),
+            "coalesced": sum(coalesced.values()),
+            "in_flight": in_flight,
+            "by_kind": {
+                kind: {
+                    "executed": executed.get(kind, 0),
+                    "coalesced": coalesced.get(kind, 0),
+                }
+                for kind in kinds
+            },
+        }
+
+
+# shared by every Yahoo call site (history, .info, .news, intraday history)
+YAHOO_FLIGHTS = SingleFlight("yahoo")
+
+
+def yahoo_flight_stats() -> dict:
+    return YAHOO_FLIGHTS.stats()
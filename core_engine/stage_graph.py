@@ -0,0 +1,192 @@
+# core_engine/stage_graph.py
+# SMALL DEPENDENCY-GRAPH RUNNER (CONCURRENT STAGES, PER-STAGE TIMEOUT + FALLBACK)
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+
+# ==================================================
+# CONFIG
+# ==================================================
+
+STAGE_WORKERS = int(os.getenv("SEESTOX_STAGE_WORKERS", "16"))
+
+# timed-out stages keep their worker until they return; once this many
+# of one stage name are still running past their timeout, new runs of
+# that name are shed to their fallback instead of taking another worker
+STAGE_MAX_OVERDUE = int(os.getenv("SEESTOX_STAGE_MAX_OVERDUE", str(max(1, STAGE_WORKERS // 4))))
+
+_POOL = ThreadPoolExecutor(max_workers=max(1, STAGE_WORKERS), thread_name_prefix="stage")
+logger = logging.getLogger("core_engine.stage_graph")
+
+
+class StageTimeout(TimeoutError):
+    pass
+
+
+class StageShed(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    One node of the graph. `fn` receives the results of `deps` as keyword
+    arguments. When it raises or runs past `timeout` seconds (counted from
+    submission), `fallback(error)` supplies the result instead; without a
+    fallback the error propagates out of run_stages().
+    """
+    name: str
+    fn: Callable[..., Any]
+    deps: Tuple[str, ...] = ()
+    timeout: Optional[float] = None
+    fallback: Optional[Callable[[BaseException], Any]] = None
+
+
+# ==================================================
+# STATS
+# ==================================================
+
+_STATS: Dict[str, Dict[str, float]] = {}
+_STATS_LOCK = threading.Lock()
+
+
+def _entry(name: str) -> Dict[str, float]:
+    # caller holds _STATS_LOCK
+    return _STATS.setdefault(
+        name,
+        {"ok": 0, "failed": 0, "timeouts": 0, "shed": 0, "overdue": 0, "late_finishes": 0, "total_ms": 0.0},
+    )
+
+
+def _count(name: str, outcome: str, elapsed: float) -> None:
+    with _STATS_LOCK:
+        stats = _entry(name)
+        stats[outcome] += 1
+        stats["total_ms"] += elapsed * 1000.0
+
+
+def stage_stats() -> Dict:
+    """
+    Per stage name: outcomes, average time, and `overdue` = timed-out
+    runs still holding a worker right now.
+    """
+    with _STATS_LOCK:
+        return {
+            name: {
+                **stats,
+                "avg_ms": round(stats["total_ms"] / max(1, stats["ok"] + stats["failed"] + stats["timeouts"]), 2),
+            }
+            for name, stats in _STATS.items()
+        }
+
+
+def _admit(name: str) -> bool:
+    with _STATS_LOCK:
+        return _entry(name)["overdue"] < STAGE_MAX_OVERDUE
+
+
+def _track_overdue(stage: "Stage", future, started: float) -> None:
+    """
+    Counts an abandoned stage until its worker is free again.
+    """
+    with _STATS_LOCK:
+        stats = _entry(stage.name)
+        stats["overdue"] += 1
+        overdue = stats["overdue"]
+    logger.warning("Stage %s still running after its %ss timeout (%s overdue)", stage.name, stage.timeout, overdue)
+
+    def _finished(_future) -> None:
+        with _STATS_LOCK:
+            stats = _entry(stage.name)
+            stats["overdue"] -= 1
+            stats["late_finishes"] += 1
+        logger.info("Overdue stage %s finished after %.0f ms", stage.name, (time.monotonic() - started) * 1000.0)
+
+    future.add_done_callback(_finished)
+
+
+# ==================================================
+# RUNNER
+# ==================================================
+
+def _resolve_failure(stage: Stage, error: BaseException, outcome: str, elapsed: float):
+    _count(stage.name, outcome, elapsed)
+    if stage.fallback is None:
+        raise error
+    logger.warning("Stage %s %s after %.0f ms; using fallback: %s", stage.name, outcome, elapsed * 1000.0, error)
+    return stage.fallback(error)
+
+
+def run_stages(stages: Iterable[Stage]) -> Dict[str, Any]:
+    """
+    Runs every stage on the shared pool as soon as its dependencies are
+    done, and returns {name: result}. End-to-end time is bounded by the
+    slowest dependency chain, each stage by its own timeout (a timed-out
+    stage is abandoned, not interrupted, and counted as overdue until it
+    returns; see STAGE_MAX_OVERDUE).
+    """
+    stages = {stage.name: stage for stage in stages}
+    for stage in stages.values():
+        missing = [dep for dep in stage.deps if dep not in stages]
+        if missing:
+            raise ValueError(f"Stage {stage.name} depends on unknown stage(s) {missing}")
+
+    results: Dict[str, Any] = {}
+    pending = dict(stages)
+    running = {}  # future -> (stage, started_at)
+
+    try:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                if all(dep in results for dep in stage.deps):
+                    del pending[name]
+                    if not _admit(name):
+                        error = StageShed(f"{name}: {STAGE_MAX_OVERDUE} earlier runs still past their timeout")
+                        results[name] = _resolve_failure(stage, error, "shed", 0.0)
+                        continue
+                    kwargs = {dep: results[dep] for dep in stage.deps}
+                    running[_POOL.submit(stage.fn, **kwargs)] = (stage, time.monotonic())
+
+            if not running:
+                if pending and not any(all(dep in results for dep in s.deps) for s in pending.values()):
+                    raise ValueError(f"Stage graph has a cycle: {sorted(pending)}")
+                continue
+
+            now = time.monotonic()
+            deadlines = [
+                started + stage.timeout
+                for stage, started in running.values()
+                if stage.timeout is not None
+            ]
+            wait_for = max(0.0, min(deadlines) - now) if deadlines else None
+            wait(list(running), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            now = time.monotonic()
+            for future in list(running):
+                stage, started = running[future]
+                elapsed = now - started
+                if future.done():
+                    del running[future]
+                    error = future.exception()
+                    if error is None:
+                        _count(stage.name, "ok", elapsed)
+                        results[stage.name] = future.result()
+                    else:
+                        results[stage.name] = _resolve_failure(stage, error, "failed", elapsed)
+                elif stage.timeout is not None and elapsed >= stage.timeout:
+                    del running[future]
+                    if not future.cancel():  # cancel only helps while still queued
+                        _track_overdue(stage, future, started)
+                    error = StageTimeout(f"{stage.name} exceeded {stage.timeout}s")
+                    results[stage.name] = _resolve_failure(stage, error, "timeouts", elapsed)
+    finally:
+        for future in running:
+            future.cancel()
+
+    return results
@@ -0,0 +1,252 @@
+# core_engine/tick_buffer.py
+# PER-SYMBOL INTRADAY BAR RING (QUOTE TICKS -> 1m BARS -> 1m/5m OHLC)
+
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from core_engine.trading_calendar import IST
+
+
+# ==================================================
+# CONFIG
+# ==================================================
+
+# one NSE session is 375 one-minute bars
+TICK_BUFFER_MINUTES = int(os.getenv("SEESTOX_TICK_BUFFER_MINUTES", "512"))
+TICK_BUFFER_SYMBOLS = int(os.getenv("SEESTOX_TICK_BUFFER_SYMBOLS", "1000"))
+
+_TS, _OPEN, _HIGH, _LOW, _CLOSE = range(5)
+
+
+# ==================================================
+# RING
+# ==================================================
+
+class BarRing:
+    """
+    Fixed-size ring of one-minute OHLC bars for one symbol, stored as a
+    (capacity, 5) float64 array: ts (bar start, epoch s), open, high, low,
+    close. Ticks update the current minute in place; a new minute
+    overwrites the oldest slot once full.
+
+    Seeded bars (seed_bars) are coarser: every bar up to `seeded_through`
+    is `seed_minutes` wide, only ticks after it are one-minute bars.
+    """
+
+    def __init__(self, capacity: int = TICK_BUFFER_MINUTES):
+        self.capacity = max(1, int(capacity))
+        self._bars = np.full((self.capacity, 5), np.nan)
+        self._start = 0
+        self._count = 0
+        self.seeded_through: Optional[float] = None
+        self.seed_minutes = 1
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _last_index(self) -> int:
+        return (self._start + self._count - 1) % self.capacity
+
+    def last_ts(self) -> Optional[float]:
+        if not self._count:
+            return None
+        return float(self._bars[self._last_index(), _TS])
+
+    def first_ts(self) -> Optional[float]:
+        if not self._count:
+            return None
+        return float(self._bars[self._start, _TS])
+
+    def _append(self, ts, open_, high, low, close) -> None:
+        if self._count < self.capacity:
+            idx = (self._start + self._count) % self.capacity
+            self._count += 1
+        else:
+            idx = self._start
+            self._start = (self._start + 1) % self.capacity
+        self._bars[idx] = (ts, open_, high, low, close)
+
+    def add_tick(self, ts: float, price: float) -> None:
+        minute = math.floor(ts / 60.0) * 60.0
+        last = self.last_ts()
+        if last is not None and minute == last:
+            row = self._bars[self._last_index()]
+            row[_HIGH] = max(row[_HIGH], price)
+            row[_LOW] = min(row[_LOW], price)
+            row[_CLOSE] = price
+        elif last is None or minute > last:
+            self._append(minute, price, price, price, price)
+        # ticks older than the current bar are dropped
+
+    def snapshot(self) -> np.ndarray:
+        """
+        Bars oldest first (a copy).
+        """
+        end = self._start + self._count
+        if end <= self.capacity:
+            return self._bars[self._start:end].copy()
+        return np.concatenate((self._bars[self._start:], self._bars[:end - self.capacity]))
+
+    def load(self, bars: np.ndarray) -> None:
+        """
+        Replaces the ring with `bars` (oldest first, newest kept if too long).
+        """
+        bars = bars[-self.capacity:]
+        self._bars[:len(bars)] = bars
+        self._start = 0
+        self._count = len(bars)
+
+
+def aggregate_bars(bars: np.ndarray, interval_minutes: int) -> np.ndarray:
+    """
+    Rolls sorted bars up into `interval_minutes` buckets (vectorised).
+    Works on 1m bars and on coarser seeded bars alike.
+    """
+    if len(bars) == 0 or interval_minutes <= 1:
+        return bars
+    width = interval_minutes * 60.0
+    buckets = np.floor(bars[:, _TS] / width) * width
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(bars)] - 1
+
+    out = np.empty((len(starts), 5))
+    out[:, _TS] = buckets[starts]
+    out[:, _OPEN] = bars[starts, _OPEN]
+    out[:, _HIGH] = np.maximum.reduceat(bars[:, _HIGH], starts)
+    out[:, _LOW] = np.minimum.reduceat(bars[:, _LOW], starts)
+    out[:, _CLOSE] = bars[ends, _CLOSE]
+    return out
+
+
+# ==================================================
+# REGISTRY
+# ==================================================
+
+_RINGS: "OrderedDict[str, BarRing]" = OrderedDict()
+_LOCK = threading.Lock()
+_STATS = {"ticks": 0, "seeded": 0}
+
+
+def _ring(symbol: str) -> BarRing:
+    # caller holds _LOCK
+    ring = _RINGS.get(symbol)
+    if ring is None:
+        ring = _RINGS[symbol] = BarRing()
+        while len(_RINGS) > TICK_BUFFER_SYMBOLS:
+            _RINGS.popitem(last=False)
+    else:
+        _RINGS.move_to_end(symbol)
+    return ring
+
+
+def record_tick(symbol: str, ts: float, price) -> None:
+    try:
+        price = float(price)
+    except (TypeError, ValueError):
+        return
+    if not math.isfinite(price) or price <= 0:
+        return
+    with _LOCK:
+        _ring(symbol).add_tick(ts, price)
+        _STATS["ticks"] += 1
+
+
+def seed_bars(symbol: str, frame: pd.DataFrame, interval_minutes: int = 5) -> None:
+    """
+    Backfills the ring from Yahoo intraday bars of `interval_minutes`
+    (cold miss). Seeded bars only fill the time before the first recorded
+    tick bar, so bars built from live ticks are never overwritten.
+    """
+    if frame is None or frame.empty or "Close" not in frame:
+        return
+    index = pd.DatetimeIndex(frame.index)
+    ts = index.asi8 / 1e9 if index.tz is not None else index.tz_localize(IST).asi8 / 1e9
+    close = pd.to_numeric(frame["Close"], errors="coerce").to_numpy(dtype=np.float64)
+    seeded = np.column_stack([
+        ts,
+        pd.to_numeric(frame.get("Open", frame["Close"]), errors="coerce").to_numpy(dtype=np.float64),
+        pd.to_numeric(frame.get("High", frame["Close"]), errors="coerce").to_numpy(dtype=np.float64),
+        pd.to_numeric(frame.get("Low", frame["Close"]), errors="coerce").to_numpy(dtype=np.float64),
+        close,
+    ])
+    seeded = seeded[np.isfinite(close) & (close > 0)]
+    if not len(seeded):
+        return
+
+    with _LOCK:
+        ring = _ring(symbol)
+        current = ring.snapshot()
+        seeded_through = ring.seeded_through
+        if seeded_through is not None and ring.seed_minutes != interval_minutes:
+            # one seed resolution per ring: the older seed is replaced
+            current = current[current[:, _TS] > seeded_through]
+            seeded_through = None
+        if len(current):
+            seeded = seeded[seeded[:, _TS] < current[0, _TS]]
+            if not len(seeded):
+                return
+            seeded = np.concatenate((seeded, current))
+            last_seeded = float(seeded[len(seeded) - len(current) - 1, _TS])
+        else:
+            last_seeded = float(seeded[-1, _TS])
+        ring.seeded_through = max(last_seeded, seeded_through or -math.inf)
+        ring.seed_minutes = max(1, int(interval_minutes))
+        ring.load(seeded)
+        _STATS["seeded"] += 1
+
+
+def intraday_bars(symbol: str, interval_minutes: int = 5, since: Optional[float] = None) -> np.ndarray:
+    """
+    (n, 5) array of ts/open/high/low/close bars at `interval_minutes`,
+    from `since` (epoch s) on. Empty when nothing is buffered. Seeded
+    bars are left out when `interval_minutes` is not a multiple of their
+    width (e.g. 1m output over a 5m seed), so resolutions never mix.
+    """
+    with _LOCK:
+        ring = _RINGS.get(symbol)
+        bars = ring.snapshot() if ring is not None else np.empty((0, 5))
+        seeded_through = ring.seeded_through if ring is not None else None
+        seed_minutes = ring.seed_minutes if ring is not None else 1
+    if seeded_through is not None and interval_minutes % seed_minutes and len(bars):
+        bars = bars[bars[:, _TS] > seeded_through]
+    if since is not None and len(bars):
+        bars = bars[bars[:, _TS] >= since]
+    return aggregate_bars(bars, interval_minutes)
+
+
+def bars_frame(bars: np.ndarray) -> pd.DataFrame:
+    """
+    Open/High/Low/Close frame on an IST DatetimeIndex (same shape as
+    Ticker.history intraday frames).
+    """
+    index = pd.to_datetime(bars[:, _TS], unit="s", utc=True).tz_convert(IST)
+    return pd.DataFrame(
+        {
+            "Open": bars[:, _OPEN],
+            "High": bars[:, _HIGH],
+            "Low": bars[:, _LOW],
+            "Close": bars[:, _CLOSE],
+        },
+        index=index,
+    )
+
+
+def forget(symbol: str) -> None:
+    with _LOCK:
+        _RINGS.pop(symbol, None)
+
+
+def tick_buffer_stats() -> dict:
+    with _LOCK:
+        return {
+            "symbols": len(_RINGS),
+            "bars": sum(len(ring) for ring in _RINGS.values()),
+            "ticks": _STATS["ticks"],
+            "seeded": _STATS["seeded"],
+        }
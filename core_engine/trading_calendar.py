@@ -0,0 +1,216 @@
+# core_engine/trading_calendar.py
+# NSE TRADING CALENDAR (IST SESSIONS, HOLIDAYS, SETTLEMENT, CACHE EXPIRY)
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+
+# ==================================================
+# CONFIG
+# ==================================================
+
+IST = ZoneInfo("Asia/Kolkata")
+
+SESSION_OPEN = dtime(9, 15)
+SESSION_CLOSE = dtime(15, 30)
+# end of the post-close session; closing prices are final after this
+SETTLEMENT_TIME = dtime(16, 0)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOLIDAYS_FILE = os.getenv("SEESTOX_HOLIDAYS_FILE") or os.path.join(BASE_DIR, "config", "nse_holidays.json")
+
+_HOLIDAYS = None
+_HOLIDAY_YEARS = frozenset()
+_UNCOVERED_YEARS_WARNED = set()
+_HOLIDAYS_LOCK = threading.Lock()
+logger = logging.getLogger("core_engine.trading_calendar")
+
+
+# ==================================================
+# HOLIDAYS
+# ==================================================
+
+def _load_holidays() -> dict:
+    """
+    {date: name} from config/nse_holidays.json ({"YYYY-MM-DD": "name"}).
+    A missing or broken file means weekends-only, never a crash.
+    """
+    global _HOLIDAYS, _HOLIDAY_YEARS
+    with _HOLIDAYS_LOCK:
+        if _HOLIDAYS is not None:
+            return _HOLIDAYS
+        holidays = {}
+        try:
+            with open(HOLIDAYS_FILE, "r", encoding="utf-8") as handle:
+                raw = json.load(handle)
+            for key, name in raw.items():
+                try:
+                    holidays[date.fromisoformat(key)] = name
+                except ValueError:
+                    continue
+        except FileNotFoundError:
+            logger.warning("NSE holiday file missing: %s (weekends only)", HOLIDAYS_FILE)
+        except Exception:
+            logger.warning("Unreadable NSE holiday file: %s", HOLIDAYS_FILE, exc_info=True)
+        _HOLIDAY_YEARS = frozenset(day.year for day in holidays)
+        _HOLIDAYS = holidays
+        return _HOLIDAYS
+
+
+def _holidays_for(day: date) -> dict:
+    """
+    The holiday map, warning once per year the file has no entries for
+    (such days are treated as weekends-only).
+    """
+    holidays = _load_holidays()
+    if day.year not in _HOLIDAY_YEARS and holidays and day.year not in _UNCOVERED_YEARS_WARNED:
+        _UNCOVERED_YEARS_WARNED.add(day.year)
+        logger.warning(
+            "NSE holiday file %s has no holidays for %s (covers %s); treating it as weekends only",
+            HOLIDAYS_FILE,
+            day.year,
+            ", ".join(str(year) for year in sorted(_HOLIDAY_YEARS)),
+        )
+    return holidays
+
+
+def holiday_name(day: date) -> Optional[str]:
+    return _holidays_for(day).get(day)
+
+
+def is_trading_day(day: date) -> bool:
+    return day.weekday() < 5 and day not in _holidays_for(day)
+
+
+# ==================================================
+# SESSIONS
+# ==================================================
+
+def now_ist() -> datetime:
+    return datetime.now(IST)
+
+
+def _as_ist(moment=None) -> datetime:
+    if moment is None:
+        return now_ist()
+    if isinstance(moment, (int, float)):
+        return datetime.fromtimestamp(moment, IST)
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=IST)
+    return moment.astimezone(IST)
+
+
+def session_bounds(day: date):
+    """
+    (open, close) datetimes for a trading day, None otherwise.
+    """
+    if not is_trading_day(day):
+        return None
+    return (
+        datetime.combine(day, SESSION_OPEN, IST),
+        datetime.combine(day, SESSION_CLOSE, IST),
+    )
+
+
+def settlement_at(day: date) -> datetime:
+    return datetime.combine(day, SETTLEMENT_TIME, IST)
+
+
+def is_market_open(moment=None) -> bool:
+    now = _as_ist(moment)
+    bounds = session_bounds(now.date())
+    return bool(bounds) and bounds[0] <= now <= bounds[1]
+
+
+def is_settling(moment=None) -> bool:
+    """
+    True between the close and the settlement time of a trading day.
+    """
+    now = _as_ist(moment)
+    bounds = session_bounds(now.date())
+    return bool(bounds) and bounds[1] < now < settlement_at(now.date())
+
+
+def market_phase(moment=None) -> str:
+    """
+    "open" (session), "settling" (close -> settlement) or "closed".
+    """
+    if is_market_open(moment):
+        return "open"
+    if is_settling(moment):
+        return "settling"
+    return "closed"
+
+
+def next_trading_day(day: date) -> date:
+    nxt = day + timedelta(days=1)
+    while not is_trading_day(nxt):
+        nxt += timedelta(days=1)
+    return nxt
+
+
+def previous_trading_day(day: date) -> date:
+    prev = day - timedelta(days=1)
+    while not is_trading_day(prev):
+        prev -= timedelta(days=1)
+    return prev
+
+
+def next_session_open(moment=None) -> datetime:
+    """
+    Start of the next session that has not opened yet.
+    """
+    now = _as_ist(moment)
+    today = now.date()
+    if is_trading_day(today) and now < datetime.combine(today, SESSION_OPEN, IST):
+        return datetime.combine(today, SESSION_OPEN, IST)
+    return datetime.combine(next_trading_day(today), SESSION_OPEN, IST)
+
+
+def last_settled_session(moment=None) -> date:
+    """
+    Most recent trading day whose closing prices are final.
+    """
+    now = _as_ist(moment)
+    today = now.date()
+    if is_trading_day(today) and now >= settlement_at(today):
+        return today
+    return previous_trading_day(today)
+
+
+# ==================================================
+# CACHE EXPIRY
+# ==================================================
+
+def expires_at(fetched_at: float, live_ttl: float, closed_max_age: Optional[float] = None) -> float:
+    """
+    Epoch seconds at which data fetched at `fetched_at` goes stale.
+
+    - live (open -> settlement): `live_ttl`, but never past settlement
+    - closed (after settlement, nights, weekends, holidays): held until
+      the next session opens, optionally capped by `closed_max_age`
+    """
+    fetched = _as_ist(fetched_at)
+    day = fetched.date()
+    bounds = session_bounds(day)
+
+    if bounds and bounds[0] <= fetched < settlement_at(day):
+        return min(fetched_at + live_ttl, settlement_at(day).timestamp())
+
+    expiry = next_session_open(fetched).timestamp()
+    if closed_max_age is not None:
+        expiry = min(expiry, fetched_at + closed_max_age)
+    return expiry
+
+
+def is_fresh(fetched_at: float, live_ttl: float, closed_max_age: Optional[float] = None, now: Optional[float] = None) -> bool:
+    if not fetched_at:
+        return False
+    now = time.time() if now is None else now
+    return now < expires_at(fetched_at, live_ttl, closed_max_age)
@@ -1,22 +1,33 @@
 # core_engine/trend_engine.py
 
-import pandas as pd
+import numpy as np
 
+from core_engine.price_series import as_price_series
 
-def analyze_trend(df: pd.DataFrame):
-    df = df.copy()
 
-    # Calculate EMAs
-    df["EMA_20"] = df["Close"].ewm(span=20, adjust=False).mean()
-    df["EMA_50"] = df["Close"].ewm(span=50, adjust=False).mean()
+def _ema_last(values: np.ndarray, span: int) -> float:
+    """
+    Last value of ewm(span, adjust=False).mean(), closed form (no loop).
+    """
+    n = len(values)
+    alpha = 2.0 / (span + 1.0)
+    decay = 1.0 - alpha
+    if n == 1:
+        return float(values[0])
+    weights = alpha * decay ** np.arange(n - 2, -1, -1)
+    return float(decay ** (n - 1) * values[0] + np.dot(weights, values[1:]))
+
 
-    # Latest row (Series)
-    latest = df.iloc[-1]
+def analyze_trend(df):
+    # PriceSeries (analyzer hot path) or legacy DataFrame
+    series = as_price_series(df)
+
+    # Calculate EMAs
+    ema_20 = _ema_last(series.close, 20)
+    ema_50 = _ema_last(series.close, 50)
 
     # ✅ EXPLICIT SCALARS (NO Series ANYWHERE)
-    ema_20 = latest["EMA_20"].item()
-    ema_50 = latest["EMA_50"].item()
-    volume = latest["Volume"].item()
+    volume = float(series.volume[-1])
 
     # Trend
     if ema_20 > ema_50:
@@ -30,7 +41,7 @@ def analyze_trend(df: pd.DataFrame):
         strength = 0.0
 
     # Volume trend
-    avg_volume = df["Volume"].tail(5).mean().item()
+    avg_volume = float(np.nanmean(series.volume[-5:]))
 
     if volume > avg_volume:
         volume_trend = "INCREASING"
@@ -40,8 +51,8 @@ def analyze_trend(df: pd.DataFrame):
         volume_trend = "FLAT"
 
     # Support / Resistance
-    support = round(df["Low"].tail(20).min().item(), 2)
-    resistance = round(df["High"].tail(20).max().item(), 2)
+    support = round(float(np.nanmin(series.low[-20:])), 2)
+    resistance = round(float(np.nanmax(series.high[-20:])), 2)
 
     return {
         "trend": trend,
@@ -0,0 +1,37 @@
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Switch prediction history to the dedupe key in SEESTOX_HISTORY_DEDUPE_KEY "
+        "(e.g. symbol,date,mode): collapse records that share it and enable upserts on it."
+    )
+    parser.add_argument("--dry-run", action="store_true", help="only count what would be collapsed")
+    args = parser.parse_args()
+
+    from core_engine.prediction_history import _history_store, collapse_duplicate_predictions, history_backend
+
+    before = _history_store().count() if history_backend() == "sqlite" else None
+    result = collapse_duplicate_predictions(dry_run=args.dry_run)
+    print(
+        "status=%s key=%s groups=%s removed=%s"
+        % (
+            result.get("status"),
+            ",".join(result.get("key") or []),
+            result.get("groups", 0),
+            result.get("removed", 0),
+        )
+    )
+    if before is not None:
+        print("total_before=%s total_after=%s" % (before, _history_store().count()))
+    if result.get("note"):
+        print("note=%s" % result["note"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
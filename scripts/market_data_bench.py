@@ -0,0 +1,81 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+
+def _time_calls(label, fn, symbols, rounds):
+    timings = []
+    failures = 0
+    for _ in range(rounds):
+        for symbol in symbols:
+            started = time.perf_counter()
+            try:
+                fn(symbol)
+            except Exception as exc:
+                failures += 1
+                print("%s_failed symbol=%s error=%s" % (label, symbol, exc))
+            timings.append((time.perf_counter() - started) * 1000)
+    if timings:
+        print(
+            "%s calls=%s failures=%s mean_ms=%.1f p50_ms=%.1f max_ms=%.1f"
+            % (
+                label,
+                len(timings),
+                failures,
+                statistics.mean(timings),
+                statistics.median(timings),
+                max(timings),
+            )
+        )
+    return failures
+
+
+def _main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Time analyze_stock / stock_detail_api against recorded or live market data."
+    )
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--mode", choices=["live", "record", "replay"], default="replay")
+    parser.add_argument("--dir", default=None, help="recording directory")
+    parser.add_argument("--latency-ms", type=float, default=None)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--skip-detail", action="store_true")
+    args = parser.parse_args()
+
+    import django
+
+    django.setup()
+
+    from core_engine.market_data_provider import set_provider
+
+    provider = set_provider(mode=args.mode, root=args.dir, latency_ms=args.latency_ms)
+    print("provider=%s" % provider.mode)
+
+    from core_engine.analyzer import analyze_stock
+
+    failures = _time_calls("analyze_stock", analyze_stock, args.symbols, args.rounds)
+
+    if not args.skip_detail:
+        from rest_framework.test import APIRequestFactory
+
+        from api.price_views import stock_detail_api
+
+        factory = APIRequestFactory()
+
+        def _detail(symbol):
+            response = stock_detail_api(factory.get("/api/v1/stock-detail/", {"symbol": symbol}))
+            if response.status_code >= 400:
+                raise RuntimeError("status=%s" % response.status_code)
+
+        failures += _time_calls("stock_detail_api", _detail, args.symbols, args.rounds)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
@@ -0,0 +1,29 @@
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Import prediction_history.json (list or dict format) into the SQLite history store."
+    )
+    parser.add_argument("--source", default=None, help="JSON file (default: the first history file found)")
+    parser.add_argument("--force", action="store_true", help="import even if already migrated / not empty")
+    args = parser.parse_args()
+
+    from core_engine.history_store import HISTORY_DB_PATH
+    from core_engine.prediction_history import _history_store, migrate_json_history
+
+    imported = migrate_json_history(source=args.source, force=args.force)
+    store = _history_store(migrate=False)
+    print(
+        "history_db=%s imported=%s total=%s migrated_from=%s"
+        % (HISTORY_DB_PATH, imported, store.count(), store.get_meta("migrated_from"))
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())